@@ -0,0 +1,1082 @@
+r"""
+benchmark.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Latency and throughput benchmarks against a local mock node; nothing is broadcast
+to a real network
+
+    python3 -m benchmarks.benchmark [name ...]
+
+"""
+# STANDARD PYTHON MODULES
+import asyncio
+import math
+import os
+import sys
+import time
+from binascii import unhexlify
+from hashlib import sha256
+from copy import deepcopy
+from random import choice, randrange, random, shuffle
+from struct import pack
+from threading import Lock, Thread
+
+# THIRD PARTY MODULES
+from secp256k1 import PrivateKey as secp256k1_PrivateKey
+from secp256k1 import ffi as secp256k1_ffi
+from secp256k1 import lib as secp256k1_lib
+from websocket import create_connection
+
+# GRAPHENE SIGNING MODULES
+from bitshares_signing import config, golden_vectors, graphene_auth, rpc_async
+from bitshares_signing.authorities import AuthorityCache
+from bitshares_signing.balances import BalanceLedger, deltas
+from bitshares_signing.base58 import PrivateKey
+from bitshares_signing.broadcast import Broadcaster
+from bitshares_signing.confirmations import Confirmation
+from bitshares_signing.connection_pool import ConnectionPool
+from bitshares_signing.deserializers import decode_transaction
+from bitshares_signing.fees import FeeSchedule
+from bitshares_signing.graphene_auth import broker
+from bitshares_signing.graphene_signing import (CHAIN_ID, SIGN_POOL, SIGNER,
+                                                Signer, canonical,
+                                                serialize_buffer,
+                                                serialize_objects, sign_many,
+                                                sign_transaction)
+from bitshares_signing.node_pool import NodePool
+from bitshares_signing.open_orders import OpenOrdersIndex
+from bitshares_signing.orderbook import pool_books
+from bitshares_signing.ref_block import RefBlockProvider
+from bitshares_signing.rpc import (open_order_ids, pool_terms, rpc_balances,
+                                   rpc_block_number, rpc_broadcast_transaction,
+                                   rpc_open_orders, rpc_pool_book, rpc_tx_fees,
+                                   wss_call, wss_query)
+from bitshares_signing.serializers import ENCODERS, epoch
+from bitshares_signing.session import BrokerSession
+from bitshares_signing.subscriptions import SubscriptionFeed
+from bitshares_signing.types import varint
+from bitshares_signing.utilities import disable_print, enable_print, it
+
+# BENCHMARK MODULES
+from .mock_node import (ACCOUNT, POOLS, PUBLIC_KEY, SIGNER_KEYS, MockChain,
+                        MockNode)
+
+# well known example key, see mock_node.PUBLIC_KEY
+WIF = "5KQwrPbwdL6PhXujxW37FSSQZ1JiwsST4cqQzDeyXtP79zkvFD3"
+# wifs of the mock SIGNER_KEYS
+SIGNER_WIFS = [
+    "5K1nxb8ueeDvYdSrzVe5YedetVdmwjpbrGEYEZ3wAfoKJVcgUV6",
+    "5HzEHuGfrgRsGrRE4gsotN82ySLTd9fokpBU6mRGboAaDZMz7sW",
+    "5KePx2FhE1v8aafP8jAKyGcoP7MNjYRsrCixfmqyQydiTPQ7Rmm",
+]
+
+
+def mock_order():
+    """
+    a single transfer order against the mock chain
+    """
+    return {
+        "header": {
+            "asset_id": "1.3.0",
+            "asset_precision": 5,
+            "currency_id": "1.3.5",
+            "currency_precision": 4,
+            "asset_name": "BTS",
+            "currency_name": "HONEST.USD",
+            "account_id": ACCOUNT["id"],
+            "account_name": ACCOUNT["name"],
+            "wif": WIF,
+        },
+        "edicts": [{"op": "transfer", "amount": 1, "account_id": "1.2.200"}],
+        "nodes": [],
+    }
+
+
+def timed(func, iterations):
+    """
+    :return list(): seconds elapsed for each call of func()
+    """
+    elapsed = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - start)
+    return elapsed
+
+
+def report(name, elapsed):
+    """
+    print mean, median, 99th percentile and worst latency in milliseconds; the
+    percentile by nearest rank, so a run under 100 samples reports its worst
+    """
+    elapsed = sorted(elapsed)
+    print(
+        "%-32s mean %8.2f ms   p50 %8.2f ms   p99 %8.2f ms   max %8.2f ms   (n=%d)"
+        % (
+            name,
+            1e3 * sum(elapsed) / len(elapsed),
+            1e3 * elapsed[len(elapsed) // 2],
+            1e3 * elapsed[min(len(elapsed) - 1, math.ceil(0.99 * len(elapsed)) - 1)],
+            1e3 * elapsed[-1],
+            len(elapsed),
+        )
+    )
+
+
+def rate(name, func, corpus, seconds):
+    """
+    print calls per second of func(item) cycling over the corpus
+    """
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        func(corpus[count % len(corpus)])
+        count += 1
+    print("%-32s %10.1f /sec" % (name, count / (time.perf_counter() - start)))
+
+
+def legacy_sign(digest, wif):
+    """
+    sign_transaction() before Signer; decodes the wif and creates a new
+    libsecp256k1 context on every canonical attempt
+    """
+    private_key = bytes(PrivateKey(wif))
+    ndata = secp256k1_ffi.new("int[8]")
+    while True:
+        ndata[0] += 1
+        privkey = secp256k1_PrivateKey(private_key, raw=True)
+        sig = secp256k1_ffi.new("secp256k1_ecdsa_recoverable_signature *")
+        if not secp256k1_lib.secp256k1_ecdsa_sign_recoverable(
+            privkey.ctx, sig, digest, privkey.private_key, secp256k1_ffi.NULL, ndata
+        ):
+            continue
+        signature, i = privkey.ecdsa_recoverable_serialize(sig)
+        if canonical(signature):
+            return i + 4 + 27, signature
+
+
+def legacy_signer_sign(signer, digest, wif):
+    """
+    Signer.sign() before its ffi buffers were reused; new ndata and signature
+    structs per call and attempt, serialized to bytes and then a bytearray to be
+    checked for canonical form
+    """
+    privkey = signer.private_key(wif)
+    ndata = secp256k1_ffi.new("int[8]")
+    while True:
+        ndata[0] += 1
+        sig = secp256k1_ffi.new("secp256k1_ecdsa_recoverable_signature *")
+        if not secp256k1_lib.secp256k1_ecdsa_sign_recoverable(
+            signer.ctx, sig, digest, privkey.private_key, secp256k1_ffi.NULL, ndata
+        ):
+            continue
+        signature, i = privkey.ecdsa_recoverable_serialize(sig)
+        if not any(
+            [
+                int(bytearray(signature)[0]) & 0x80,
+                int(bytearray(signature)[32]) & 0x80,
+                signature[0] == 0 and not int(signature[1]) & 0x80,
+                signature[32] == 0 and not int(signature[33]) & 0x80,
+            ]
+        ):
+            return i + 4 + 27, signature
+
+
+def legacy_handshake(nodes):
+    """
+    wss_handshake() before NodePool; shuffle, then the first node that answers
+    """
+    shuffle(nodes)
+    while True:
+        try:
+            nodes.append(nodes.pop(0))  # rotate list
+            return create_connection(nodes[0], timeout=config.HANDSHAKE_TIMEOUT)
+        except Exception:
+            continue
+
+
+def legacy_pool_book(balance_a, balance_b, depth=100, maxvolume=None):
+    """
+    rpc_pool_book() before the closed form; a python loop per level, then a sort
+    """
+    depth += 1
+    konstant = balance_a * balance_b
+    bidp, bidv, askp, askv = [], [], [], []
+    step = (balance_a if maxvolume is None else maxvolume) / depth
+    for i in range(1, depth):
+        delta_a = i * step
+        balance_b2 = konstant / (balance_a + delta_a)
+        askp.append(delta_a / abs(balance_b - balance_b2))
+        askv.append(step)
+    for i in range(1, depth):
+        delta_a = i * step
+        balance_b2 = konstant / (balance_a - delta_a)
+        bidp.append(delta_a / abs(balance_b - balance_b2))
+        bidv.append(step)
+    asks = list(map(list, sorted(zip(askp, askv), reverse=False)))
+    bids = list(map(list, sorted(zip(bidp, bidv), reverse=True)))
+    return {"asks": asks, "bids": bids}
+
+
+def legacy_varint(num):
+    """
+    types.varint() before the bytearray; one bytes object per 7 bit group
+    """
+    data = b""
+    while num >= 0x80:
+        data += bytes([(num & 0x7F) | 0x80])
+        num >>= 7
+    data += bytes([num])
+    return data
+
+
+def legacy_message(trx):
+    """
+    serialize_transaction()'s message by concatenation; the compiled encoders, each
+    into a buffer of its own, joined with bytes += and the chain id prepended
+    """
+    buf = b""
+    buf += pack("<H", trx["ref_block_num"])
+    buf += pack("<I", trx["ref_block_prefix"])
+    buf += pack("<I", epoch(trx["expiration"]))
+    buf += legacy_varint(len(trx["operations"]))
+    for op_id, operation in trx["operations"]:
+        buf += legacy_varint(op_id)
+        data = bytearray(96)
+        buf += bytes(data[: ENCODERS[op_id](operation, data, 0)])
+    buf += legacy_varint(len(trx["extensions"]))
+    return unhexlify(config.ID) + buf
+
+
+def random_operation(op_id):
+    """
+    a golden vector operation with random amounts, ids and optional fields
+    """
+    operation = deepcopy(golden_vectors.OPS[op_id][1])
+
+    def shuffle_values(obj):
+        for key, value in list(obj.items()):
+            if isinstance(value, dict):
+                shuffle_values(value)
+            elif isinstance(value, bool):
+                obj[key] = random() < 0.5
+            elif isinstance(value, int):
+                obj[key] = randrange(2 ** (8 * (1 if key == "precision" else 2)))
+            elif isinstance(value, str) and value.count(".") == 2:
+                space, kind, _ = value.split(".")
+                obj[key] = "%s.%s.%d" % (space, kind, randrange(2 ** randrange(1, 40)))
+
+    shuffle_values(operation)
+    if op_id in (0, 14) and random() < 0.5:
+        operation["memo"] = {
+            "from": PUBLIC_KEY,
+            "to": PUBLIC_KEY,
+            "nonce": randrange(2**64),
+            "message": "%08x" % randrange(2**32),
+        }
+    if op_id == 3 and random() < 0.5:
+        operation["extensions"] = {}
+    if op_id == 10 and random() < 0.5:
+        operation["bitasset_opts"] = {
+            "feed_lifetime_sec": 86400,
+            "minimum_feeds": 7,
+            "force_settlement_delay_sec": 86400,
+            "force_settlement_offset_percent": 100,
+            "maximum_force_settlement_volume": 2000,
+            "short_backing_asset": "1.3.0",
+        }
+    if op_id == 75:
+        for key in ("taker_fee_percent", "withdrawal_fee_percent"):
+            if random() < 0.5:
+                operation.pop(key)
+    return [op_id, operation]
+
+
+def bench_nodes(iterations=20):
+    """
+    handshake plus one query on a shuffled node vs. the best ranked node of five
+    mock nodes; (query delay, handshake delay, blocks behind)
+    """
+    profiles = [(0.05, 0.1, 0), (0.02, 0.05, 0), (0.001, 0.001, 500), (0.005, 0.01, 0)]
+    nodes = [
+        MockNode(delay, MockChain(1000000 - lag), handshake_delay=handshake).start()
+        for delay, handshake, lag in profiles
+    ]
+    urls = [node.url for node in nodes]
+
+    def query(rpc):
+        rpc_block_number(rpc)
+        rpc.close()
+
+    try:
+        old = timed(lambda: query(legacy_handshake(urls)), iterations)
+        # no scoreboard; the first node to answer while the ranking is made
+        start = time.perf_counter()
+        query(NodePool(urls).connect())
+        cold = time.perf_counter() - start
+        pool = NodePool(urls)
+        start = time.perf_counter()
+        pool.probe_all()
+        probe = time.perf_counter() - start
+        new = timed(lambda: query(pool.connect()), iterations)
+    finally:
+        for node in nodes:
+            node.stop()
+    report("shuffle and rotate", old)
+    report("NodePool ranked", new)
+    print("%-32s %8.2f ms" % ("NodePool cold connect", 1e3 * cold))
+    print("%-32s %8.2f ms" % ("NodePool parallel probe", 1e3 * probe))
+
+
+def bench_authorities(iterations=50, seconds=2.0):
+    """
+    the fewest keys for a multi-signature account and for it plus the mock account;
+    fetched authorities vs. cached ones, then signing with every wif at hand vs.
+    with the selection
+    """
+    wifs = [WIF] + SIGNER_WIFS
+    multisig = golden_vectors.transaction(1)
+    multisig["operations"][0][1]["seller"] = "1.2.101"
+    both = golden_vectors.transaction(1)
+    both["operations"] += deepcopy(multisig["operations"])
+    node = MockNode().start()
+    try:
+        rpc = create_connection(node.url)
+        authorities = AuthorityCache()
+        for wif in wifs:
+            assert authorities.public_key(wif) in [PUBLIC_KEY] + SIGNER_KEYS
+        # weight 2 + 1; with the mock account signing anyway, its authority is
+        # the cheaper second weight
+        assert authorities.keys(rpc, multisig["operations"], wifs) == SIGNER_WIFS[:2]
+        assert authorities.keys(rpc, both["operations"], wifs) == [
+            WIF,
+            SIGNER_WIFS[0],
+        ]
+        try:
+            authorities.keys(rpc, multisig["operations"], SIGNER_WIFS[1:])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("weight 2 of 3 accepted")
+
+        def fetched():
+            AuthorityCache().keys(rpc, both["operations"], wifs)
+
+        old = timed(fetched, iterations)
+        new = timed(lambda: authorities.keys(rpc, both["operations"], wifs), iterations)
+        rpc.close()
+    finally:
+        node.stop()
+    report("key selection, fetched", old)
+    report("key selection, cached", new)
+    message = CHAIN_ID + serialize_buffer(both)
+    selected = authorities.keys(None, both["operations"], wifs)
+    rate(
+        "%d wifs, sign all" % len(wifs),
+        lambda _: sign_transaction({"signatures": []}, message, wifs),
+        [None],
+        seconds,
+    )
+    rate(
+        "%d wifs, sign selection" % len(wifs),
+        lambda _: sign_transaction({"signatures": []}, message, selected),
+        [None],
+        seconds,
+    )
+
+
+def bench_balances(iterations=50, delay=0.005, block_interval=0.1):
+    """
+    account balances; get_named_account_balances per lookup vs. the balance ledger
+    following the subscription feed, with a limit order held from broadcast until
+    the mock chain, on 0.1 second blocks, shows it
+    """
+    node = MockNode(delay=delay).start()
+    node.chain.block_interval = block_interval
+    saved = config.NODES[:]
+    config.NODES[:] = [node.url]
+    operation = [
+        1,
+        {
+            "fee": {"amount": 500, "asset_id": "1.3.0"},
+            "seller": ACCOUNT["id"],
+            "amount_to_sell": {"amount": 10**9, "asset_id": "1.3.0"},
+            "min_to_receive": {"amount": 10**6, "asset_id": "1.3.5"},
+        },
+    ]
+
+    try:
+        rpc = create_connection(node.url)
+        old = timed(lambda: rpc_balances(rpc, ACCOUNT["name"]), iterations)
+        feed = SubscriptionFeed().start()
+        ledger = BalanceLedger()
+        ledger.follow(feed)
+        feed.socket.ready.wait(5)
+        new = timed(lambda: ledger.get(rpc, ACCOUNT["name"]), iterations)
+        # broadcast, in a block, and the block after
+        confirmation = Confirmation()
+        ledger.hold(ACCOUNT["name"], deltas([operation]), confirmation)
+        held = ledger.get(rpc, ACCOUNT["name"])["BTS"]
+        confirmation.set(node.chain.include({"operations": [operation]}))
+        time.sleep(5 * block_interval)
+        settled = ledger.get(rpc, ACCOUNT["name"])["BTS"]
+        chain = rpc_balances(rpc, ACCOUNT["name"])["BTS"]
+        assert held == settled == chain and not ledger.holds[ACCOUNT["name"]]
+        # a cancel whose confirmation is lost; its refund is never counted ahead
+        # of the chain, and its fee stays held until expiry
+        cancel = [
+            2,
+            {
+                "fee": {"amount": 500, "asset_id": "1.3.0"},
+                "fee_paying_account": ACCOUNT["id"],
+                "order": node.chain.limit_orders[-1]["id"],
+            },
+        ]
+        lost = Confirmation()
+        ledger.hold(ACCOUNT["name"], deltas([cancel]), lost)
+        lost.set(None)
+        cancelling = ledger.get(rpc, ACCOUNT["name"])["BTS"]
+        assert cancelling <= rpc_balances(rpc, ACCOUNT["name"])["BTS"]
+        node.chain.include({"operations": [cancel]})
+        time.sleep(5 * block_interval)
+        cancelled = ledger.get(rpc, ACCOUNT["name"])["BTS"]
+        refunded = rpc_balances(rpc, ACCOUNT["name"])["BTS"]
+        assert abs(cancelled - (refunded - 0.005)) < 1e-9
+        assert ledger.holds[ACCOUNT["name"]]
+        feed.close()
+        rpc.close()
+    finally:
+        config.NODES[:] = saved
+        node.stop()
+    report("rpc_balances", old)
+    report("BalanceLedger.get", new)
+    print(
+        "BTS held at broadcast %.5f, settled %.5f, on chain %.5f; seeds %d, notices %d"
+        % (held, settled, chain, ledger.stats["seeds"], ledger.stats["updates"])
+    )
+    print(
+        "BTS at a lost cancel %.5f, after it %.5f, on chain %.5f"
+        % (cancelling, cancelled, refunded)
+    )
+
+
+def bench_broadcast(count=100, delay=0.01, tail=(0.1, 0.3)):
+    """
+    seconds to the first acceptance of a signed transaction; one node vs. the
+    parallel broadcaster on three mock nodes of one chain that each stall 10%
+    """
+    chain = MockChain()
+    nodes = [MockNode(delay=delay, chain=chain, tail=tail).start() for _ in range(3)]
+    saved = config.NODES[:]
+    config.NODES[:] = [node.url for node in nodes]
+    try:
+        rpc = create_connection(nodes[0].url)
+        old = []
+        disable_print()
+        for idx in range(count):
+            start = time.perf_counter()
+            rpc_broadcast_transaction(rpc, {"nonce": idx})
+            old.append(time.perf_counter() - start)
+        enable_print()
+        rpc.close()
+        broadcaster = Broadcaster(width=3)
+        broadcaster.broadcast({"nonce": -1}).wait(every=True)  # warm the sockets
+        new = []
+        for idx in range(count):
+            start = time.perf_counter()
+            assert broadcaster.broadcast({"nonce": count + idx}).accepted
+            new.append(time.perf_counter() - start)
+        broadcaster.reports[-1].wait(every=True)
+        stats = broadcaster.stats
+        broadcaster.close()
+    finally:
+        enable_print()
+        config.NODES[:] = saved
+        for node in nodes:
+            node.stop()
+    report("one node", old)
+    report("Broadcaster(width=3)", new)
+    print(
+        "accepted %d, already known %d, failed %d"
+        % (stats["accepted"], stats["known"], stats["failed"])
+    )
+
+
+def bench_cancel(iterations=2, orders=3):
+    """
+    seconds for a cancel all order to clear the book; polling every 5 seconds vs.
+    waiting on the broadcast callback, with the mock including transactions 1.5
+    seconds after broadcast
+    """
+    node = MockNode().start()
+    saved = config.NODES[:]
+    config.NODES[:] = [node.url]
+
+    def cancel_all():
+        node.chain.limit_orders = [
+            {
+                "id": "1.7.%d" % (idx + 1),
+                "sell_price": {
+                    "base": {"asset_id": "1.3.0"},
+                    "quote": {"asset_id": "1.3.5"},
+                },
+            }
+            for idx in range(orders)
+        ]
+        order = mock_order()
+        order["edicts"] = [{"op": "cancel", "ids": ["1.7.X"]}]
+        session.broker(order)
+        assert not node.chain.limit_orders
+
+    try:
+        disable_print()
+        with BrokerSession() as session:
+            graphene_auth.CONFIRM_TIMEOUT = 0
+            old = timed(cancel_all, iterations)
+            graphene_auth.CONFIRM_TIMEOUT = config.CONFIRM_TIMEOUT
+            new = timed(cancel_all, iterations)
+    finally:
+        enable_print()
+        graphene_auth.CONFIRM_TIMEOUT = config.CONFIRM_TIMEOUT
+        config.NODES[:] = saved
+        node.stop()
+    report("cancel all, sleep polling", old)
+    report("cancel all, broadcast callback", new)
+
+
+def bench_decoder(operations=20, seconds=2.0, fuzz=5000):
+    """
+    round trips of random transactions of every operation through the serializer
+    and the decoder, then decoded messages per second holding limit order creates
+    """
+    op_ids = list(golden_vectors.OPS)
+    start = time.perf_counter()
+    for _ in range(fuzz):
+        trx = golden_vectors.transaction(0)
+        trx["operations"] = [
+            random_operation(choice(op_ids)) for _ in range(randrange(1, 5))
+        ]
+        data = serialize_buffer(trx)
+        assert serialize_buffer(decode_transaction(data)) == data
+        # every truncation is refused, never misread
+        try:
+            decode_transaction(data[: randrange(len(data))])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("truncated transaction decoded")
+    print(
+        "%d random round trips, %.0f /sec"
+        % (fuzz, fuzz / (time.perf_counter() - start))
+    )
+    corpus = []
+    for _ in range(100):
+        trx = golden_vectors.transaction(1)
+        trx["operations"] = [random_operation(1) for _ in range(operations)]
+        corpus.append(CHAIN_ID + serialize_buffer(trx))
+    rate(
+        "%d ops, decode" % operations,
+        lambda message: decode_transaction(message, CHAIN_ID),
+        corpus,
+        seconds,
+    )
+
+
+def bench_feed(seconds=2.0, block_interval=0.1):
+    """
+    reference block lag and fee update latency; polled vs. subscription feed, on a
+    mock chain with 0.1 second blocks
+    """
+    node = MockNode().start()
+    node.chain.block_interval = block_interval
+    saved = config.NODES[:]
+    config.NODES[:] = [node.url]
+
+    def lag(provider, rpc):
+        """
+        blocks behind the head, sampled 20 times a second
+        """
+        lags, start = [], time.time()
+        while time.time() - start < seconds:
+            block = provider.get(rpc)["head_block_number"]
+            lags.append(rpc_block_number(rpc)["head_block_number"] - block)
+            time.sleep(0.05)
+        return sum(lags) / len(lags), max(lags)
+
+    try:
+        rpc = create_connection(node.url)
+        polled = RefBlockProvider()
+        old = lag(polled, rpc)
+        feed = SubscriptionFeed()
+        followed, fees = RefBlockProvider(), FeeSchedule()
+        followed.follow(feed)
+        fees.follow(feed)
+        feed.start()
+        start = time.time()
+        while not feed.stats["subscribes"] and time.time() - start < 5:
+            time.sleep(0.001)
+        fees.check(rpc, force=True)
+        new = lag(followed, rpc)
+        parameters, start = fees.parameters, time.time()
+        node.chain.fee_scale = 20000
+        while fees.parameters == parameters and time.time() - start < 5:
+            time.sleep(0.001)
+        update = time.time() - start
+        # as if FEE_PARAMETERS_CHECK had passed; the feed makes the poll needless
+        fees.checked, checks = 0, fees.stats["checks"]
+        fees.check(rpc)
+        assert fees.stats["checks"] == checks, "fee parameters polled while following"
+        feed.close()
+        rpc.close()
+    finally:
+        config.NODES[:] = saved
+        node.stop()
+    for name, (mean, worst), provider in (
+        ("reference block, polled", old, polled),
+        ("reference block, feed", new, followed),
+    ):
+        print(
+            "%-32s mean %5.1f  max %3d blocks behind, %d fetches"
+            % (name, mean, worst, provider.stats["fetches"])
+        )
+    print(
+        "%-32s %8.2f ms, polled every %d seconds"
+        % ("fee update, feed", 1e3 * update, config.FEE_PARAMETERS_CHECK)
+    )
+
+
+def bench_hedge(queries=300, delay=0.005, tail=(0.05, 0.3)):
+    """
+    get_full_accounts latency on two mock nodes that each stall 5% of replies,
+    plain vs. hedged ConnectionPool
+    """
+    nodes = [MockNode(delay=delay, tail=tail).start() for _ in range(2)]
+    saved = config.NODES[:]
+    config.NODES[:] = [node.url for node in nodes]
+    params = ["database", "get_full_accounts", [["account-name"], "false"]]
+
+    def run(pool):
+        elapsed = []
+        for _ in range(queries):
+            start = time.perf_counter()
+            wss_query(pool, params)
+            elapsed.append(time.perf_counter() - start)
+        return elapsed
+
+    try:
+        with ConnectionPool() as pool:
+            old = run(pool)
+        with ConnectionPool(hedge=True) as pool:
+            new = run(pool)
+            stats = pool.hedges["get_full_accounts"]
+    finally:
+        config.NODES[:] = saved
+        for node in nodes:
+            node.stop()
+    report("ConnectionPool", old)
+    report("ConnectionPool(hedge=True)", new)
+    print(
+        "hedged %d of %d calls, the hedge won %d"
+        % (stats["hedged"], stats["calls"], stats["won"])
+    )
+
+
+def bench_orders(iterations=50, orders=40, delay=0.005):
+    """
+    open order ids of one market; get_full_accounts per lookup vs. the open orders
+    index following the subscription feed, checked against the mock book as orders
+    are placed and cancelled
+    """
+    node = MockNode(delay=delay).start()
+    saved = config.NODES[:]
+    config.NODES[:] = [node.url]
+    pair = mock_order()["header"]
+
+    def limit_order(idx):
+        base, quote = ("1.3.0", "1.3.5") if idx % 2 else ("1.3.5", "1.3.1")
+        return {
+            "id": "1.7.%d" % idx,
+            "seller": ACCOUNT["id"],
+            "sell_price": {"base": {"asset_id": base}, "quote": {"asset_id": quote}},
+        }
+
+    def book():
+        full_accounts = [[ACCOUNT["name"], {"limit_orders": node.chain.limit_orders}]]
+        return sorted(open_order_ids(full_accounts, pair))
+
+    try:
+        node.chain.limit_orders = [limit_order(idx + 1) for idx in range(orders)]
+        rpc = create_connection(node.url)
+        old = timed(lambda: rpc_open_orders(rpc, ACCOUNT["name"], pair), iterations)
+        feed = SubscriptionFeed().start()
+        index = OpenOrdersIndex()
+        index.follow(feed)
+        feed.socket.ready.wait(5)
+        new = timed(lambda: index.get(rpc, ACCOUNT["name"], pair), iterations)
+        # fills and cancels arrive as notices
+        node.chain.place(limit_order(orders + 1))
+        node.chain.include({"operations": [[2, {"order": "1.7.1"}]]})
+        time.sleep(0.1)
+        assert sorted(index.get(rpc, ACCOUNT["name"], pair)) == book()
+        feed.close()
+        rpc.close()
+    finally:
+        config.NODES[:] = saved
+        node.stop()
+    report("rpc_open_orders", old)
+    report("OpenOrdersIndex.get", new)
+    print("seeds %d, notices %d" % (index.stats["seeds"], index.stats["updates"]))
+
+
+def bench_poolbook(levels=1000, pools=200, iterations=20):
+    """
+    simulated liquidity pool books; the python loop and sort of rpc_pool_book()
+    before, its closed form now, and numpy over many pools in one call
+    """
+    node = MockNode().start()
+    try:
+        rpc = create_connection(node.url)
+        pool = POOLS["1.19.42"]
+        balance_a, balance_b, _, _ = pool_terms(rpc, pool)
+        old = timed(lambda: legacy_pool_book(balance_a, balance_b, levels), iterations)
+        new = timed(lambda: rpc_pool_book(rpc, pool_data=pool, depth=levels), iterations)
+        legacy = legacy_pool_book(balance_a, balance_b, levels)
+        book = rpc_pool_book(rpc, pool_data=pool, depth=levels)
+        rpc.close()
+    finally:
+        node.stop()
+    for side in ("asks", "bids"):
+        assert len(book[side]) == len(legacy[side])
+        assert all(
+            abs(new[0] / old[0] - 1) < 1e-9 and new[1] == old[1]
+            for new, old in zip(book[side], legacy[side])
+        )
+    report("%d levels, loop and sort" % levels, old)
+    report("%d levels, closed form" % levels, new)
+    terms = [
+        (balance_a * (1 + idx / pools), balance_b, 0.003) for idx in range(pools)
+    ]
+    old = timed(
+        lambda: [legacy_pool_book(a, b, levels) for a, b, _ in terms], iterations // 4
+    )
+    try:
+        new = timed(lambda: pool_books(terms, levels), iterations // 4)
+    except ImportError:
+        print("numpy is not installed; pool_books() skipped")
+        return
+    report("%d pools, loop and sort" % pools, old)
+    report("%d pools, pool_books()" % pools, new)
+
+
+def bench_serializer(operations=20, seconds=2.0, fuzz=2000):
+    """
+    transactions per second holding limit order creates; the operation classes
+    vs. the compiled serializers, after a byte for byte comparison of the two over
+    random transactions of every operation
+    """
+    op_ids = list(golden_vectors.OPS)
+    for _ in range(fuzz):
+        trx = golden_vectors.transaction(0)
+        trx["operations"] = [
+            random_operation(choice(op_ids)) for _ in range(randrange(1, 5))
+        ]
+        assert serialize_buffer(deepcopy(trx)) == serialize_objects(deepcopy(trx))
+    print("%d random transactions serialize alike" % fuzz)
+    corpus = []
+    for _ in range(100):
+        trx = golden_vectors.transaction(1)
+        trx["operations"] = [random_operation(1) for _ in range(operations)]
+        for _, operation in trx["operations"]:
+            operation["expiration"] = trx["operations"][0][1]["expiration"]
+        corpus.append(trx)
+    rate("%d ops, operation classes" % operations, serialize_objects, corpus, seconds)
+    rate("%d ops, compiled" % operations, serialize_buffer, corpus, seconds)
+
+
+def bench_pool(threads=8, queries=10, delay=0.01):
+    """
+    seconds for threads * queries calls on one lock guarded connection vs. a
+    ConnectionPool over two mock nodes
+    """
+    nodes = [MockNode(delay=delay).start() for _ in range(2)]
+    saved = config.NODES[:]
+    config.NODES[:] = [node.url for node in nodes]
+
+    def run(rpc):
+        workers = [
+            Thread(target=lambda: [rpc_block_number(rpc) for _ in range(queries)])
+            for _ in range(threads)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return [time.perf_counter() - start]
+
+    class Serialized:
+        """
+        one websocket-client connection shared under a lock
+        """
+
+        def __init__(self):
+            self.rpc = create_connection(nodes[0].url)
+            self.lock = Lock()
+
+        def query(self, params):
+            with self.lock:
+                return wss_call(self.rpc, params)
+
+    try:
+        serialized = Serialized()
+        old = run(serialized)
+        serialized.rpc.close()
+        with ConnectionPool() as pool:
+            new = run(pool)
+    finally:
+        config.NODES[:] = saved
+        for node in nodes:
+            node.stop()
+    report("%d threads, one locked socket" % threads, old)
+    report("%d threads, ConnectionPool" % threads, new)
+
+
+def bench_writer(seconds=2.0):
+    """
+    messages to sign per second; bytes concatenation vs. serialize_buffer()'s one
+    preallocated bytearray, for one and for 20 limit orders, then types.varint()
+    before and after
+    """
+
+    def writer(trx):
+        return CHAIN_ID + serialize_buffer(trx)
+
+    for operations in (1, 20):
+        corpus = []
+        for _ in range(100):
+            trx = golden_vectors.transaction(1)
+            trx["operations"] = [random_operation(1) for _ in range(operations)]
+            for _, operation in trx["operations"]:
+                operation["expiration"] = trx["expiration"]
+            assert legacy_message(trx) == writer(trx)
+            corpus.append(trx)
+        rate("%d ops, bytes +=" % operations, legacy_message, corpus, seconds)
+        rate("%d ops, one bytearray" % operations, writer, corpus, seconds)
+    numbers = [randrange(2 ** randrange(1, 64)) for _ in range(1000)]
+    assert all(legacy_varint(num) == varint(num) for num in numbers)
+    rate("varint, bytes +=", legacy_varint, numbers, seconds / 2)
+    rate("varint, bytearray", varint, numbers, seconds / 2)
+
+
+def bench_signing(seconds=2.0, corpus=1024):
+    """
+    signatures per second over a fixed corpus of digests; a context per attempt,
+    the shared context and key cache, and its preallocated ffi buffers, the same
+    from 4 threads at once, then how many canonical attempts the corpus took
+    """
+    digests = [sha256(b"%d" % idx).digest() for idx in range(corpus)]
+    # all must produce the same deterministic signatures; the corpus once each
+    for digest in digests[:8]:
+        assert legacy_sign(digest, WIF) == SIGNER.sign(digest, WIF)
+    signer = Signer()
+    for digest in digests:
+        assert legacy_signer_sign(SIGNER, digest, WIF) == signer.sign(digest, WIF)
+    rate(
+        "signatures, context per attempt",
+        lambda digest: legacy_sign(digest, WIF),
+        digests,
+        seconds,
+    )
+    rate(
+        "signatures, Signer",
+        lambda digest: legacy_signer_sign(SIGNER, digest, WIF),
+        digests,
+        seconds,
+    )
+    rate(
+        "signatures, preallocated",
+        lambda digest: SIGNER.sign(digest, WIF),
+        digests,
+        seconds,
+    )
+    # each thread its own buffers; the same signatures as one thread alone
+    expected = [SIGNER.sign(digest, WIF) for digest in digests]
+    results = [None] * 4
+
+    def worker(idx):
+        results[idx] = [SIGNER.sign(digest, WIF) for digest in digests]
+
+    threads = [Thread(target=worker, args=(idx,)) for idx in range(len(results))]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    assert all(result == expected for result in results)
+    print(
+        "%-32s %10.1f /sec"
+        % ("signatures, 4 threads", len(results) * len(digests) / elapsed)
+    )
+    stats = signer.stats
+    print(
+        "%d digests, %.3f attempts per signature, at most %d; %s"
+        % (
+            stats["signatures"],
+            stats["attempts"] / stats["signatures"],
+            stats["most"],
+            ", ".join(
+                "%d: %d" % (attempts, count)
+                for attempts, count in sorted(signer.attempts.items())
+            ),
+        )
+    )
+
+
+def bench_batch(sizes=(16, 256, 1024), iterations=5):
+    """
+    transactions per second signed with one wif; sign_transaction() per message,
+    sign_many() in process, and sign_many() over a warm worker pool
+    """
+    processes = max(2, os.cpu_count() or 1)
+    messages = []
+    for idx in range(max(sizes)):
+        trx = golden_vectors.transaction(1)
+        trx["ref_block_num"] = idx
+        messages.append(CHAIN_ID + serialize_buffer(trx))
+
+    def batch(size):
+        return [({"signatures": []}, message) for message in messages[:size]]
+
+    def one_by_one(size):
+        return [sign_transaction(trx, message, WIF) for trx, message in batch(size)]
+
+    # the pool's workers are spawned once; not part of any batch
+    start = time.perf_counter()
+    SIGN_POOL.sign([sha256(b"warm").digest()] * processes, WIF, processes)
+    print("%d workers started in %.2f s" % (processes, time.perf_counter() - start))
+    try:
+        for size in sizes:
+            expected = one_by_one(size)
+            assert sign_many(batch(size), WIF, processes=1) == expected
+            assert sign_many(batch(size), WIF, None, processes, 0) == expected
+            for name, func in (
+                ("sign_transaction()", lambda: one_by_one(size)),
+                ("sign_many()", lambda: sign_many(batch(size), WIF, processes=1)),
+                (
+                    "sign_many(), %d workers" % processes,
+                    lambda: sign_many(batch(size), WIF, None, processes, 0),
+                ),
+            ):
+                elapsed = timed(func, iterations)
+                print(
+                    "%4d trx, %-26s %10.1f /sec"
+                    % (size, name, size * len(elapsed) / sum(elapsed))
+                )
+    finally:
+        SIGN_POOL.close()
+
+
+def bench_broker(iterations=20, delay=0.002):
+    """
+    per order latency of broker() in a new process vs. a warm BrokerSession
+    """
+    node = MockNode(delay=delay).start()
+    nodes = config.NODES[:]
+    config.NODES[:] = [node.url]
+    try:
+        disable_print()
+        old = timed(lambda: broker(mock_order()), iterations)
+        with BrokerSession() as session:
+            new = timed(lambda: session.broker(mock_order()), iterations)
+    finally:
+        enable_print()
+        config.NODES[:] = nodes
+        node.stop()
+    report("broker() process per order", old)
+    report("BrokerSession.broker()", new)
+
+
+def bench_rpc(iterations=20, delay=0.01):
+    """
+    the three build_transaction() header queries; one at a time on websocket-client
+    vs. in flight together on one AsyncRPC socket
+    """
+    node = MockNode(delay=delay).start()
+    try:
+        rpc = create_connection(node.url)
+        old = timed(
+            lambda: (
+                rpc_block_number(rpc),
+                rpc_tx_fees(rpc, ACCOUNT["id"]),
+                rpc_balances(rpc, ACCOUNT["name"]),
+            ),
+            iterations,
+        )
+        rpc.close()
+
+        async def concurrent():
+            async with rpc_async.AsyncRPC(node.url) as client:
+                elapsed = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    await asyncio.gather(
+                        rpc_async.rpc_block_number(client),
+                        rpc_async.rpc_tx_fees(client, ACCOUNT["id"]),
+                        rpc_async.rpc_balances(client, ACCOUNT["name"]),
+                    )
+                    elapsed.append(time.perf_counter() - start)
+                return elapsed
+
+        new = asyncio.run(concurrent())
+    finally:
+        node.stop()
+    report("header queries, sequential", old)
+    report("header queries, multiplexed", new)
+
+
+BENCHMARKS = {
+    "authorities": bench_authorities,
+    "balances": bench_balances,
+    "batch": bench_batch,
+    "broadcast": bench_broadcast,
+    "broker": bench_broker,
+    "cancel": bench_cancel,
+    "decoder": bench_decoder,
+    "feed": bench_feed,
+    "hedge": bench_hedge,
+    "nodes": bench_nodes,
+    "orders": bench_orders,
+    "pool": bench_pool,
+    "poolbook": bench_poolbook,
+    "rpc": bench_rpc,
+    "serializer": bench_serializer,
+    "signing": bench_signing,
+    "writer": bench_writer,
+}
+
+
+def main(names=None):
+    """
+    run the named benchmarks, or all of them
+    """
+    for name in names or BENCHMARKS:
+        print(it("yellow", name))
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
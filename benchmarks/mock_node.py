@@ -0,0 +1,628 @@
+r"""
+mock_node.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Local mock BitShares websocket node for benchmarks and tests; standard library only
+
+usage:
+
+    node = MockNode(delay=0.01).start()
+    config.NODES[:] = [node.url]
+    ...
+    node.stop()
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except, unused-argument
+
+# STANDARD PYTHON MODULES
+import json
+import socket
+import socketserver
+import time
+from base64 import b64encode
+from binascii import hexlify
+from hashlib import sha1
+from random import random
+from struct import pack, unpack
+from threading import Lock, Thread, Timer
+
+# websocket protocol handshake magic; RFC 6455
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+ASSETS = {
+    "1.3.0": {"id": "1.3.0", "symbol": "BTS", "precision": 5, "issuer": "1.2.3"},
+    "1.3.1": {"id": "1.3.1", "symbol": "TEST", "precision": 4, "issuer": "1.2.100"},
+    "1.3.5": {
+        "id": "1.3.5",
+        "symbol": "HONEST.USD",
+        "precision": 4,
+        "issuer": "1.2.100",
+        "bitasset_data_id": "2.4.5",
+    },
+}
+
+ACCOUNT = {"id": "1.2.100", "name": "mock-account"}
+
+# liquidity pools; BTS / HONEST.USD and TEST / BTS
+POOLS = {
+    "1.19.%d" % idx: {
+        "id": "1.19.%d" % idx,
+        "asset_a": asset_a,
+        "asset_b": asset_b,
+        "balance_a": balance_a,
+        "balance_b": balance_b,
+        "share_asset": "1.3.1",
+        "taker_fee_percent": 30,
+        "withdrawal_fee_percent": 10,
+    }
+    for idx, asset_a, asset_b, balance_a, balance_b in (
+        (42, "1.3.0", "1.3.5", 5 * 10**12, 2 * 10**9),
+        (43, "1.3.1", "1.3.0", 3 * 10**10, 9 * 10**11),
+    )
+}
+
+# current_fees parameters; flat fees unless noted
+FEE_SCHEDULE = {
+    0: {"fee": 20000, "price_per_kbyte": 100000},
+    1: {"fee": 500},
+    2: {"fee": 0},
+    3: {"fee": 2000},
+    10: {
+        "symbol3": 500000000,
+        "symbol4": 300000000,
+        "long_symbol": 5000000,
+        "price_per_kbyte": 10000,
+    },
+    13: {"fee": 50000},
+    14: {"fee": 2000, "price_per_kbyte": 30000},
+    15: {"fee": 2000},
+    19: {"fee": 100},
+    47: {"fee": 2000},
+    59: {"fee": 5000000},
+    60: {"fee": 1000},
+    61: {"fee": 100},
+    63: {"fee": 100},
+    75: {"fee": 1000},
+}
+
+# public key of the well known example wif
+# 5KQwrPbwdL6PhXujxW37FSSQZ1JiwsST4cqQzDeyXtP79zkvFD3
+PUBLIC_KEY = "BTS6MRyAjQq8ud7hVNYcfnVPJqcVpscN5So8BhtHuGYqET5GDW5CV"
+
+# public keys of the wifs of sha256(b"mock-signer-1"), -2 and -3
+# 5K1nxb8ueeDvYdSrzVe5YedetVdmwjpbrGEYEZ3wAfoKJVcgUV6
+# 5HzEHuGfrgRsGrRE4gsotN82ySLTd9fokpBU6mRGboAaDZMz7sW
+# 5KePx2FhE1v8aafP8jAKyGcoP7MNjYRsrCixfmqyQydiTPQ7Rmm
+SIGNER_KEYS = [
+    "BTS7RtGXCVp8EqqM5aGBPfBo4oSZu9TxpwNnaEcpkaVrz6px8tGUX",
+    "BTS6Kq5WwxxTDmZeFf38xt4ivJLt2BEvdCYpfZU85r3XeGJnjALZW",
+    "BTS5pNydSMctCvVpHukmAMYpDpTd8HF9Z3bhAT415njTXMVHuPgpZ",
+]
+
+# active authorities; the mock account signs alone, the multi-signature account
+# needs weight 3, eg. the first signer key and either another or the mock account
+ACCOUNTS = {
+    ACCOUNT["id"]: {
+        **ACCOUNT,
+        "active": {
+            "weight_threshold": 1,
+            "account_auths": [],
+            "key_auths": [[PUBLIC_KEY, 1]],
+            "address_auths": [],
+        },
+    },
+    "1.2.101": {
+        "id": "1.2.101",
+        "name": "mock-multisig",
+        "active": {
+            "weight_threshold": 3,
+            "account_auths": [[ACCOUNT["id"], 1]],
+            "key_auths": [[SIGNER_KEYS[0], 2], [SIGNER_KEYS[1], 1], [SIGNER_KEYS[2], 1]],
+            "address_auths": [],
+        },
+    },
+}
+
+
+def later(seconds, function, *args):
+    """
+    call function(*args) in a daemon thread after seconds
+    """
+    timer = Timer(seconds, function, args)
+    timer.daemon = True
+    timer.start()
+
+
+class MockChain:
+    """
+    canned database api responses keyed by method name
+    """
+
+    def __init__(self, head_block_number=1000000):
+        self.head_block_number = head_block_number
+        self.started = time.time()
+        self.limit_orders = []
+        # change to simulate a committee fee parameter update
+        self.fee_scale = 10000
+        # broadcast transactions, as json, for duplicate checks
+        self.transactions = set()
+        self.lock = Lock()
+        # seconds from broadcast until a transaction is in a block
+        self.inclusion_delay = 1.5
+        # seconds per block
+        self.block_interval = 3
+        # function(changed objects) of each account subscription
+        self.listeners = []
+        # {asset_id: graphene amount} of the mock account
+        self.balances = {asset_id: 10**12 for asset_id in ASSETS}
+        self.order_ids = 1000
+
+    def dispatch(self, method, args):
+        """
+        :return: the "result" of a json-rpc call
+        """
+        return getattr(self, method, self.unknown)(*args)
+
+    def unknown(self, *args):
+        return None
+
+    def get_dynamic_global_properties(self):
+        # one block every 3 seconds, as on mainnet, unless block_interval is changed
+        head = self.head_block_number + int(
+            (time.time() - self.started) / self.block_interval
+        )
+        return {
+            "id": "2.1.0",
+            "head_block_number": head,
+            "head_block_id": "%08x" % head + "ab" * 16,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()),
+            "last_irreversible_block_num": head - 20,
+        }
+
+    def get_global_properties(self):
+        return {
+            "id": "2.0.0",
+            "parameters": {
+                "current_fees": {
+                    "parameters": [
+                        [op_id, params] for op_id, params in FEE_SCHEDULE.items()
+                    ],
+                    "scale": self.fee_scale,
+                }
+            },
+        }
+
+    def get_block(self, number):
+        return {
+            "block_id": "%08x" % number + "cd" * 16,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()),
+            "transactions": [],
+        }
+
+    def get_required_fees(self, ops, asset_id):
+        # flat component only; the mock ignores the operation contents
+        return [
+            {
+                "amount": FEE_SCHEDULE[int(op_id)].get(
+                    "fee", FEE_SCHEDULE[int(op_id)].get("long_symbol", 0)
+                )
+                * self.fee_scale
+                // 10000,
+                "asset_id": asset_id,
+            }
+            for op_id, _ in ops
+        ]
+
+    def lookup_accounts(self, name, limit):
+        return [[ACCOUNT["name"], ACCOUNT["id"]]]
+
+    def get_account_by_name(self, name, *_):
+        return dict(ACCOUNT)
+
+    def get_key_references(self, keys):
+        return [[ACCOUNT["id"]] if key == PUBLIC_KEY else [] for key in keys]
+
+    def get_objects(self, ids, *_):
+        chain = {
+            "2.0.0": self.get_global_properties,
+            "2.1.0": self.get_dynamic_global_properties,
+        }
+        return [
+            chain[obj_id]()
+            if obj_id in chain
+            else {**ASSETS, **POOLS, **ACCOUNTS}.get(obj_id)
+            for obj_id in ids
+        ]
+
+    def lookup_asset_symbols(self, symbols):
+        by_symbol = {asset["symbol"]: asset for asset in ASSETS.values()}
+        return [by_symbol.get(symbol, ASSETS.get(symbol)) for symbol in symbols]
+
+    def get_order_book(self, base, quote, limit):
+        # levels 0.1% apart around a price of 0.5, amounts as decimal strings
+        book = {"base": base, "quote": quote}
+        for side, sign in (("asks", 1), ("bids", -1)):
+            book[side] = [
+                {
+                    "price": "%.8f" % (0.5 * (1 + sign * 0.001 * (idx + 1))),
+                    "quote": "%.4f" % (1000 + 37 * idx),
+                    "base": "%.4f" % (500 + 18.5 * idx),
+                }
+                for idx in range(limit)
+            ]
+        return book
+
+    def get_ticker(self, base, quote):
+        return {
+            "time": "2024-01-01T00:00:00",
+            "base": base,
+            "quote": quote,
+            "latest": "0.50000000",
+            "lowest_ask": "0.50050000",
+            "highest_bid": "0.49950000",
+        }
+
+    def get_fill_order_history(self, asset_a, asset_b, limit):
+        # a sell and a buy of ours in the BTS / HONEST.USD market, and someone else's
+        fills = [
+            (ACCOUNT["id"], ("1.3.0", 200000), ("1.3.5", 10000)),
+            (ACCOUNT["id"], ("1.3.5", 5000), ("1.3.0", 100000)),
+            ("1.2.101", ("1.3.0", 300000), ("1.3.5", 15000)),
+        ]
+        return [
+            {
+                "id": "0.0.%d" % idx,
+                "key": {"base": asset_a, "quote": asset_b, "sequence": -idx},
+                "time": "2024-01-01T00:00:%02d" % idx,
+                "op": {
+                    "fee": {"amount": 0, "asset_id": receives[0]},
+                    "order_id": "1.7.%d" % idx,
+                    "account_id": account_id,
+                    "pays": {"amount": pays[1], "asset_id": pays[0]},
+                    "receives": {"amount": receives[1], "asset_id": receives[0]},
+                },
+            }
+            for idx, (account_id, pays, receives) in enumerate(fills[:limit], 1)
+        ]
+
+    def get_named_account_balances(self, name, assets):
+        with self.lock:
+            return [
+                {"amount": amount, "asset_id": asset_id}
+                for asset_id, amount in self.balances.items()
+            ]
+
+    def balance_object(self, asset_id):
+        """
+        the account balance object of one asset, 2.5.x
+        """
+        return {
+            "id": "2.5.%d" % int(asset_id.split(".")[2]),
+            "owner": ACCOUNT["id"],
+            "asset_type": asset_id,
+            "balance": self.balances.get(asset_id, 0),
+        }
+
+    def get_full_accounts(self, names, subscribe):
+        return [[name, {"limit_orders": self.limit_orders}] for name in names]
+
+    def get_transaction_hex(self, trx):
+        # the mock trusts the local serializer; plus one byte for empty signatures
+        from bitshares_signing.graphene_signing import serialize_buffer
+
+        return hexlify(serialize_buffer(trx)).decode() + "00"
+
+    def accept(self, trx):
+        with self.lock:
+            key = json.dumps(trx, sort_keys=True)
+            if key in self.transactions:
+                raise ValueError("Duplicate transaction check failed")
+            self.transactions.add(key)
+
+    def include(self, trx):
+        """
+        apply trx in the next block; fees, transfers and new limit orders are paid
+        for, limit order cancels leave the book and refund what was for sale
+
+        :return dict(): the transaction confirmation of a callback notice
+        """
+        changed, touched = [], set()
+
+        def pay(amount, sign=-1):
+            asset_id = amount["asset_id"]
+            self.balances[asset_id] = (
+                self.balances.get(asset_id, 0) + sign * int(amount["amount"])
+            )
+            touched.add(asset_id)
+
+        with self.lock:
+            for op_id, data in trx.get("operations", []):
+                if "fee" in data:
+                    pay(data["fee"])
+                if op_id == 0:
+                    pay(data["amount"])
+                elif op_id == 1:
+                    pay(data["amount_to_sell"])
+                    self.order_ids += 1
+                    order = {
+                        "id": "1.7.%d" % self.order_ids,
+                        "seller": data["seller"],
+                        "for_sale": data["amount_to_sell"]["amount"],
+                        "sell_price": {
+                            "base": data["amount_to_sell"],
+                            "quote": data["min_to_receive"],
+                        },
+                    }
+                    self.limit_orders.append(order)
+                    changed.append(order)
+                elif op_id == 2:
+                    for order in self.limit_orders:
+                        if order["id"] == data["order"]:
+                            # orders placed by hand may not say what is for sale
+                            refund = {
+                                "amount": order.get("for_sale", 0),
+                                "asset_id": order["sell_price"]["base"]["asset_id"],
+                            }
+                            pay(refund, 1)
+                            changed.append(order["id"])
+                    self.limit_orders = [
+                        order
+                        for order in self.limit_orders
+                        if order["id"] != data["order"]
+                    ]
+            changed.extend(self.balance_object(asset_id) for asset_id in touched)
+        self.changed(changed)
+        return {
+            "id": sha1(json.dumps(trx, sort_keys=True).encode()).hexdigest(),
+            "block_num": self.get_dynamic_global_properties()["head_block_number"] + 1,
+            "trx_num": 0,
+            "trx": trx,
+        }
+
+    def place(self, order):
+        """
+        add a limit order to the book, as a fill or a foreign broadcast would
+        """
+        with self.lock:
+            self.limit_orders.append(order)
+        self.changed([order])
+
+    def changed(self, objects):
+        """
+        account subscription notices; objects, or ids of removed objects
+        """
+        if objects:
+            for listener in self.listeners[:]:
+                listener(objects)
+
+    def get_limit_orders_by_account(self, account, limit, start_id=None):
+        def instance(order):
+            return int(order["id"].split(".")[2])
+
+        start = instance({"id": start_id}) if start_id else 0
+        orders = sorted(self.limit_orders, key=instance)
+        return [order for order in orders if instance(order) >= start][:limit]
+
+    def broadcast_transaction(self, trx):
+        self.accept(trx)
+        later(self.inclusion_delay, self.include, trx)
+
+    def broadcast_transaction_with_callback(self, callback_id, trx):
+        # the handler includes the transaction and sends the notice
+        self.accept(trx)
+
+
+class MockNode(socketserver.ThreadingTCPServer):
+    """
+    minimal RFC 6455 websocket server answering graphene json-rpc calls
+
+    :param float(delay): seconds to sleep before each response
+    :param MockChain(chain): state answering the calls, shared between nodes if given
+    :param float(handshake_delay): seconds to sleep before accepting a connection
+    :param tuple(tail): (probability, seconds) of an extra stall on a response
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self, delay=0.0, chain=None, port=0, handshake_delay=0.0, tail=(0.0, 0.0)
+    ):
+        self.delay = delay
+        self.handshake_delay = handshake_delay
+        self.tail = tail
+        self.chain = chain if chain is not None else MockChain()
+        self.requests = 0
+        super().__init__(("127.0.0.1", port), MockHandler)
+
+    @property
+    def url(self):
+        return "ws://%s:%d" % self.server_address
+
+    def start(self):
+        """
+        serve in a daemon thread
+        """
+        Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class MockHandler(socketserver.BaseRequestHandler):
+    """
+    one websocket client connection
+    """
+
+    def handle(self):
+        # queries on one connection are answered concurrently, as a node would
+        self.send_lock = Lock()
+        # subscriptions of this connection
+        self.block_callback = None
+        self.object_callback = None
+        self.watched = set()
+        self.closed = False
+        # no Nagle delay between concurrent small replies
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            self.handshake()
+            while True:
+                opcode, payload = self.read_frame()
+                if opcode == 0x8:  # close
+                    self.send_frame(payload, 0x8)
+                    return
+                if opcode == 0x9:  # ping
+                    self.send_frame(payload, 0xA)
+                elif opcode == 0x1:  # text
+                    Thread(
+                        target=self.respond,
+                        args=(json.loads(payload.decode()),),
+                        daemon=True,
+                    ).start()
+        except (ConnectionError, OSError, ValueError):
+            return
+        finally:
+            self.closed = True
+
+    def handshake(self):
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                raise ConnectionError("closed during handshake")
+            request += chunk
+        key = [
+            line.split(":", 1)[1].strip()
+            for line in request.decode().split("\r\n")
+            if line.lower().startswith("sec-websocket-key:")
+        ][0]
+        accept = b64encode(sha1((key + GUID).encode()).digest()).decode()
+        if self.server.handshake_delay:
+            time.sleep(self.server.handshake_delay)
+        self.request.sendall(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                "Sec-WebSocket-Accept: %s\r\n\r\n" % accept
+            ).encode()
+        )
+
+    def read_exactly(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("closed")
+            data += chunk
+        return data
+
+    def read_frame(self):
+        head, length = self.read_exactly(2)
+        if length & 0x7F == 126:
+            size = unpack(">H", self.read_exactly(2))[0]
+        elif length & 0x7F == 127:
+            size = unpack(">Q", self.read_exactly(8))[0]
+        else:
+            size = length & 0x7F
+        mask = self.read_exactly(4) if length & 0x80 else b"\x00" * 4
+        payload = self.read_exactly(size)
+        return head & 0x0F, bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+    def send_frame(self, payload, opcode=0x1):
+        size = len(payload)
+        if size < 126:
+            head = pack(">BB", 0x80 | opcode, size)
+        elif size < 2**16:
+            head = pack(">BBH", 0x80 | opcode, 126, size)
+        else:
+            head = pack(">BBQ", 0x80 | opcode, 127, size)
+        with self.send_lock:
+            self.request.sendall(head + payload)
+
+    def respond(self, query):
+        self.server.requests += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if random() < self.server.tail[0]:
+            time.sleep(self.server.tail[1])
+        _, method, args = query["params"]
+        try:
+            reply = {"result": self.server.chain.dispatch(method, args)}
+        except Exception as error:
+            reply = {"error": {"message": repr(error)}}
+        reply.update({"id": query.get("id"), "jsonrpc": "2.0"})
+        try:
+            self.send_frame(json.dumps(reply).encode())
+        except OSError:
+            pass  # client went away
+        if method == "broadcast_transaction_with_callback" and "result" in reply:
+            later(self.server.chain.inclusion_delay, self.include, *args)
+        elif method == "set_subscribe_callback":
+            self.object_callback = args[0]
+        elif method == "set_block_applied_callback":
+            if self.block_callback is None:
+                Thread(target=self.produce, daemon=True).start()
+            self.block_callback = args[0]
+        elif method == "get_objects" and self.object_callback is not None:
+            self.watched.update(args[0])
+        elif method == "get_full_accounts" and args[1] in (True, "true"):
+            self.server.chain.listeners.append(self.account_changed)
+
+    def account_changed(self, objects):
+        if self.closed:
+            self.server.chain.listeners.remove(self.account_changed)
+        elif self.object_callback is not None:
+            self.notify(self.object_callback, [objects])
+
+    def notify(self, callback_id, notice):
+        try:
+            notice = {"method": "notice", "params": [callback_id, notice]}
+            self.send_frame(json.dumps(notice).encode())
+        except OSError:
+            self.closed = True
+
+    def include(self, callback_id, trx):
+        """
+        include trx and send the callback notice
+        """
+        self.notify(callback_id, [self.server.chain.include(trx)])
+
+    def produce(self):
+        """
+        block applied notices, and changes of watched chain objects, every block
+        """
+        chain = self.server.chain
+        head, scale = chain.get_dynamic_global_properties(), chain.fee_scale
+        while not self.closed:
+            time.sleep(0.01)
+            dgp = chain.get_dynamic_global_properties()
+            if dgp["head_block_number"] == head["head_block_number"]:
+                continue
+            head = dgp
+            self.notify(self.block_callback, [dgp["head_block_id"]])
+            changed = []
+            if "2.1.0" in self.watched:
+                changed.append(dgp)
+            if "2.0.0" in self.watched and chain.fee_scale != scale:
+                changed.append(chain.get_global_properties())
+            scale = chain.fee_scale
+            if changed and self.object_callback is not None:
+                self.notify(self.object_callback, [changed])
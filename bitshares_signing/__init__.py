@@ -75,6 +75,7 @@ Whitepapers for deep dives:
 - Automatically scales buy/sell orders to prevent exceeding account budget.
 - Ensure you always have enough funds to cover transaction fees with the last two Bitshares.
 - Uses multiprocessing to handle websockets and manage faulty order timeouts.
+- `BrokerSession` keeps one warm websocket, fee schedule, reference block and decoded keys for placing many orders in-process.
 - New edict `{'op': login}` matches a WIF (Wallet Import Format) to an account name and returns `True`/`False`.
 - No dependencies on Pybitshares!
 
@@ -126,8 +127,9 @@ All remaining rights under WTFPL March 1765.
 """
 
 from .graphene_auth import broker, prototype_order
+from .session import BrokerSession
 
-__all__ = ["broker", "prototype_order", "SUPPORTED_OPS", "quickstart"]
+__all__ = ["broker", "prototype_order", "BrokerSession", "SUPPORTED_OPS", "quickstart"]
 SUPPORTED_OPS = [
     "login",
     "buy",
@@ -287,5 +289,11 @@ def quickstart():
     ]
 
     broker(order)
+
+    # many orders; one warm websocket and cached fees / block / keys for all of them
+    from bitshares_signing import BrokerSession
+
+    with BrokerSession() as session:
+        broker(order, session=session)  # or session.broker(order)
     """
     pass
@@ -0,0 +1,236 @@
+r"""
+authorities.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Process-wide cache of account active authorities, and the keys a transaction needs
+
+Every operation names the account whose active authority must sign it; a
+transaction of several accounts, or of a multi-signature account, needs more than
+one key.  Given every wif at hand, `AUTHORITIES.keys()` returns the fewest of them
+whose public keys reach the weight threshold of every such account:
+
+    wifs = AUTHORITIES.keys(rpc, trx["operations"], [wif_a, wif_b, wif_c])
+    sign_transaction(trx, message, wifs)
+
+Authorities are fetched for all unknown accounts in one `get_objects` call and kept
+`AUTHORITY_CACHE_TIMEOUT` seconds; one that `follow()`s the subscription feed
+takes authority changes from the account object notices as they happen.
+
+Account authorities of an account authority count to the depth the chain allows.
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except
+
+# STANDARD PYTHON MODULES
+import time
+from itertools import combinations
+from threading import RLock
+
+# GRAPHENE SIGNING MODULES
+from .config import AUTHORITY_CACHE_TIMEOUT
+from .graphene_signing import SIGNER
+from .rpc import wss_query
+
+# the account whose active authority each op id requires
+REQUIRED = {
+    0: "from",
+    1: "seller",
+    2: "fee_paying_account",
+    3: "funding_account",
+    10: "issuer",
+    13: "issuer",
+    14: "issuer",
+    15: "payer",
+    19: "publisher",
+    47: "issuer",
+    59: "account",
+    60: "account",
+    61: "account",
+    63: "account",
+    75: "account",
+}
+
+# GRAPHENE_MAX_SIG_CHECK_DEPTH; account authorities nested deeper do not count
+MAX_DEPTH = 2
+
+# more options than this in one authority are chosen greedily, not exhaustively
+EXACT_OPTIONS = 12
+
+
+def required_accounts(operations):
+    """
+    :param list(operations): [[op_id, data], ...] as from build_transaction
+    :return list(): account ids whose active authority must sign, in order
+    """
+    accounts = []
+    for op_id, data in operations:
+        if op_id not in REQUIRED:
+            raise ValueError(f"Invalid operation code: {op_id}")
+        if data[REQUIRED[op_id]] not in accounts:
+            accounts.append(data[REQUIRED[op_id]])
+    return accounts
+
+
+def cheapest(options, threshold, chosen):
+    """
+    the options reaching threshold with the fewest keys not already chosen
+
+    :param list(options): [(weight, frozenset(public keys)), ...]
+    :return set(): public keys, None if threshold is out of reach
+    """
+    if sum(weight for weight, _ in options) < threshold:
+        return None
+    if len(options) > EXACT_OPTIONS:
+        # heaviest first among those adding the fewest new keys
+        keys, total = set(), 0
+        for weight, option in sorted(
+            options, key=lambda item: (len(item[1] - chosen), -item[0])
+        ):
+            keys |= option
+            total += weight
+            if total >= threshold:
+                return keys
+        return None
+    best = None
+    for size in range(1, len(options) + 1):
+        for combination in combinations(options, size):
+            if sum(weight for weight, _ in combination) < threshold:
+                continue
+            keys = set().union(*(option for _, option in combination))
+            if best is None or len(keys - chosen) < len(best - chosen):
+                best = keys
+    return best
+
+
+class AuthorityCache:
+    """
+    lock protected {account_id: (unix, active authority)} and the public key of
+    each wif it was given
+    """
+
+    def __init__(self):
+        self.lock = RLock()
+        self.accounts = {}
+        # {wif: public key}
+        self.public_keys = {}
+        self.feed = None
+        self.stats = {"hits": 0, "fetches": 0, "updates": 0}
+
+    def follow(self, feed):
+        """
+        take account authority changes from a `SubscriptionFeed`
+        """
+        self.feed = feed
+        feed.listen("object", self.changed)
+        feed.listen("reset", self.reset)
+
+    def changed(self, object_id, obj):
+        """
+        feed listener; accounts are 1.2.x
+        """
+        if not object_id.startswith("1.2.") or obj is None or "active" not in obj:
+            return
+        with self.lock:
+            if object_id in self.accounts:
+                self.accounts[object_id] = (time.time(), obj["active"])
+                self.stats["updates"] += 1
+
+    def reset(self):
+        """
+        feed listener; changes may have been missed
+        """
+        with self.lock:
+            self.accounts.clear()
+
+    def get(self, rpc, account_ids):
+        """
+        active authorities, fetching every missing or expired one in one call
+
+        :return dict(): {account_id: {"weight_threshold", "key_auths", ...}}
+        """
+        now = time.time()
+        with self.lock:
+            missing = [
+                account_id
+                for account_id in account_ids
+                if now - self.accounts.get(account_id, (0, None))[0]
+                > AUTHORITY_CACHE_TIMEOUT
+            ]
+            self.stats["hits"] += len(account_ids) - len(missing)
+        if missing:
+            accounts = wss_query(rpc, ["database", "get_objects", [missing]])
+            with self.lock:
+                self.stats["fetches"] += 1
+                for account_id, account in zip(missing, accounts):
+                    if account is None:
+                        raise ValueError("unknown account %s" % account_id)
+                    self.accounts[account_id] = (now, account["active"])
+            if self.feed is not None:
+                self.feed.watch_objects(missing)
+        with self.lock:
+            return {
+                account_id: self.accounts[account_id][1] for account_id in account_ids
+            }
+
+    def public_key(self, wif):
+        if wif not in self.public_keys:
+            self.public_keys[wif] = SIGNER.public_key(wif)
+        return self.public_keys[wif]
+
+    def keys(self, rpc, operations, wifs):
+        """
+        the fewest of the wifs that satisfy every required active authority
+
+        accounts are satisfied in order, each by the fewest keys not already chosen
+        for the ones before it
+
+        :raise ValueError: the wifs cannot satisfy an account
+        :return list(): wifs, in the order given
+        """
+        by_key = {self.public_key(wif): wif for wif in wifs}
+        accounts = required_accounts(operations)
+        chosen = set()
+
+        def satisfy(account_id, depth):
+            authority = self.get(rpc, [account_id])[account_id]
+            options = [
+                (int(weight), frozenset([key]))
+                for key, weight in authority["key_auths"]
+                if key in by_key
+            ]
+            if depth < MAX_DEPTH:
+                nested = [account for account, _ in authority["account_auths"]]
+                # one round trip for every account authority at this depth
+                self.get(rpc, nested)
+                for account, weight in authority["account_auths"]:
+                    keys = satisfy(account, depth + 1)
+                    if keys is not None:
+                        options.append((int(weight), frozenset(keys)))
+            return cheapest(options, int(authority["weight_threshold"]), chosen)
+
+        self.get(rpc, accounts)
+        for account_id in accounts:
+            keys = satisfy(account_id, 0)
+            if keys is None:
+                raise ValueError("keys given do not satisfy %s" % account_id)
+            chosen |= keys
+        selected = {by_key[key] for key in chosen}
+        return [wif for wif in dict.fromkeys(wifs) if wif in selected]
+
+
+AUTHORITIES = AuthorityCache()
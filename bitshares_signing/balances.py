@@ -0,0 +1,295 @@
+r"""
+balances.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Process-wide ledger of account balances
+
+Autoscaling and the `CORE_FEES` check call `rpc_balances()` for every order that
+buys or sells.  Once `BALANCES` follows the subscription feed, each account is
+seeded with `get_named_account_balances` on first use and kept current from the
+feed's balance object notices; a lookup is then a dict read:
+
+    BALANCES.follow(FEED)
+    BALANCES.get(rpc, "account-name")  # {symbol: amount}, as rpc_balances
+
+What our own transactions spend is held against the chain balance from broadcast
+until the chain balance shows it; a held spend is released by the first balance
+notice that is at least that much below the balance the hold was taken against,
+or once its transaction is in a block the feed has moved past, and at the latest
+when it expires; a refused broadcast is never held.  Until then a balance may read
+low, never high.  Only spends are held; what a cancel gives back counts once the
+chain balance shows it, as it is still locked in the order until then and may
+shrink with a fill.
+
+A feed drop drops every account to be seeded again once the feed is back; holds
+are kept.  While the feed is down `get()` asks the node and still deducts holds.
+Without a feed `get()` is `rpc_balances()` and nothing is held.
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except
+
+# STANDARD PYTHON MODULES
+import time
+from threading import RLock
+
+# GRAPHENE SIGNING MODULES
+from .config import TX_EXPIRATION
+from .rpc import (name_from_id, precision, resolve_assets, rpc_account_id,
+                  rpc_balances, wss_query)
+
+
+def deltas(operations):
+    """
+    graphene amounts an account's own operations take from it
+
+    a cancelled order's remainder is not credited; it is not the account's until
+    the cancel is in a block, and fills may reduce it before then
+
+    :param list(operations): [[op_id, data], ...] as from build_transaction
+    :return dict(): {asset_id: negative graphene amount}
+    """
+    change = {}
+
+    def add(amount):
+        asset_id = amount["asset_id"]
+        change[asset_id] = change.get(asset_id, 0) - int(amount["amount"])
+
+    for op_id, data in operations:
+        if "fee" in data:
+            add(data["fee"])
+        if op_id == 0:  # transfer
+            add(data["amount"])
+        elif op_id == 1:  # limit_order_create; reserved until filled or cancelled
+            add(data["amount_to_sell"])
+    return change
+
+
+class BalanceLedger:
+    """
+    lock protected {account_name: {asset_id: graphene amount}} and holds on it
+    """
+
+    def __init__(self):
+        self.lock = RLock()
+        self.accounts = {}
+        # {account_id: account_name}, {balance object id: (account_name, asset_id)}
+        self.names = {}
+        self.objects = {}
+        # {account_name: [{"change", "baseline", "expires", "confirmation"}]}
+        self.holds = {}
+        # the feed's last applied block number
+        self.block = 0
+        # {account_name: [notices received while seeding]}
+        self.seeding = {}
+        self.feed = None
+        # feed resets so far; a seed that straddles one is stale
+        self.resets = 0
+        self.stats = {"hits": 0, "seeds": 0, "updates": 0, "holds": 0, "fallbacks": 0}
+
+    def follow(self, feed):
+        """
+        keep seeded accounts current from a `SubscriptionFeed`
+        """
+        self.feed = feed
+        feed.listen("object", self.changed)
+        feed.listen("block", self.applied)
+        feed.listen("reset", self.reset)
+
+    @property
+    def live(self):
+        """
+        True while the feed is connected; until then the ledger may be stale
+        """
+        return self.feed is not None and self.feed.socket.ready.is_set()
+
+    def seed(self, rpc, account_name):
+        """
+        every balance of one account
+        """
+        with self.lock:
+            self.seeding[account_name] = []
+            resets = self.resets
+        try:
+            # subscribe before the snapshot; nothing between the two is missed
+            self.feed.watch_accounts([account_name])
+            account_id = str(rpc_account_id(rpc, account_name))
+            balances = wss_query(
+                rpc, ["database", "get_named_account_balances", [account_name, []]]
+            )
+        except Exception:
+            with self.lock:
+                self.seeding.pop(account_name, None)
+            raise
+        with self.lock:
+            notices = self.seeding.pop(account_name, [])
+            if resets != self.resets:
+                return
+            self.names[account_id] = account_name
+            self.accounts[account_name] = {
+                obj["asset_id"]: int(obj["amount"]) for obj in balances
+            }
+            for object_id, obj in notices:
+                self.apply(object_id, obj)
+            self.stats["seeds"] += 1
+
+    def apply(self, object_id, obj):
+        """
+        one account balance object changed or removed
+        """
+        if obj is None:
+            account_name, asset_id = self.objects.pop(object_id, (None, None))
+            if account_name in self.accounts:
+                self.accounts[account_name][asset_id] = 0
+            return
+        account_name = self.names.get(obj.get("owner"))
+        if account_name in self.accounts:
+            self.objects[object_id] = (account_name, obj["asset_type"])
+            self.accounts[account_name][obj["asset_type"]] = int(obj["balance"])
+            self.release(account_name, obj["asset_type"], int(obj["balance"]))
+
+    def release(self, account_name, asset_id, balance):
+        """
+        drop the held spends of one asset that a chain balance already shows
+        """
+        for hold in self.holds.get(account_name, []):
+            baseline = hold["baseline"].get(asset_id)
+            if baseline is not None and baseline + hold["change"][asset_id] >= balance:
+                del hold["change"][asset_id]
+                del hold["baseline"][asset_id]
+
+    def changed(self, object_id, obj):
+        """
+        feed listener; account balances are 2.5.x
+        """
+        if not object_id.startswith("2.5."):
+            return
+        with self.lock:
+            for notices in self.seeding.values():
+                notices.append((object_id, obj))
+            self.apply(object_id, obj)
+            self.stats["updates"] += 1
+
+    def applied(self, number, _):
+        """
+        feed listener; the balance notices of a block come before the next block
+        """
+        with self.lock:
+            self.block = number
+
+    def reset(self):
+        """
+        feed listener; notices may have been missed, seed again on next use
+        """
+        with self.lock:
+            self.accounts.clear()
+            self.objects.clear()
+            self.resets += 1
+
+    def hold(self, account_name, change, confirmation=None):
+        """
+        an accepted broadcast of our own; held until the chain balance shows it
+
+        :param dict(change): from `deltas()`; only spends are held
+        :param Confirmation(confirmation): of the broadcast, if it was tracked
+        """
+        change = {asset_id: amount for asset_id, amount in change.items() if amount < 0}
+        if self.feed is None or not change:
+            return
+        with self.lock:
+            holds = self.holds.setdefault(account_name, [])
+            # the balance once earlier holds show; unknown until the account is seeded
+            baseline = {}
+            if account_name in self.accounts:
+                for asset_id in change:
+                    baseline[asset_id] = self.accounts[account_name].get(
+                        asset_id, 0
+                    ) + sum(hold["change"].get(asset_id, 0) for hold in holds)
+            holds.append(
+                {
+                    "change": change,
+                    "baseline": baseline,
+                    "expires": time.time() + TX_EXPIRATION,
+                    "confirmation": confirmation,
+                }
+            )
+            self.stats["holds"] += 1
+
+    def settled(self, hold, now):
+        """
+        the chain balance shows this hold, or never will
+        """
+        if now > hold["expires"] or not hold["change"]:
+            return True
+        confirmation = hold["confirmation"]
+        if confirmation is None or not confirmation.event.is_set():
+            return False
+        if confirmation.included is None:
+            # the tracker lost sight of it; only expiry will tell
+            return False
+        return confirmation.included["block_num"] < self.block
+
+    def get(self, rpc, account_name):
+        """
+        `rpc_balances()`; a local read while following a live feed
+
+        :return dict(): {symbol: human readable amount}, holds deducted
+        """
+        if self.feed is None:
+            self.stats["fallbacks"] += 1
+            return rpc_balances(rpc, account_name)
+        balances = None
+        if self.live:
+            with self.lock:
+                seeded = account_name in self.accounts
+            if not seeded:
+                self.seed(rpc, account_name)
+            with self.lock:
+                # None if the feed dropped meanwhile
+                balances = self.accounts.get(account_name)
+                if balances is not None:
+                    balances = dict(balances)
+                    self.stats["hits"] += 1
+        if balances is None:
+            # the feed is down; ask the node, our unconfirmed spends still count
+            self.stats["fallbacks"] += 1
+            balances = {
+                obj["asset_id"]: int(obj["amount"])
+                for obj in wss_query(
+                    rpc, ["database", "get_named_account_balances", [account_name, []]]
+                )
+            }
+        now = time.time()
+        with self.lock:
+            holds = [
+                hold
+                for hold in self.holds.get(account_name, [])
+                if not self.settled(hold, now)
+            ]
+            self.holds[account_name] = holds
+        for hold in holds:
+            for asset_id, amount in hold["change"].items():
+                balances[asset_id] = balances.get(asset_id, 0) + amount
+        # metadata of assets first seen in a notice
+        resolve_assets(rpc, ids=list(balances))
+        return {
+            name_from_id(rpc, asset_id): amount / 10 ** precision(rpc, asset_id)
+            for asset_id, amount in balances.items()
+        }
+
+
+BALANCES = BalanceLedger()
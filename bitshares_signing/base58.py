@@ -203,10 +203,9 @@ class PrivateKey:
     def __init__(self, wif=None, prefix=PREFIX):
         self._wif = wif if isinstance(wif, Base58) else Base58(wif)
         
-        # Decode the WIF to get raw private key bytes
-        wif_bytes = unhexlify(base58_check_decode(wif))
-        # Skip the prefix (0x80) and get just the private key (32 bytes)
-        privkey_bytes = wif_bytes[1:33]
+        # Decode the WIF to get raw private key bytes; Base58 has already stripped
+        # the version byte (0x80) and, for compressed WIFs, the trailing flag
+        privkey_bytes = bytes(self._wif)
         
         # Create secp256k1 PrivateKey object
         self._secp256k1_privkey = secp256k1.PrivateKey(privkey_bytes, raw=True)
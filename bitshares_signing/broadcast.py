@@ -0,0 +1,245 @@
+r"""
+broadcast.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Process-wide parallel broadcast of signed transactions
+
+A transaction pushed to one slow node may reach the block producers blocks late.
+`BROADCASTER` pushes the same signed transaction to the `BROADCAST_WIDTH` best
+ranked nodes at once and returns as soon as one of them accepts it:
+
+    report = BROADCASTER.broadcast(signed_tx)
+    report.first  # the node that accepted first, None if every node refused
+    report.wait(every=True).results  # {node: {"outcome", "latency", "error"}}
+
+Once one node has gossiped the transaction the others refuse it as a duplicate;
+such "already known" refusals are counted as "known", not as failures.  Sockets
+are kept warm between broadcasts, a few per node, so a node still busy with an
+earlier transaction does not hold up the next one.  The last `BROADCAST_REPORTS`
+reports are kept in `BROADCASTER.reports` to measure per node acceptance latency.
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except
+
+# STANDARD PYTHON MODULES
+import time
+from collections import deque
+from threading import Condition, Lock, Thread
+
+# GRAPHENE SIGNING MODULES
+from .config import BROADCAST_WIDTH, PROCESS_TIMEOUT
+from .node_pool import NODE_POOL
+from .rpc import wss_call
+
+# reports kept for latency statistics
+BROADCAST_REPORTS = 100
+# idle sockets kept per node
+IDLE_PER_NODE = 2
+# substrings of the errors a node gives for a transaction it already has
+KNOWN_ERRORS = ("duplicate", "already known")
+
+
+class BroadcastReport:
+    """
+    outcome of one transaction on each node, filled in as the nodes answer
+    """
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.start = time.time()
+        self.condition = Condition()
+        # {node: {"outcome": "accepted" / "known" / "failed", "latency", "error"}}
+        self.results = {}
+        # the first node to accept or already know the transaction
+        self.first = None
+
+    def add(self, node, outcome, error=None):
+        with self.condition:
+            self.results[node] = {
+                "outcome": outcome,
+                "latency": time.time() - self.start,
+                "error": error,
+            }
+            if self.first is None and outcome != "failed":
+                self.first = node
+            self.condition.notify_all()
+
+    def wait(self, timeout=PROCESS_TIMEOUT, every=False):
+        """
+        block until the first acceptance, or until every node answered
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: len(self.results) == len(self.nodes)
+                or (not every and self.first is not None),
+                timeout,
+            )
+        return self
+
+    @property
+    def accepted(self):
+        return self.first is not None
+
+    def __repr__(self):
+        with self.condition:
+            return "BroadcastReport(first=%s, %s)" % (
+                self.first,
+                {
+                    node: "%s %.3fs" % (result["outcome"], result["latency"])
+                    for node, result in self.results.items()
+                },
+            )
+
+
+class Broadcaster:
+    """
+    warm websockets per node, each broadcast on its own thread
+
+    :param int(width): nodes to push each transaction to
+    """
+
+    def __init__(self, width=BROADCAST_WIDTH):
+        self.width = width
+        self.lock = Lock()
+        # {node: [idle websocket-client connections]}
+        self.idle = {}
+        self.reports = deque(maxlen=BROADCAST_REPORTS)
+        self.stats = {"broadcasts": 0, "accepted": 0, "known": 0, "failed": 0}
+
+    def checkout(self, node, reuse=True):
+        """
+        an idle connection to node, else a new one
+
+        :param bool(reuse): False for a new connection even if one is idle
+        :raise ConnectionError: no handshake within HANDSHAKE_TIMEOUT
+        :return (rpc, bool): the connection, and whether it was idle
+        """
+        with self.lock:
+            if reuse and self.idle.get(node):
+                return self.idle[node].pop(), True
+        # records the handshake, or its failure, in the ranking
+        rpc = NODE_POOL.handshake(node)
+        if rpc is None:
+            raise ConnectionError("no handshake with %s" % node)
+        return rpc, False
+
+    def checkin(self, rpc):
+        """
+        keep a healthy connection for the next broadcast, up to IDLE_PER_NODE
+        """
+        with self.lock:
+            idle = self.idle.setdefault(rpc.node, [])
+            if len(idle) < IDLE_PER_NODE:
+                idle.append(rpc)
+                return
+        rpc.close()
+
+    def push(self, rpc, trx):
+        """
+        broadcast trx on one connection
+
+        :raise: when the connection failed; it is closed
+        :return: the node's error, None if it accepted trx
+        """
+        try:
+            ret = wss_call(rpc, ["network_broadcast", "broadcast_transaction", [trx]])
+        except Exception:
+            try:
+                rpc.close()
+            except Exception:
+                pass
+            raise
+        self.checkin(rpc)
+        if isinstance(ret, dict) and "error" in ret:
+            return str(ret["error"])
+        return None
+
+    def send(self, node, trx, report):
+        """
+        push trx to one node and record the outcome in the report
+        """
+        # a failed handshake or call is already recorded against the node
+        try:
+            rpc, idle = self.checkout(node)
+            try:
+                error = self.push(rpc, trx)
+            except Exception:
+                if not idle:
+                    raise
+                # an idle socket may have died unnoticed; once more on a new one
+                error = self.push(self.checkout(node, reuse=False)[0], trx)
+        except Exception as exception:
+            error = repr(exception)
+        if error is None:
+            outcome = "accepted"
+        elif any(known in error.lower() for known in KNOWN_ERRORS):
+            outcome = "known"
+        else:
+            outcome = "failed"
+        with self.lock:
+            self.stats[outcome] += 1
+        report.add(node, outcome, error)
+
+    def broadcast(self, trx, timeout=PROCESS_TIMEOUT):
+        """
+        push trx to the best ranked nodes at once
+
+        :return BroadcastReport(): after the first acceptance, or every refusal
+        """
+        nodes = NODE_POOL.ranked()[: self.width]
+        report = BroadcastReport(nodes)
+        with self.lock:
+            self.stats["broadcasts"] += 1
+            self.reports.append(report)
+        for node in nodes:
+            Thread(target=self.send, args=(node, trx, report), daemon=True).start()
+        return report.wait(timeout)
+
+    def acceptance(self):
+        """
+        mean seconds to accept, per node, over the kept reports
+
+        :return dict(): {node: (mean seconds, answers)}
+        """
+        latencies = {}
+        with self.lock:
+            reports = list(self.reports)
+        for report in reports:
+            with report.condition:
+                for node, result in report.results.items():
+                    if result["outcome"] != "failed":
+                        latencies.setdefault(node, []).append(result["latency"])
+        return {
+            node: (sum(seconds) / len(seconds), len(seconds))
+            for node, seconds in latencies.items()
+        }
+
+    def close(self):
+        """
+        close the idle connections; busy ones are closed when they answer
+        """
+        with self.lock:
+            idle, self.idle = self.idle, {}
+        for rpc in sum(idle.values(), []):
+            try:
+                rpc.close()
+            except Exception:
+                pass
+
+
+BROADCASTER = Broadcaster()
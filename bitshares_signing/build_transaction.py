@@ -24,10 +24,14 @@ import itertools
 # STANDARD PYTHON MODULES
 import time
 from binascii import unhexlify  # hexidecimal to binary text
+from concurrent.futures import ThreadPoolExecutor
 from struct import unpack_from  # convert back to PY variable
 
 # GRAPHENE SIGNING MODULES
-from .config import AUTOSCALE, CORE_FEES, DUST, KILL_OR_FILL, LIMIT
+from .balances import BALANCES
+from .config import (AUTOSCALE, CORE_FEES, DUST, KILL_OR_FILL, LIMIT,
+                     TX_EXPIRATION)
+from .fees import FEES
 from .graphenize.asset_create import graphenize_asset_create
 from .graphenize.call_order_update import graphenize_call
 from .graphenize.fee_pool import graphenize_fee_pool
@@ -41,8 +45,9 @@ from .graphenize.liquidity_pools import (graphenize_pool_creation,
                                          graphenize_pool_update, graphenize_pool_delete)
 from .graphenize.price_feeds import graphenize_add_producer, graphenize_publish
 from .graphenize.transfer import graphenize_transfer
-from .rpc import (rpc_account_id, rpc_balances, rpc_block_number,
-                  rpc_lookup_asset_symbols, rpc_open_orders, rpc_tx_fees)
+from .open_orders import OPEN_ORDERS
+from .ref_block import REF_BLOCK
+from .rpc import rpc_account_id, rpc_lookup_asset_symbols
 from .types import ObjectId
 from .utilities import fraction, it, to_iso_date
 
@@ -75,7 +80,70 @@ def graphenize_login(login_edicts, fees, account_id, tx_operations):
     return tx_operations
 
 
-def build_transaction(rpc, order):
+def prefetch(rpc, order, block=None, fees=None):
+    """
+    Every independent query an order needs, issued together.
+
+    What is needed is decided from the header and edicts up front:
+     - the account id, unless the header carries it
+     - the reference block and the fee schedule, unless passed in; from the
+       process-wide `REF_BLOCK` and `FEES` caches
+     - balances, when buy/sell edicts are to be autoscaled
+     - open orders, when an edict cancels all in the market
+
+    A multiplexed connection (one with a `query` method, ie. rpc_async.RPC) gets
+    all of them in flight at once, about one round trip; a plain websocket-client
+    connection is not thread safe and is queried one at a time as before.
+
+    :return dict(): keys "account_id", "block", "fees", "balances", "open_orders";
+        balances and open orders are None when not needed
+    """
+    header = order["header"]
+    account_name = str(header["account_name"])
+    ops = [edict["op"] for edict in order["edicts"]]
+    cancel_all = any(
+        "1.7.X" in edict.get("ids", ["1.7.X"])
+        for edict in order["edicts"]
+        if edict["op"] == "cancel"
+    )
+
+    account_id = header.get("account_id")
+    calls = {}
+    if account_id is None:
+        # the fee query names the account, so it follows the account lookup
+        def account_fees():
+            account_id = str(rpc_account_id(rpc, account_name))
+            return account_id, fees if fees is not None else FEES.get(rpc, account_id)
+
+        calls["account_fees"] = account_fees
+    elif fees is None:
+        calls["fees"] = lambda: FEES.get(rpc, str(account_id))
+    if block is None:
+        calls["block"] = lambda: REF_BLOCK.get(rpc)
+    if (AUTOSCALE or CORE_FEES) and {"buy", "sell"} & set(ops):
+        calls["balances"] = lambda: BALANCES.get(rpc, account_name)
+    if cancel_all:
+        calls["open_orders"] = lambda: OPEN_ORDERS.get(rpc, account_name, header)
+
+    if hasattr(rpc, "query") and len(calls) > 1:
+        with ThreadPoolExecutor(len(calls)) as pool:
+            futures = {key: pool.submit(call) for key, call in calls.items()}
+            results = {key: future.result() for key, future in futures.items()}
+    else:
+        results = {key: call() for key, call in calls.items()}
+
+    if "account_fees" in results:
+        account_id, fees = results["account_fees"]
+    return {
+        "account_id": str(account_id),
+        "block": results.get("block", block),
+        "fees": results.get("fees", fees),
+        "balances": results.get("balances"),
+        "open_orders": results.get("open_orders"),
+    }
+
+
+def build_transaction(rpc, order, block=None, fees=None):
     """
     # this performs incoming limit order api conversion
     # from human terms to graphene terms
@@ -102,6 +170,11 @@ def build_transaction(rpc, order):
      - bundled cancel/buy/sell transactions out; cancel first
      - prevent inadvertent huge number of orders
      - do not place orders for dust amounts
+
+    # block and fees:
+     - `get_dynamic_global_properties` and `rpc_tx_fees` results may be passed in
+       by a caller that caches them (ie. BrokerSession), otherwise they are fetched
+       by `prefetch()` along with balances and open orders
     """
     # VALIDATE INCOMING DATA
     for key, expected_type in [("edicts", list), ("nodes", list), ("header", dict)]:
@@ -116,9 +189,12 @@ def build_transaction(rpc, order):
     asset_id = str(order["header"].get("asset_id", "1.3.0"))
 
     account_name = str(order["header"]["account_name"])
-    account_id = str(
-        order["header"].get("account_id", rpc_account_id(rpc, account_name))
-    )
+    # GATHER TRANSACTION HEADER DATA
+    # all independent queries at once; the account is only looked up when the
+    # header does not already carry its id
+    fetched = prefetch(rpc, order, block, fees)
+    account_id = fetched["account_id"]
+    block, fees = fetched["block"], fetched["fees"]
 
     currency_precision = int(order["header"].get("currency_precision", 0))
     currency_id = str(order["header"].get("currency_id", 0))
@@ -133,15 +209,10 @@ def build_transaction(rpc, order):
     # validate a.b.c identifiers of account id and asset ids
     for check in checks:
         ObjectId(check)
-    # GATHER TRANSACTION HEADER DATA
-    # fetch block data via websocket request
-    block = rpc_block_number(rpc)
     ref_block_num = block["head_block_number"] & 0xFFFF
     ref_block_prefix = unpack_from("<I", unhexlify(block["head_block_id"]), 4)[0]
-    # fetch limit order create and cancel fee via websocket request
-    fees = rpc_tx_fees(rpc, account_id)
     # establish transaction expiration
-    tx_expiration = to_iso_date(int(time.time() + 120))
+    tx_expiration = to_iso_date(int(time.time() + TX_EXPIRATION))
     if DEV:
         print(ref_block_num, ref_block_prefix, tx_expiration)
     # initialize tx_operations list
@@ -183,7 +254,14 @@ def build_transaction(rpc, order):
             edict_types[op_type][idx]["price"] = item["price"]
 
     graphenize_cancel(
-        rpc, edict_types["cancel"], fees, order, account_name, account_id, tx_operations
+        rpc,
+        edict_types["cancel"],
+        fees,
+        order,
+        account_name,
+        account_id,
+        tx_operations,
+        open_orders=fetched["open_orders"],
     )
     if any([edict_types["sell"], edict_types["buy"]]):
         scaled_limit_orders = scale_limit_orders(
@@ -194,6 +272,7 @@ def build_transaction(rpc, order):
             account_name,
             edict_types["buy"],
             edict_types["sell"],
+            balances=fetched["balances"],
         )
         tx_operations = graphenize_limit_orders(
             scaled_limit_orders,
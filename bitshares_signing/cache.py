@@ -0,0 +1,211 @@
+r"""
+cache.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Process-wide asset metadata cache; id <-> symbol, precision and MPA flag
+
+Held in memory and loaded once from an append-only journal of json lines:
+
+    ["precision", "1.3.0", 5]
+    ["symbol", "1.3.0", "BTS"]
+
+New entries are appended in one write under an exclusive file lock, so several
+processes may share the same cache directory.  Asset metadata never changes once
+an asset exists, so later lines simply repeat earlier ones.
+
+Lookups are tiered: memory, then any lines other processes appended to the journal
+since we last read it, and only then the caller's RPC.  Each tier is counted per
+table in `METADATA.stats` so a warm process can be seen to make no metadata RPCs.
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except
+
+# STANDARD PYTHON MODULES
+import json
+import os
+from threading import RLock
+
+try:
+    import fcntl  # POSIX advisory file locks
+except ImportError:
+    fcntl = None
+
+# GRAPHENE SIGNING MODULES
+from .config import PATH
+
+# precision: asset id -> int
+# symbol: asset id -> str
+# id: asset symbol -> asset id
+# mpa: asset id -> bool
+# name: non-asset object id -> str
+TABLES = ("precision", "symbol", "id", "mpa", "name")
+# marks a key absent from a table
+MISSING = object()
+# where a lookup was answered; "rpc" means the caller has to fetch it
+TIERS = ("memory", "disk", "rpc")
+
+
+class MetadataCache:
+    """
+    lock protected in-memory tables backed by an append-only json lines journal
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = RLock()
+        self.tables = {table: {} for table in TABLES}
+        self.stats = {table: dict.fromkeys(TIERS, 0) for table in TABLES}
+        self.loaded = False
+        # bytes of the journal already read into memory
+        self.offset = 0
+
+    def load(self):
+        """
+        read the journal once per process
+        """
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            self.refresh()
+
+    def refresh(self):
+        """
+        read whatever was appended to the journal since the last read
+
+        :return int(): number of entries read
+        """
+        with self.lock:
+            try:
+                if os.path.getsize(self.path) <= self.offset:
+                    return 0
+                with open(self.path, "rb") as handle:
+                    handle.seek(self.offset)
+                    data = handle.read()
+            except OSError:
+                return 0
+            # leave a partial last line, still being written, for the next read
+            data = data[: data.rfind(b"\n") + 1]
+            self.offset += len(data)
+            count = 0
+            for line in data.decode(errors="replace").splitlines():
+                try:
+                    table, key, value = json.loads(line)
+                    self.tables[table][key] = value
+                    count += 1
+                except Exception:
+                    # a torn line from a crashed writer; the entry is simply refetched
+                    continue
+            return count
+
+    def get(self, table, key, default=None):
+        """
+        cached value or default; memory only, not counted
+        """
+        if not self.loaded:
+            self.load()
+        return self.tables[table].get(key, default)
+
+    def lookup(self, table, key):
+        """
+        tiered and counted read; memory, then the journal, else None for the
+        caller to fetch over RPC and `update()`
+        """
+        if not self.loaded:
+            self.load()
+        value = self.tables[table].get(key)
+        if value is not None:
+            self.stats[table]["memory"] += 1
+            return value
+        # another process may have fetched it already
+        if self.refresh():
+            value = self.tables[table].get(key)
+        self.stats[table]["disk" if value is not None else "rpc"] += 1
+        return value
+
+    def hit_rate(self, table):
+        """
+        :return float(): fraction of lookups in this table answered without RPC
+        """
+        stats = self.stats[table]
+        total = sum(stats.values())
+        return (total - stats["rpc"]) / total if total else 0.0
+
+    def update(self, entries):
+        """
+        add [(table, key, value), ...] to memory and append the new ones to disk
+        """
+        if not self.loaded:
+            self.load()
+        with self.lock:
+            entries = [
+                (table, key, value)
+                for table, key, value in entries
+                if self.tables[table].get(key, MISSING) != value
+            ]
+            for table, key, value in entries:
+                self.tables[table][key] = value
+            if entries:
+                self.append(entries)
+
+    def append(self, entries):
+        """
+        one O_APPEND write of all entries under an exclusive lock
+        """
+        data = "".join(json.dumps(entry) + "\n" for entry in entries).encode()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            handle = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        except OSError:
+            return  # read only install; memory cache only
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            os.write(handle, data)
+            end = os.lseek(handle, 0, os.SEEK_END)
+            with self.lock:
+                # nobody else wrote since our last read; skip our own lines
+                if end - len(data) == self.offset:
+                    self.offset = end
+        finally:
+            os.close(handle)  # also releases the lock
+
+    def remember_asset(self, asset):
+        """
+        cache everything we need from one asset object (1.3.x)
+        """
+        self.remember_assets([asset])
+
+    def remember_assets(self, assets):
+        """
+        cache many asset objects in a single journal append
+        """
+        entries = []
+        for asset in assets:
+            entries.extend(
+                [
+                    ("precision", asset["id"], int(asset["precision"])),
+                    ("symbol", asset["id"], asset["symbol"]),
+                    ("id", asset["symbol"], asset["id"]),
+                    ("mpa", asset["id"], "bitasset_data_id" in asset),
+                ]
+            )
+        self.update(entries)
+
+
+METADATA = MetadataCache(os.path.join(PATH, "pipe", "metadata.jsonl"))
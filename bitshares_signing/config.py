@@ -35,6 +35,22 @@ SATOSHI = 0.00000001
 SIXSIG = 0.999999
 # timeout during websocket handshake; default 4 seconds
 HANDSHAKE_TIMEOUT = 4
+# seconds between background node pool probes, default 300
+NODE_PROBE_INTERVAL = 300
+# ConnectionPool sockets in total and to any one node, default 8 and 4
+POOL_SIZE = 8
+POOL_PER_NODE = 4
+# reads a ConnectionPool(hedge=True) races on a second node when slow
+HEDGE_METHODS = ["get_full_accounts", "get_order_book", "get_ticker", "get_limit_orders"]
+# hedge a read slower than this quantile of its last 100, default 0.9
+HEDGE_PERCENTILE = 0.9
+# hedge delay until 10 latencies are known, default 0.25 seconds
+HEDGE_DELAY = 0.25
+# nodes each signed transaction is pushed to at once, default 1
+BROADCAST_WIDTH = 1
+# seconds a cancel waits for its block before listing open orders again,
+# default 30; 0 to poll every 5 seconds instead
+CONFIRM_TIMEOUT = 30
 # multiprocessing handler lifespan, default 60 seconds
 PROCESS_TIMEOUT = 60
 # default False for persistent limit orders
@@ -45,12 +61,40 @@ AUTOSCALE = True
 CORE_FEES = True
 # multiprocessing incarnations, default 3 attempts
 ATTEMPTS = 3
+# fee quote lifespan per account, default 600 seconds
+FEE_CACHE_TIMEOUT = 600
+# account active authority lifespan, default 600 seconds
+AUTHORITY_CACHE_TIMEOUT = 600
+# seconds between get_global_properties fee parameter checks, default 60
+FEE_PARAMETERS_CHECK = 60
+# default False; True for BrokerSession to follow blocks, fee updates, open orders
+# and balances on a subscription socket rather than poll for them
+SUBSCRIPTION_FEED = False
+# seconds of silence on a notice socket before it is pinged; as long again without
+# any message and the connection is dropped as dead, default 10
+NOTICE_TIMEOUT = 10
+# reference block refresh interval and head block lifespan, default 30 seconds
+BLOCK_CACHE_TIMEOUT = 30
+# irreversible reference block lifespan, default 600 seconds
+REF_BLOCK_MAX_AGE = 600
+# transaction expiration, seconds after signing; default 120
+TX_EXPIRATION = 120
 # prevent extreme number of AI generated edicts; default 20
 LIMIT = None
 # default True to execute order in primary script process
 JOIN = True
 # ignore orders value less than ~X bitshares; 0 to disable
 DUST = 0
+# cross check 1 in N serialized transactions with get_transaction_hex, default 1
+# 0 signs on the local serializer's word alone, offline; its golden vectors come
+# from pybitshares, not from a node
+SERIALIZATION_CHECK = 1
+# default False; True to cross check in a background thread on its own websocket
+SERIALIZATION_CHECK_BACKGROUND = False
+# sign_many() worker processes, default one per cpu; 1 signs in process only
+SIGN_PROCESSES = os.cpu_count() or 1
+# sign_many() batches of at least this many go to the workers, default 256
+SIGN_POOL_MIN = 256
 # True = heavy print output
 DEV = False
 # Application version
@@ -0,0 +1,141 @@
+r"""
+confirmations.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Process-wide tracker of broadcast transactions until they are in a block
+
+    confirmation = CONFIRMATIONS.broadcast(signed_tx)
+    confirmation.wait(CONFIRM_TIMEOUT)  # {"id", "block_num", "trx_num", "trx"}
+
+The transaction is sent with `broadcast_transaction_with_callback` on the
+tracker's own `NoticeSocket`; the node answers at once and sends a notice when the
+transaction is applied in a block.  Should the connection drop first that notice
+can never arrive, so every open confirmation resolves to None and the caller falls
+back to looking at the chain itself.
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except
+
+# STANDARD PYTHON MODULES
+import itertools
+from threading import Event, Lock
+
+# GRAPHENE SIGNING MODULES
+from .config import PROCESS_TIMEOUT
+from .subscriptions import NoticeSocket
+
+
+class Confirmation:
+    """
+    set once with the inclusion notice, or None when it was lost
+    """
+
+    def __init__(self):
+        self.event = Event()
+        self.included = None
+
+    def set(self, included):
+        self.included = included
+        self.event.set()
+
+    def wait(self, timeout=None):
+        """
+        :return dict(): {"id", "block_num", "trx_num", "trx"}, None if not included
+        """
+        self.event.wait(timeout)
+        return self.included
+
+
+class ConfirmationTracker:
+    """
+    lock protected {callback id: Confirmation} on one notice socket
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.socket = NoticeSocket(on_drop=self.lose)
+        self.ids = itertools.count(1)
+        self.watching = {}
+        self.stats = {"broadcasts": 0, "confirmed": 0, "lost": 0}
+
+    def start(self):
+        self.socket.start()
+        return self
+
+    def broadcast(self, trx, timeout=PROCESS_TIMEOUT):
+        """
+        upload the signed transaction and watch for its block
+
+        :raise RuntimeError: the node refused the transaction
+        :raise ConnectionError, TimeoutError: the node did not answer
+        :return Confirmation():
+        """
+        self.start()
+        confirmation = Confirmation()
+        with self.lock:
+            callback_id = next(self.ids)
+            self.watching[callback_id] = confirmation
+            self.stats["broadcasts"] += 1
+        self.socket.subscribe(
+            callback_id, lambda notice: self.confirm(callback_id, notice)
+        )
+        try:
+            self.socket.query(
+                [
+                    "network_broadcast",
+                    "broadcast_transaction_with_callback",
+                    [callback_id, trx],
+                ],
+                timeout,
+            )
+        except Exception:
+            self.forget(callback_id)
+            raise
+        return confirmation
+
+    def forget(self, callback_id):
+        self.socket.unsubscribe(callback_id)
+        with self.lock:
+            return self.watching.pop(callback_id, None)
+
+    def confirm(self, callback_id, notice):
+        """
+        the inclusion notice; a list holding one transaction confirmation
+        """
+        confirmation = self.forget(callback_id)
+        if confirmation is not None:
+            self.stats["confirmed"] += 1
+            confirmation.set(notice[0] if isinstance(notice, list) else notice)
+
+    def lose(self):
+        """
+        the connection dropped; no notice will come for what it was watching
+        """
+        with self.lock:
+            watching, self.watching = self.watching, {}
+            self.stats["lost"] += len(watching)
+        for callback_id, confirmation in watching.items():
+            self.socket.unsubscribe(callback_id)
+            confirmation.set(None)
+
+    def close(self):
+        self.socket.close()
+        self.lose()
+
+
+CONFIRMATIONS = ConfirmationTracker()
@@ -0,0 +1,331 @@
+r"""
+connection_pool.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Thread safe pool of websocket-client connections
+
+A `ConnectionPool` can be passed anywhere an `rpc` is accepted; `wss_query` hands
+each query to `pool.query()`, which borrows an idle connection for exactly one
+call.  Many threads may share one pool:
+
+    pool = ConnectionPool()
+    rpc_balances(pool, "account-name")
+    build_transaction(pool, order)  # prefetch runs its queries concurrently
+
+or hold one connection for a sequence of calls:
+
+    with pool.connection() as rpc:
+        ...
+
+At most `POOL_SIZE` sockets are open, at most `POOL_PER_NODE` to any one node;
+new connections go to the best ranked node in the node pool that is under its
+limit.  A connection that fails is closed and replaced in a background thread.
+
+Hedged reads, opt in with `ConnectionPool(hedge=True)`: a call in `HEDGE_METHODS`
+that has not been answered within the `HEDGE_PERCENTILE` latency of its recent
+calls is sent again on a connection to a second node, and the first answer wins.
+websocket-client cannot withdraw a request, so the loser's answer is read and
+dropped before its connection returns to the pool.  `pool.hedges` counts, per
+method, the calls, how many were hedged and how many of those the hedge won.
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except
+
+# STANDARD PYTHON MODULES
+import time
+from collections import deque
+from contextlib import contextmanager
+from queue import Empty, Queue
+from threading import Condition, Thread
+
+# GRAPHENE SIGNING MODULES
+from .config import (HEDGE_DELAY, HEDGE_METHODS, HEDGE_PERCENTILE,
+                     POOL_PER_NODE, POOL_SIZE, PROCESS_TIMEOUT)
+from .node_pool import NODE_POOL
+from .rpc import wss_call
+
+
+class ConnectionPool:
+    """
+    bounded, lock protected checkout / checkin of websocket-client connections
+
+    :param int(size): most sockets open at once
+    :param int(per_node): most sockets open to any one node
+    :param bool(hedge): race slow `HEDGE_METHODS` reads on a second node
+    """
+
+    def __init__(self, size=POOL_SIZE, per_node=POOL_PER_NODE, hedge=False):
+        self.size = size
+        self.per_node = per_node
+        self.hedge = hedge
+        # {method: deque of recent answer seconds}
+        self.latency = {}
+        # {method: {"calls", "hedged", "won"}}
+        self.hedges = {}
+        self.condition = Condition()
+        self.idle = []
+        # {node: open or opening connections}
+        self.counts = {}
+        # connections being opened, node not yet known
+        self.opening = 0
+        self.closed = False
+        self.stats = {"checkouts": 0, "waits": 0, "opened": 0, "broken": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def total(self):
+        return sum(self.counts.values()) + self.opening
+
+    def full_nodes(self):
+        """
+        nodes at their connection limit
+        """
+        return {node for node, count in self.counts.items() if count >= self.per_node}
+
+    def open(self, timeout=None):
+        """
+        connect to the best node under its limit; the caller reserved a slot
+
+        :param float(timeout): seconds to keep trying, default as `NODE_POOL.connect`
+        :raise TimeoutError: when the timeout expired first
+        :return: the connection, None when concurrent opens filled every node
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self.condition:
+                exclude = self.full_nodes()
+                expired = deadline is not None and time.time() >= deadline
+                if expired or exclude.issuperset(NODE_POOL.nodes):
+                    self.opening -= 1
+                    self.condition.notify()
+                    if expired:
+                        raise TimeoutError("no connection available")
+                    return None
+            try:
+                remaining = None if deadline is None else deadline - time.time()
+                rpc = NODE_POOL.connect(exclude, remaining)
+            except Exception:
+                with self.condition:
+                    self.opening -= 1
+                    self.condition.notify()
+                raise
+            with self.condition:
+                # a concurrent open may have filled this node meanwhile
+                if self.counts.get(rpc.node, 0) < self.per_node:
+                    self.opening -= 1
+                    self.counts[rpc.node] = self.counts.get(rpc.node, 0) + 1
+                    self.stats["opened"] += 1
+                    return rpc
+            rpc.close()
+
+    def checkout_other(self, node):
+        """
+        an idle connection to any node but this one, or a new one while under the
+        limits; None rather than wait
+        """
+        with self.condition:
+            for idx, rpc in enumerate(self.idle):
+                if rpc.node != node:
+                    return self.idle.pop(idx)
+            full = self.full_nodes() | {node}
+            if self.total() >= self.size or full.issuperset(NODE_POOL.nodes):
+                return None
+            self.opening += 1
+        rpc = self.open()
+        if rpc is not None and rpc.node == node:
+            # only a connection to the same node was available
+            self.checkin(rpc)
+            return None
+        return rpc
+
+    def checkout(self, timeout=PROCESS_TIMEOUT):
+        """
+        :return: an idle connection, a new one while under the limits, else wait
+        """
+        deadline = time.time() + timeout
+        with self.condition:
+            self.stats["checkouts"] += 1
+            while True:
+                if self.closed:
+                    raise RuntimeError("ConnectionPool closed")
+                if self.idle:
+                    return self.idle.pop()
+                if self.total() < self.size and len(self.full_nodes()) < len(
+                    NODE_POOL.nodes
+                ):
+                    self.opening += 1
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError("no connection available")
+                self.stats["waits"] += 1
+                self.condition.wait(remaining)
+        rpc = self.open(deadline - time.time())
+        if rpc is None:
+            return self.checkout(max(0, deadline - time.time()))
+        return rpc
+
+    def checkin(self, rpc, broken=False):
+        """
+        return a connection; a broken one is closed and replaced in the background
+        """
+        if broken or self.closed:
+            try:
+                rpc.close()
+            except Exception:
+                pass
+            with self.condition:
+                self.counts[rpc.node] -= 1
+                if broken:
+                    self.stats["broken"] += 1
+                    # reserve the slot for the replacement
+                    self.opening += 1
+                self.condition.notify()
+            if broken and not self.closed:
+                Thread(target=self.replace, daemon=True).start()
+            return
+        with self.condition:
+            self.idle.append(rpc)
+            self.condition.notify()
+
+    def replace(self):
+        """
+        reconnect a broken connection's slot
+        """
+        try:
+            rpc = self.open()
+            if rpc is not None:
+                self.checkin(rpc)
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self):
+        """
+        hold one connection for several calls
+        """
+        rpc = self.checkout()
+        try:
+            yield rpc
+        except Exception:
+            self.checkin(rpc, broken=True)
+            raise
+        self.checkin(rpc)
+
+    def query(self, params, client_order_id=1):
+        """
+        the `wss_query` hook; client_order_id is the json-rpc id, as on one socket
+        """
+        if self.hedge and params[1] in HEDGE_METHODS:
+            return self.hedged_query(params, client_order_id)
+        return self.retry(params, client_order_id)
+
+    def budget(self, method):
+        """
+        seconds to wait for the first node before hedging
+        """
+        with self.condition:
+            samples = sorted(self.latency.get(method, ()))
+        if len(samples) < 10:
+            return HEDGE_DELAY
+        return samples[int(HEDGE_PERCENTILE * (len(samples) - 1))]
+
+    def hedged_query(self, params, client_order_id=1):
+        """
+        race a second node when the first is slower than its usual percentile
+        """
+        method = params[1]
+        answers = Queue()
+
+        def attempt(rpc):
+            start = time.time()
+            try:
+                ret = wss_call(rpc, params, client_order_id)
+            except Exception as error:
+                self.checkin(rpc, broken=True)
+                answers.put((rpc, None, error))
+                return
+            with self.condition:
+                self.latency.setdefault(method, deque(maxlen=100)).append(
+                    time.time() - start
+                )
+            self.checkin(rpc)
+            answers.put((rpc, ret, None))
+
+        with self.condition:
+            stats = self.hedges.setdefault(method, {"calls": 0, "hedged": 0, "won": 0})
+            stats["calls"] += 1
+        primary = self.checkout()
+        Thread(target=attempt, args=(primary,), daemon=True).start()
+        pending, hedge = 1, None
+        try:
+            rpc, ret, error = answers.get(timeout=self.budget(method))
+            pending -= 1
+            if error is None:
+                return ret
+        except Empty:
+            hedge = self.checkout_other(primary.node)
+            if hedge is not None:
+                with self.condition:
+                    stats["hedged"] += 1
+                Thread(target=attempt, args=(hedge,), daemon=True).start()
+                pending += 1
+        while pending:
+            try:
+                rpc, ret, error = answers.get(timeout=PROCESS_TIMEOUT)
+            except Empty:
+                break
+            pending -= 1
+            if error is None:
+                if rpc is hedge:
+                    with self.condition:
+                        stats["won"] += 1
+                return ret
+        # every attempt failed; fall back to plain retries
+        return self.retry(params, client_order_id)
+
+    def retry(self, params, client_order_id=1):
+        """
+        up to 10 unhedged attempts, each on a healthy connection
+        """
+        for _ in range(10):
+            rpc = self.checkout()
+            try:
+                ret = wss_call(rpc, params, client_order_id)
+            except Exception:
+                self.checkin(rpc, broken=True)
+                print("RPC failed, switching nodes...")
+                continue
+            self.checkin(rpc)
+            return ret
+        raise RuntimeError("Websocket Closed")
+
+    def close(self):
+        """
+        close every idle connection; busy ones are closed when checked in
+        """
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.condition.notify_all()
+        for rpc in idle:
+            self.checkin(rpc)
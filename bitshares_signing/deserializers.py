@@ -0,0 +1,288 @@
+r"""
+deserializers.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Wire format bytes back to transaction dicts
+
+The field schemas the encoders in serializers.py are compiled from are built here
+into one reader function per operation; a `TransactionReader` walks a memoryview
+of the bytes with them, one field at a time, without copying:
+
+    trx = TransactionReader(message, prefix=CHAIN_ID).transaction()
+    trx = decode_transaction(get_transaction_hex)  # signatures included
+
+    reader = TransactionReader(data)
+    header = reader.header()
+    for op_id, operation in reader.operations():  # one at a time
+        ...
+
+A decoded transaction serializes back to the same bytes.  Absent optional
+fields, eg. a transfer without memo, are left out of the dict rather than None.
+
+:raise ValueError: truncated or malformed bytes, or an unknown op id
+
+"""
+# STANDARD PYTHON MODULES
+from binascii import unhexlify
+from struct import Struct
+
+# GRAPHENE SIGNING MODULES
+from .base58 import gph_base58_check_encode
+from .config import PREFIX
+from .serializers import SCHEMAS, STRUCTS
+from .types import TYPES
+from .utilities import to_iso_date
+
+UNPACK = {
+    "int64": Struct("<q"),
+    "uint8": Struct("<B"),
+    "uint16": Struct("<H"),
+    "uint32": Struct("<I"),
+    "uint64": Struct("<Q"),
+}
+HEADER = Struct("<HII")
+
+# compressed public key and compact signature bytes
+PUBLIC_KEY = 33
+SIGNATURE = 65
+
+# static variant options of each extension kind, by index
+EXTENSIONS = {
+    "call_order_extensions": (("target_collateral_ratio", "uint16"),),
+}
+
+# what an optional field that is not there reads as; left out of its dict
+ABSENT = object()
+
+
+class TransactionReader:
+    """
+    the read position in a memoryview of serialized bytes
+
+    :param bytes(data): bytes, bytearray, memoryview or a hex string
+    :param bytes(prefix): expected first, eg. the chain id of a message to sign
+    """
+
+    def __init__(self, data, prefix=b""):
+        if isinstance(data, str):
+            data = unhexlify(data)
+        self.view = memoryview(data)
+        self.pos = 0
+        if prefix and self.read(len(prefix)) != prefix:
+            raise ValueError("prefix does not match")
+
+    @property
+    def remaining(self):
+        return len(self.view) - self.pos
+
+    def need(self, size):
+        if self.pos + size > len(self.view):
+            raise ValueError(
+                "truncated; %d bytes needed at %d of %d"
+                % (size, self.pos, len(self.view))
+            )
+
+    def read(self, size):
+        self.need(size)
+        self.pos += size
+        return bytes(self.view[self.pos - size : self.pos])
+
+    def unpack(self, kind):
+        layout = UNPACK[kind]
+        self.need(layout.size)
+        (value,) = layout.unpack_from(self.view, self.pos)
+        self.pos += layout.size
+        return value
+
+    def read_varint(self):
+        num, shift = 0, 0
+        while True:
+            self.need(1)
+            byte = self.view[self.pos]
+            self.pos += 1
+            num |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return num
+            shift += 7
+            if shift > 63:
+                raise ValueError("varint longer than 64 bits at %d" % self.pos)
+
+    def read_object_id(self, type_id):
+        """
+        "1.type_id.instance"; only the instance is on the wire
+        """
+        return "1.%d.%d" % (type_id, self.read_varint())
+
+    def read_time(self):
+        return to_iso_date(self.unpack("uint32"))
+
+    def read_string(self):
+        try:
+            return self.read(self.read_varint()).decode("utf-8")
+        except UnicodeDecodeError as error:
+            raise ValueError("invalid string at %d" % self.pos) from error
+
+    def read_bytes(self):
+        """
+        varint length prefixed bytes, as the hex string `types.Bytes` takes
+        """
+        return self.read(self.read_varint()).hex()
+
+    def read_public_key(self, prefix=PREFIX):
+        return prefix + gph_base58_check_encode(self.read(PUBLIC_KEY).hex())
+
+    def read_empty(self):
+        """
+        an extensions list the operation classes always leave empty
+        """
+        if self.read_varint():
+            raise ValueError("unexpected extensions at %d" % self.pos)
+        return []
+
+    def header(self):
+        """
+        {"ref_block_num", "ref_block_prefix", "expiration"}
+        """
+        self.need(HEADER.size)
+        num, prefix, expiration = HEADER.unpack_from(self.view, self.pos)
+        self.pos += HEADER.size
+        return {
+            "ref_block_num": num,
+            "ref_block_prefix": prefix,
+            "expiration": to_iso_date(expiration),
+        }
+
+    def operations(self):
+        """
+        yield [op_id, operation] as each is read; after the header
+        """
+        for _ in range(self.read_varint()):
+            op_id = self.read_varint()
+            if op_id not in DECODERS:
+                raise ValueError(f"Invalid operation code: {op_id}")
+            yield [op_id, DECODERS[op_id](self)]
+
+    def transaction(self):
+        """
+        the whole transaction; with its signatures if any bytes follow the body
+
+        :raise ValueError: bytes left over after the last signature
+        """
+        trx = self.header()
+        trx["operations"] = list(self.operations())
+        trx["extensions"] = self.read_empty()
+        if self.remaining:
+            trx["signatures"] = [
+                self.read(SIGNATURE).hex() for _ in range(self.read_varint())
+            ]
+        if self.remaining:
+            raise ValueError("%d bytes left over" % self.remaining)
+        return trx
+
+
+def decode_transaction(data, prefix=b""):
+    """
+    :param bytes(data): serialized transaction, or its hex
+    :return dict(): as `TransactionReader.transaction()`
+    """
+    return TransactionReader(data, prefix).transaction()
+
+
+def read_memo(reader):
+    """
+    the optional memo of a transfer or asset issue
+    """
+    if not reader.unpack("uint8"):
+        return ABSENT
+    return {
+        "from": reader.read_public_key(),
+        "to": reader.read_public_key(),
+        "nonce": reader.unpack("uint64"),
+        "message": reader.read_bytes(),
+    }
+
+
+def extension(options):
+    """
+    reader of a static variant extensions list; {name: value} of those present
+    """
+    options = tuple((name, decoder(kind)) for name, kind in options)
+
+    def read(reader):
+        value = {}
+        for _ in range(reader.read_varint()):
+            index = reader.read_varint()
+            if index >= len(options):
+                raise ValueError("unknown extension %d at %d" % (index, reader.pos))
+            name, read_option = options[index]
+            value[name] = read_option(reader)
+        return value
+
+    return read
+
+
+def fields(schema):
+    """
+    reader of a dict, field by field in wire order
+    """
+    schema = tuple((key, decoder(kind)) for key, kind in schema)
+
+    def read(reader):
+        value = {}
+        for key, read_field in schema:
+            item = read_field(reader)
+            if key is not None and item is not ABSENT:
+                value[key] = item
+        return value
+
+    return read
+
+
+def decoder(kind):
+    """
+    function(reader) -> value of one field kind of serializers.py
+    """
+    if kind in UNPACK:
+        return lambda reader: reader.unpack(kind)
+    if kind == "bool":
+        return lambda reader: bool(reader.unpack("uint8"))
+    if kind == "time":
+        return TransactionReader.read_time
+    if kind == "empty":
+        return TransactionReader.read_empty
+    if kind == "string":
+        return TransactionReader.read_string
+    if kind == "memo":
+        return read_memo
+    if kind in EXTENSIONS:
+        return extension(EXTENSIONS[kind])
+    if kind in STRUCTS:
+        return fields(STRUCTS[kind])
+    if kind.startswith("id:"):
+        type_id = TYPES[kind[3:]]
+        return lambda reader: reader.read_object_id(type_id)
+    if kind.startswith(("array:", "sorted:")):
+        item = decoder(kind.split(":", 1)[1])
+        return lambda reader: [item(reader) for _ in range(reader.read_varint())]
+    if kind.startswith(("optional:", "present:")):
+        inner = decoder(kind.split(":", 1)[1])
+        return lambda reader: inner(reader) if reader.unpack("uint8") else ABSENT
+    raise ValueError("unknown field kind %s" % kind)
+
+
+# {op_id: function(reader) -> operation dict}
+DECODERS = {op_id: fields(schema) for op_id, schema in SCHEMAS.items()}
@@ -0,0 +1,204 @@
+r"""
+fees.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Process-wide fee schedule cache
+
+Fees only change when the committee updates the chain parameters, so the
+`get_required_fees` quote for each fee paying account is kept for
+`FEE_CACHE_TIMEOUT` seconds.  Every `FEE_PARAMETERS_CHECK` seconds a single
+`get_global_properties` call compares a hash of `current_fees`; when it changed
+every cached quote is dropped at once.  A fee schedule that `follow()`s the
+subscription feed learns of the change in the block it happens, and does not poll
+while the feed is connected.
+
+The same `current_fees` schedule also prices an operation locally, including the
+per kilobyte component for memos and asset descriptions, as the node does:
+
+    fee = (flat fee + price_per_kbyte * data bytes / 1024) * scale / 10000
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except
+
+# STANDARD PYTHON MODULES
+import json
+import time
+from hashlib import sha256
+from threading import RLock
+
+# GRAPHENE SIGNING MODULES
+from .config import FEE_CACHE_TIMEOUT, FEE_PARAMETERS_CHECK
+from .operations import Asset_create, Memo
+from .rpc import rpc_tx_fees, wss_query
+
+# GRAPHENE_100_PERCENT; the schedule scale is in hundredths of a percent
+FULL_SCALE = 10000
+
+
+class FeeSchedule:
+    """
+    lock protected `rpc_tx_fees` quotes per account plus the chain fee schedule
+    """
+
+    def __init__(self):
+        self.lock = RLock()
+        # {account_id: (unix, fees)}
+        self.accounts = {}
+        # {op_id: fee parameters} from `current_fees`
+        self.schedule = {}
+        self.scale = FULL_SCALE
+        # sha256 of `current_fees`, and when it was last compared
+        self.parameters = None
+        self.checked = 0
+        # the followed feed; polling resumes while it is down or just reconnected
+        self.feed = None
+        self.synced = False
+        self.resets = 0
+        self.stats = {"hits": 0, "quotes": 0, "checks": 0, "invalidations": 0}
+
+    def check(self, rpc, force=False):
+        """
+        drop every quote when the chain fee parameters changed; at most once every
+        `FEE_PARAMETERS_CHECK` seconds, and never while the feed brings changes,
+        unless forced
+        """
+        with self.lock:
+            if not force and (
+                self.following or time.time() - self.checked < FEE_PARAMETERS_CHECK
+            ):
+                return False
+            self.checked = time.time()
+            self.stats["checks"] += 1
+            connected = self.feed is not None and self.feed.socket.ready.is_set()
+            resets = self.resets
+        # query outside the lock; one slow node should not stall other accounts
+        changed = self.apply(wss_query(rpc, ["database", "get_global_properties", []]))
+        with self.lock:
+            # the feed did not reconnect meanwhile; it brings every later change
+            if connected and resets == self.resets:
+                self.synced = True
+        return changed
+
+    @property
+    def following(self):
+        """
+        True while the feed is connected and nothing was missed since the last check
+        """
+        return (
+            self.synced and self.feed is not None and self.feed.socket.ready.is_set()
+        )
+
+    def apply(self, global_properties):
+        """
+        adopt the fee schedule of a `get_global_properties` object
+
+        :return bool(): True if it changed; the first schedule adopted is no change
+        """
+        current_fees = global_properties["parameters"]["current_fees"]
+        digest = sha256(json.dumps(current_fees, sort_keys=True).encode()).hexdigest()
+        with self.lock:
+            if digest == self.parameters:
+                return False
+            # quotes taken before the first check are as current as the schedule
+            changed = self.parameters is not None
+            if changed:
+                self.stats["invalidations"] += 1
+                self.accounts.clear()
+            self.parameters = digest
+            # parameters are a list of [op_id, {fee parameters}] static variants
+            self.schedule = {
+                int(op_id): params for op_id, params in current_fees["parameters"]
+            }
+            self.scale = int(current_fees.get("scale", FULL_SCALE))
+            return changed
+
+    def follow(self, feed):
+        """
+        take fee parameter updates from a `SubscriptionFeed` the block they happen
+        """
+        self.feed = feed
+        feed.watch_objects(["2.0.0"])
+        feed.listen("object", self.changed)
+        feed.listen("reset", self.reset)
+
+    def changed(self, object_id, obj):
+        if object_id == "2.0.0" and obj is not None:
+            self.apply(obj)
+
+    def reset(self):
+        """
+        feed listener; a change may have been missed, poll until the next check
+        """
+        with self.lock:
+            self.synced = False
+            self.checked = 0
+            self.resets += 1
+
+    def get(self, rpc, account_id):
+        """
+        `rpc_tx_fees(rpc, account_id)`, cached
+        """
+        with self.lock:
+            stamp, fees = self.accounts.get(account_id, (0, None))
+            fresh = time.time() - stamp <= FEE_CACHE_TIMEOUT
+            # a quote newer than the last check needs none; a new one none at all
+            stale = fresh and time.time() - max(stamp, self.checked) >= (
+                FEE_PARAMETERS_CHECK
+            )
+        if fresh and not (stale and self.check(rpc)):
+            with self.lock:
+                self.stats["hits"] += 1
+            return fees
+        # quote outside the lock; one slow node should not stall other accounts
+        fees = rpc_tx_fees(rpc, account_id)
+        with self.lock:
+            self.stats["quotes"] += 1
+            self.accounts[account_id] = (time.time(), fees)
+        return fees
+
+    def fee(self, rpc, operation):
+        """
+        core asset fee for one [op_id, {operation}] priced locally from the schedule
+        """
+        if not self.schedule:
+            self.check(rpc, force=True)
+        op_id, data = operation
+        params = self.schedule[op_id]
+        if op_id == 10:  # asset create; priced by symbol length
+            symbol = len(data["symbol"])
+            core_fee = params[{3: "symbol3", 4: "symbol4"}.get(symbol, "long_symbol")]
+        else:
+            core_fee = params.get("fee", 0)
+        core_fee = int(core_fee)
+        if params.get("price_per_kbyte"):
+            core_fee += data_size(op_id, data) * int(params["price_per_kbyte"]) // 1024
+        return core_fee * self.scale // FULL_SCALE
+
+
+def data_size(op_id, data):
+    """
+    bytes billed per kilobyte; the memo of a transfer or issue, a whole asset create
+    """
+    if op_id == 10:
+        return len(bytes(Asset_create(dict(data))))
+    if data.get("memo"):
+        return len(bytes(Memo(dict(data["memo"]))))
+    return 0
+
+
+FEES = FeeSchedule()
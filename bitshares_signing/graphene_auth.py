@@ -27,14 +27,19 @@ BitShares ECDSA for Login, Buy, Sell, Cancel, Transfer, Issue, Reserve
 import time  # hexidecimal to binary text
 from multiprocessing import Process, Value  # convert back to PY variable
 
+from .authorities import AUTHORITIES
+from .balances import BALANCES, deltas
+from .broadcast import BROADCASTER
 from .build_transaction import build_transaction
 # GRAPHENE SIGNING MODULES
-from .config import ATTEMPTS, JOIN, NODES, PROCESS_TIMEOUT
+from .config import ATTEMPTS, CONFIRM_TIMEOUT, JOIN, NODES, PROCESS_TIMEOUT
+from .confirmations import CONFIRMATIONS, Confirmation
 from .graphene_signing import (PrivateKey, serialize_transaction,
                                sign_transaction, verify_transaction)
-from .rpc import (id_from_name, name_from_id, precision,
+from .open_orders import OPEN_ORDERS
+from .rpc import (id_from_name, name_from_id, precision, resolve_assets,
                   rpc_broadcast_transaction, rpc_get_account,
-                  rpc_key_reference, rpc_open_orders, wss_handshake)
+                  rpc_key_reference, wss_handshake)
 from .utilities import it, trace
 
 # ISO8601 timeformat; 'graphene time'
@@ -60,6 +65,8 @@ def prototype_order(info, nodes=None, rpc=None):
                 - `account_id`: The ID of the issuer's account.
                 - `account_name`: The issuer's public account name.
                 - `wif`: The issuer's private key in Wallet Import Format (WIF).
+                         Or a list of them; each transaction is signed by the
+                         fewest the accounts' active authorities require.
 
     nodes (list, optional): A list of nodes to associate with the order. If
                             not provided, defaults to `NODES`.
@@ -74,29 +81,44 @@ def prototype_order(info, nodes=None, rpc=None):
         rpc = wss_handshake()
     if nodes is None:
         nodes = NODES
+    asset_name = info.get("asset_name", "BTS")
+    currency_name = info.get("currency_name", "HONEST.USD")
+    # resolve both assets in one round trip; dict.get() would evaluate its
+    # default, and so query the node, even when the id was given
+    resolve_assets(
+        rpc,
+        ids=[info[key] for key in ("asset_id", "currency_id") if key in info],
+        symbols=[
+            name
+            for key, name in (("asset_id", asset_name), ("currency_id", currency_name))
+            if key not in info
+        ],
+    )
     header = {
-        "asset_id": info.get(
-            "asset_id", id_from_name(rpc, info.get("asset_name", "BTS"))
-        ),
-        "currency_id": info.get(
-            "currency_id", id_from_name(rpc, info.get("currency_name", "HONEST.USD"))
-        ),
+        "asset_id": info["asset_id"]
+        if "asset_id" in info
+        else id_from_name(rpc, asset_name),
+        "currency_id": info["currency_id"]
+        if "currency_id" in info
+        else id_from_name(rpc, currency_name),
     }
     header.update(
         {
-            "asset_name": info.get("asset_name", name_from_id(rpc, header["asset_id"])),
-            "currency_name": info.get(
-                "currency_name", name_from_id(rpc, header["currency_id"])
-            ),
+            "asset_name": info["asset_name"]
+            if "asset_name" in info
+            else name_from_id(rpc, header["asset_id"]),
+            "currency_name": info["currency_name"]
+            if "currency_name" in info
+            else name_from_id(rpc, header["currency_id"]),
         }
     )
     header.update(
         {
             "asset_precision": precision(rpc, header["asset_id"]),
             "currency_precision": precision(rpc, header["currency_id"]),
-            "account_id": info.get(
-                "account_id", rpc_get_account(rpc, info["account_name"])["id"]
-            ),
+            "account_id": info["account_id"]
+            if "account_id" in info
+            else rpc_get_account(rpc, info["account_name"])["id"],
             "account_name": info["account_name"],
             "wif": info["wif"],
         }
@@ -130,7 +152,7 @@ def reserve(info, amount):
 
 
 # Main process
-def broker(order, broadcast=True):
+def broker(order, broadcast=True, session=None):
     """
     Executes an authenticated operation (one of SUPPORTED_OPS) with robust error handling.
 
@@ -143,6 +165,9 @@ def broker(order, broadcast=True):
     Parameters:
     order (dict): A dictionary containing the details of the order to execute.
                   See prototype_order for more documentation.
+    session (BrokerSession, optional): run the order in-process on the warm
+                  connection and caches of a long-lived `BrokerSession` instead of
+                  spawning a new process and websocket for this one order.
 
     Returns:
     None
@@ -153,6 +178,8 @@ def broker(order, broadcast=True):
     - If the operation still fails to execute within the timeout, it will be aborted.
     - After successful execution, the signal is set to 0 to indicate the process is complete.
     """
+    if session is not None:
+        return session.broker(order, broadcast)
     if "client_order_id" not in order["header"]:
         order["header"]["client_order_id"] = int(time.time() * 1e3)
     signal = Value("i", 0)
@@ -173,29 +200,84 @@ def broker(order, broadcast=True):
 
 def execute(signal, auth, order, broadcast):
     """
-    #
+    child process target; one fresh websocket per attempt
+    """
+    rpc = wss_handshake()
+    auth.value = int(authenticate(rpc, order, broadcast))
+    signal.value = 1
+
+
+def authenticate(rpc, order, broadcast, session=None, attempt=None):
     """
+    build, serialize, sign, verify and broadcast the order on the given connection
+
+    when a `BrokerSession` is given its cached fees, block reference and decoded
+    keys are used instead of fetching / decoding them again for this order; an
+    `Attempt` the session gave up on is not broadcast
 
-    def transact(rpc, order, auth):
-        trx = build_transaction(rpc, order)
+    :return bool(): True if the order was authenticated
+    """
+    auth = False
+    # inclusion of the last transaction broadcast with confirm=True
+    confirmation = None
+
+    def transact(rpc, order, confirm=False):
+        nonlocal auth, confirmation
+        confirmation = None
+        # header data the session may already hold; an empty dict means "fetch it"
+        cached = session.prefetch(rpc, order) if session is not None else {}
+        trx = build_transaction(rpc, order, **cached)
         # if there are any orders, perform ecdsa on serialized transaction
         if trx == -1:
             msg = it("red", "CURRENCY NOT PROVIDED")
         elif trx["operations"]:
+            # what the operations spend; before serializing, which modifies them
+            change = deltas(trx["operations"]) if BALANCES.feed is not None else {}
+            # a list of wifs is narrowed to the fewest the authorities require
+            keys = (
+                wif
+                if isinstance(wif, str)
+                else AUTHORITIES.keys(rpc, trx["operations"], wif)
+            )
             trx, message = serialize_transaction(rpc, trx)
-            signed_tx = sign_transaction(trx, message, wif)
+            signed_tx = sign_transaction(trx, message, keys)
             if signed_tx is None:
                 msg = it("red", "FAILED TO AUTHENTICATE ORDER")
                 return msg
-            signed_tx = verify_transaction(signed_tx, wif)
+            signed_tx = verify_transaction(
+                signed_tx,
+                private_key(keys)
+                if isinstance(keys, str)
+                else [private_key(key) for key in keys],
+            )
             # don't actaully broadcast login op, signing it is enough
             if order["edicts"][0]["op"] != "login" and broadcast:
-                print(
-                    rpc_broadcast_transaction(
+                # the session timed out and may already be retrying the order
+                if attempt is not None and not attempt.start_broadcast():
+                    return it("red", "ATTEMPT CANCELLED")
+                # the balance ledger releases its hold once the block is known
+                if (confirm or BALANCES.feed is not None) and CONFIRM_TIMEOUT:
+                    confirmation = confirm_broadcast(signed_tx)
+                if confirmation is not None:
+                    print(it("cyan", "BROADCAST, AWAITING BLOCK"))
+                    refused = confirmation.event.is_set() and not confirmation.included
+                    accepted = not refused
+                elif BROADCASTER.width > 1:
+                    # race the best ranked nodes; returns on the first acceptance
+                    report = BROADCASTER.broadcast(signed_tx)
+                    print(report)
+                    accepted = report.accepted
+                else:
+                    ret = rpc_broadcast_transaction(
                         rpc, signed_tx, order["header"]["client_order_id"]
                     )
-                )
-            auth.value = 1
+                    print(ret)
+                    accepted = not (isinstance(ret, dict) and "error" in ret)
+                if accepted:
+                    BALANCES.hold(
+                        order["header"]["account_name"], change, confirmation
+                    )
+            auth = True
             msg = it(
                 "green",
                 ("EXECUTED ORDER" if broadcast else "SIGNED AND VERIFIED ORDER"),
@@ -204,7 +286,21 @@ def execute(signal, auth, order, broadcast):
             msg = it("red", "REJECTED ORDER")
         return msg
 
-    rpc = wss_handshake()
+    def confirm_broadcast(signed_tx):
+        # broadcast with a callback for the block it lands in
+        try:
+            return CONFIRMATIONS.broadcast(signed_tx)
+        except RuntimeError as error:
+            print(error)  # refused by the chain; never included
+            refused = Confirmation()
+            refused.set(None)
+            return refused
+        except Exception:
+            return None  # no tracker connection; broadcast as usual
+
+    def private_key(wif):
+        # decoding a wif is costly; a session keeps the PrivateKey objects around
+        return session.private_key(wif) if session is not None else PrivateKey(wif)
 
     wif = order["header"]["wif"]
     start = time.time()
@@ -213,10 +309,10 @@ def execute(signal, auth, order, broadcast):
     if order["edicts"][0]["op"] == "login":
         msg = it("red", "LOGIN FAILED")
         try:
-            # instantitate a PrivateKey object
-            private_key = PrivateKey(wif)
+            # instantitate a PrivateKey object; the first of several wifs
+            key = private_key(wif if isinstance(wif, str) else wif[0])
             # which contains an Address object
-            address = private_key.address
+            address = key.address
             # which contains str(PREFIX) and a Base58(pubkey)
             # from these two, build a human terms "public key"
             public_key = address.prefix + str(address.pubkey)
@@ -228,45 +324,39 @@ def execute(signal, auth, order, broadcast):
             print("order account id", account_id)
             # if they match we're authenticated
             if account_id == key_reference_id:
-                auth.value = 1
+                auth = True
                 msg = it("green", "AUTHENTICATED")
         except Exception:
             pass
     else:
         try:
-            if (  # cancel all
-                order["edicts"][0]["op"] == "cancel"
-                and "1.7.X" in order["edicts"][0]["ids"]
-            ):
+            if order["edicts"][0]["op"] == "cancel":  # cancel all or cancel some
                 msg = it("red", "NO OPEN ORDERS")
-                open_orders = True
-                while open_orders:
-                    open_orders = rpc_open_orders(
-                        rpc, order["header"]["account_name"], order["header"]
-                    )
-                    ids = order["edicts"][0]["ids"] = open_orders
-                    if ids:
-                        msg = transact(rpc, order, auth)
-                    time.sleep(5)  # a block and a half
-            elif (  # cancel some
-                order["edicts"][0]["op"] == "cancel"
-                and "1.7.X" not in order["edicts"][0]["ids"]
-            ):
-                msg = it("red", "NO OPEN ORDERS")
-                open_orders = True
-                while open_orders:
-                    open_orders = rpc_open_orders(
-                        rpc, order["header"]["account_name"], order["header"]
-                    )
+                requested = order["edicts"][0]["ids"]
+                # included cancels; a lagging node may still list them
+                cancelled = set()
+                while True:
+                    open_orders = [
+                        i
+                        for i in OPEN_ORDERS.get(
+                            rpc, order["header"]["account_name"], order["header"]
+                        )
+                        if i not in cancelled
+                    ]
                     ids = order["edicts"][0]["ids"] = [
-                        i for i in open_orders if i in order["edicts"][0]["ids"]
+                        i for i in open_orders if "1.7.X" in requested or i in requested
                     ]
-                    if ids:
-                        msg = transact(rpc, order, auth)
-                    time.sleep(5)  # a block and a half
+                    if not ids:
+                        break
+                    msg = transact(rpc, order, confirm=True)
+                    # wait for the block rather than a fixed sleep
+                    if confirmation is not None and confirmation.wait(CONFIRM_TIMEOUT):
+                        cancelled.update(ids)
+                    else:
+                        time.sleep(5)  # a block and a half
 
             else:  # all other order types
-                msg = transact(rpc, order, auth)
+                msg = transact(rpc, order)
 
         except Exception as error:
             trace(error)
@@ -276,4 +366,4 @@ def execute(signal, auth, order, broadcast):
     print(stars + "\n    " + msg + "\n" + stars)
     print("\n")
     print("process elapsed: %.3f sec" % (time.time() - start), "\n\n")
-    signal.value = 1
+    return auth
@@ -24,10 +24,16 @@ Graphene types and signing function required to authenticate operation being bro
 # STANDARD PYTHON MODULES
 from binascii import hexlify  # binary text to hexidecimal
 from binascii import unhexlify  # hexidecimal to binary text
+from concurrent.futures import ProcessPoolExecutor  # sign_many() workers
+from itertools import repeat
+from multiprocessing import get_context
+from os.path import commonprefix  # where a cross check mismatch starts
 from hashlib import sha256  # message digest algorithm
 from json import dumps as json_dumps  # serialize object to string
 from json import loads as json_loads  # deserialize string to object
 from struct import pack  # convert to string representation of C struct
+from struct import pack_into  # pack into a preallocated buffer
+from threading import Lock, Thread, local  # background cross check, signing buffers
 
 # THIRD PARTY MODULES
 from secp256k1 import PrivateKey as secp256k1_PrivateKey  # class
@@ -35,9 +41,12 @@ from secp256k1 import PublicKey as secp256k1_PublicKey  # class
 from secp256k1 import ffi as secp256k1_ffi  # compiled ffi object
 from secp256k1 import lib as secp256k1_lib  # library
 
-from .base58 import PrivateKey, PublicKey
+from . import golden_vectors
+from .base58 import PrivateKey, PublicKey, gph_base58_check_encode
 # GRAPHENE SIGNING MODULES
-from .config import ID, PREFIX
+from .config import (ID, PREFIX, SERIALIZATION_CHECK,
+                     SERIALIZATION_CHECK_BACKGROUND, SIGN_POOL_MIN,
+                     SIGN_PROCESSES)
 # if there was ever a use for "import *"...
 from .operations import (Asset_claim_pool, Asset_create, Asset_issue,
                          Asset_publish_feed, Asset_reserve,
@@ -46,7 +55,8 @@ from .operations import (Asset_claim_pool, Asset_create, Asset_issue,
                          Limit_order_create, Liquidity_pool_create,
                          Liquidity_pool_deposit, Liquidity_pool_exchange,
                          Transfer, Liquidity_pool_update, Liquidity_pool_delete)
-from .rpc import rpc_get_transaction_hex
+from .rpc import rpc_get_transaction_hex, wss_handshake
+from .serializers import ENCODERS, epoch, write_varint
 from .types import Array, Id, PointInTime, Signature, Uint16, Uint32, varint
 from .utilities import from_iso_date, it
 
@@ -54,6 +64,13 @@ from .utilities import from_iso_date, it
 ALL_FLAGS = (
     secp256k1_lib.SECP256K1_CONTEXT_VERIFY | secp256k1_lib.SECP256K1_CONTEXT_SIGN
 )
+# initial serialize_buffer() bytes; grown if a transaction needs more
+BUFFER_HEADER = 32
+BUFFER_PER_OPERATION = 96
+# the chain id prefix of every message to sign, decoded once
+CHAIN_ID = unhexlify(ID)
+# serialization cross check counters
+CROSS_CHECKS = {"serialized": 0, "checked": 0, "failed": 0}
 
 
 class Operation:  # refactored  litepresence2019
@@ -62,6 +79,25 @@ class Operation:  # refactored  litepresence2019
     "class Operation(GPHOperation):"
     # Bitshares(MIT) bitsharesbase/objects.py
 
+    # Define a mapping of operation codes to their corresponding classes
+    operation_map = {
+        0: Transfer,
+        1: Limit_order_create,
+        2: Limit_order_cancel,
+        3: Call_order_update,
+        10: Asset_create,
+        13: Asset_update_feed_producers,
+        14: Asset_issue,
+        15: Asset_reserve,
+        19: Asset_publish_feed,
+        47: Asset_claim_pool,
+        59: Liquidity_pool_create,
+        60: Liquidity_pool_delete,
+        61: Liquidity_pool_deposit,
+        63: Liquidity_pool_exchange,
+        75: Liquidity_pool_update,
+    }
+
     def __init__(self, op):
         if not isinstance(op, list):
             raise ValueError("expecting op to be a list")
@@ -72,28 +108,9 @@ class Operation:  # refactored  litepresence2019
 
         self.opId = op[0]
 
-        # Define a mapping of operation codes to their corresponding classes
-        operation_map = {
-            0: Transfer,
-            1: Limit_order_create,
-            2: Limit_order_cancel,
-            3: Call_order_update,
-            10: Asset_create,
-            13: Asset_update_feed_producers,
-            14: Asset_issue,
-            15: Asset_reserve,
-            19: Asset_publish_feed,
-            47: Asset_claim_pool,
-            59: Liquidity_pool_create,
-            60: Liquidity_pool_delete,
-            61: Liquidity_pool_deposit,
-            63: Liquidity_pool_exchange,
-            75: Liquidity_pool_update,
-        }
-
         # Use the mapping to set self.op
-        if op[0] in operation_map:
-            self.op = operation_map[op[0]](op[1])
+        if op[0] in self.operation_map:
+            self.op = self.operation_map[op[0]](op[1])
         else:
             raise ValueError(f"Invalid operation code: {op[0]}")
 
@@ -178,7 +195,7 @@ class SignedTransaction(GrapheneObject):  # merged litepresence2019
         # Get message to sign
         #   bytes(self) will give the wire formated data according to
         #   GrapheneObject and the data given in __init__()
-        self.message = unhexlify(ID) + bytes(self)
+        self.message = CHAIN_ID + bytes(self)
         self.digest = sha256(self.message).digest()
         # restore signatures
         self.data["signatures"] = sigs
@@ -235,6 +252,14 @@ class SignedTransaction(GrapheneObject):  # merged litepresence2019
 
 # SERIALIZATION
 def serialize_transaction(rpc, trx):
+    """
+    serialize the transaction and prepend the chain id to create the message to sign
+
+    every `SERIALIZATION_CHECK`th transaction is cross checked against the node's
+    `get_transaction_hex`, in the background if `SERIALIZATION_CHECK_BACKGROUND`;
+    one holding an operation without an independent golden vector is always
+    checked, and waited for; after any mismatch, so is every transaction
+    """
     if trx["operations"] == []:
         return trx, b""
     # gist.github.com/xeroc/9bda11add796b603d83eb4b41d38532b
@@ -243,10 +268,97 @@ def serialize_transaction(rpc, trx):
     for idx, _ in enumerate(tx_ops):
         if "memo" in tx_ops[idx][1].keys() and tx_ops[idx][1]["memo"] == "":
             tx_ops[idx][1] = {k: v for k, v in tx_ops[idx][1].items() if k != "memo"}
-    rpc_tx = dict(trx)
-    rpc_tx["operations"] = tx_ops
-    # find out how the backend suggests to serialize the trx
-    rpc_tx_hex = rpc_get_transaction_hex(rpc, json_loads(json_dumps(rpc_tx)))
+    # sample 1 in N transactions for a remote cross check
+    CROSS_CHECKS["serialized"] += 1
+    unpinned = any(op[0] not in golden_vectors.INDEPENDENT for op in tx_ops)
+    # a failed check, eg. in the background after its transaction was broadcast,
+    # means the local serializer is not to be trusted on its own any more
+    distrusted = unpinned or CROSS_CHECKS["failed"]
+    check = SERIALIZATION_CHECK and (
+        distrusted or not (CROSS_CHECKS["serialized"] - 1) % SERIALIZATION_CHECK
+    )
+    background = SERIALIZATION_CHECK_BACKGROUND and not distrusted
+    if check:
+        # copy before serializing; the operation classes modify their kwargs
+        rpc_tx = json_loads(json_dumps(dict(trx, operations=tx_ops)))
+    buf = serialize_buffer(trx)
+    # prepend the chain ID to the buffer to create final serialized msg
+    message = CHAIN_ID + buf
+    if check and background:
+        # on a new connection; the websocket in hand belongs to the caller
+        Thread(target=cross_check, args=(None, rpc_tx, buf), daemon=True).start()
+    elif check:
+        cross_check(rpc, rpc_tx, buf)
+    return trx, message
+
+
+def cross_check(rpc, rpc_tx, buf):
+    """
+    compare the manually serialized buffer to how the backend serializes the trx
+
+    :param rpc: websocket connection, or None to open (and close) a new one
+    :raise RuntimeError: if the serializations do not match
+    """
+    close = rpc is None
+    if close:
+        rpc = wss_handshake()
+    try:
+        # find out how the backend suggests to serialize the trx
+        rpc_tx_hex = rpc_get_transaction_hex(rpc, rpc_tx)
+    finally:
+        if close:
+            rpc.close()
+    # this the final manual transaction hex, which should match rpc
+    manual_tx_hex = hexlify(buf)
+    CROSS_CHECKS["checked"] += 1
+    # if serialization is correct: rpc_tx_hex = manual_tx_hex plus an empty signature
+    if rpc_tx_hex != manual_tx_hex + b"00":
+        CROSS_CHECKS["failed"] += 1
+        manual_tx_hex += b"00"
+        # the first byte that differs
+        at = len(commonprefix([rpc_tx_hex or b"", manual_tx_hex])) // 2
+        print(it("red", "SERIALIZATION CROSS CHECK FAILED"), "at byte", at)
+        print("RPC:    ", rpc_tx_hex)
+        print("Manual: ", manual_tx_hex)
+        print("Trx:    ", json_dumps(rpc_tx))
+        print(it("red", "every later transaction is cross checked before signing"))
+        raise RuntimeError("Serialization Failed")
+
+
+def serialize_buffer(trx):
+    """
+    manually serialize the unsigned transaction, without the chain id prefix
+
+    every operation is written by its compiled encoder from serializers.py into
+    one bytearray, sized for the usual operation and grown only when needed
+    """
+    operations = trx["operations"]
+    buf = bytearray(BUFFER_HEADER + BUFFER_PER_OPERATION * len(operations))
+    # block number, prefix, and trx expiration
+    pack_into(
+        "<HII",
+        buf,
+        0,
+        trx["ref_block_num"],
+        trx["ref_block_prefix"],
+        epoch(trx["expiration"]),
+    )
+    pos = write_varint(buf, 10, len(operations))
+    for op_id, operation in operations:
+        if op_id not in ENCODERS:
+            raise ValueError(f"Invalid operation code: {op_id}")
+        pos = write_varint(buf, pos, op_id)
+        pos = ENCODERS[op_id](operation, buf, pos)
+    # length of the (empty) extensions list; effectively varint(0)
+    pos = write_varint(buf, pos, len(trx["extensions"]))
+    return bytes(memoryview(buf)[:pos])
+
+
+def serialize_objects(trx):
+    """
+    serialize_buffer() with the operation classes; the reference the compiled
+    serializers are held to
+    """
     buf = b""  # create an empty byte string buffer
     # add block number, prefix, and trx expiration to the buffer
     buf += pack("<H", trx["ref_block_num"])  # 2 byte int
@@ -267,7 +379,6 @@ def serialize_transaction(rpc, trx):
             buf += bytes(Limit_order_cancel(op[1]))
         elif op[0] == 3:
             buf += bytes(Call_order_update(op[1]))
-            buf += bytes(varint(0))
         elif op[0] == 10:
             buf += bytes(Asset_create(op[1]))
         elif op[0] == 13:
@@ -292,19 +403,200 @@ def serialize_transaction(rpc, trx):
             buf += bytes(Liquidity_pool_update(op[1]))
     # add legth of (empty) extensions list to buffer
     buf += bytes(varint(len(trx["extensions"])))  # usually, effectively varint(0)
-    # this the final manual transaction hex, which should match rpc
-    manual_tx_hex = hexlify(buf)
-    # prepend the chain ID to the buffer to create final serialized msg
-    message = unhexlify(ID) + buf
-    # if serialization is correct: rpc_tx_hex = manual_tx_hex plus an empty signature
-    if rpc_tx_hex != manual_tx_hex + b"00":
-        print("RPC:    ", rpc_tx_hex)
-        print("Manual: ", manual_tx_hex + b"00")
-        raise RuntimeError("Serialization Failed")
-    return trx, message
+    return buf
+
+
+def canonical(sig):
+    """
+    1 in 4 signatures are randomly canonical; "normal form"
+    using the other three causes vulnerability to maleability attacks
+    as a metaphor; "require reduced fractions in simplest terms"
+    note: 0x80 hex = 10000000 binary = 128 integer
+    :param sig: 64 compact bytes; bytes, bytearray or an ffi "unsigned char[64]"
+    :return bool():
+    """
+    return not (
+        sig[0] & 0x80
+        or sig[32] & 0x80
+        or (sig[0] == 0 and not sig[1] & 0x80)
+        or (sig[32] == 0 and not sig[33] & 0x80)
+    )
+
 
+class Signer:
+    """
+    ECDSA signer holding one libsecp256k1 context and the decoded private key of
+    every wif it has signed with
+
+    creating a context builds its precomputation tables, which costs far more than
+    the signature itself; one `SIGNER` is created per process and reused
 
-def sign_transaction(trx, message, wif):
+    the ffi structs of the canonical search are allocated once per thread and
+    reused; `stats` and `attempts` count the attempts each signature took
+    """
+
+    def __init__(self):
+        self.ctx = secp256k1_lib.secp256k1_context_create(ALL_FLAGS)
+        # {wif: secp256k1_PrivateKey}
+        self.keys = {}
+        # ffi structs of each signing thread; the context itself is read only
+        self.local = local()
+        # guards the counters only
+        self.lock = Lock()
+        self.stats = {"signatures": 0, "attempts": 0, "most": 0}
+        # {attempts: signatures that took that many}
+        self.attempts = {}
+
+    def private_key(self, wif):
+        """
+        obtain compiled/binary private key from the wif; once per wif
+        """
+        if wif not in self.keys:
+            # begin with the 8 bit string representation of private key
+            self.keys[wif] = secp256k1_PrivateKey(
+                bytes(PrivateKey(wif)), raw=True, ctx=self.ctx
+            )
+        return self.keys[wif]
+
+    def buffers(self):
+        """
+        (ndata, sig, compact, recid) ffi structs of the calling thread
+        """
+        try:
+            return self.local.buffers
+        except AttributeError:
+            self.local.buffers = (
+                secp256k1_ffi.new("int[8]"),
+                secp256k1_ffi.new("secp256k1_ecdsa_recoverable_signature *"),
+                secp256k1_ffi.new("unsigned char[64]"),
+                secp256k1_ffi.new("int *"),
+            )
+            return self.local.buffers
+
+    def public_key(self, wif, prefix=PREFIX):
+        """
+        the public key of a wif, eg. "BTS6MRy..."
+        """
+        compressed = self.private_key(wif).pubkey.serialize(compressed=True)
+        return prefix + gph_base58_check_encode(compressed.hex())
+
+    def sign(self, digest, wif):
+        """
+        deterministic canonical recoverable signature of a 32 byte digest
+
+        :return (int, bytes): compact recovery parameter, 64 byte signature
+        """
+        privkey = self.private_key(wif).private_key
+        # arbitrary data used by the nonce generation; the rfc6979 nonce function
+        # reads 32 bytes of it, so it must be 32 zeroed bytes, not one int
+        ndata, sig, compact, recid = self.buffers()
+        ndata[0] = 0  # it adds "\0x00", then "\0x00\0x00", etc..
+        attempts = 0
+        while True:  # repeat process until deterministic and cannonical
+            ndata[0] += 1  # increment the arbitrary nonce
+            attempts += 1
+            # a new recoverable 65 byte ECDSA signature, into the same struct
+            # returns: 1 = deterministic; 0 = not deterministic
+            if not secp256k1_lib.secp256k1_ecdsa_sign_recoverable(
+                self.ctx,  # initialized context object
+                sig,  # struct where signature is held
+                digest,  # 32-byte message hash being signed
+                privkey,  # 32-byte secret key
+                secp256k1_ffi.NULL,  # default nonce function
+                ndata,  # incrementing nonce data
+            ):
+                continue
+            # the compact 64 bytes and the recovery parameter, which links the
+            # signature to a single unique public key
+            secp256k1_lib.secp256k1_ecdsa_recoverable_signature_serialize_compact(
+                self.ctx, compact, recid, sig
+            )
+            # we ensure that the signature is canonical; simplest/reduced form
+            if canonical(compact):
+                break
+        with self.lock:
+            self.stats["signatures"] += 1
+            self.stats["attempts"] += attempts
+            self.stats["most"] = max(self.stats["most"], attempts)
+            self.attempts[attempts] = self.attempts.get(attempts, 0) + 1
+        # add 4 and 27 to stay compatible with other protocols; compressed, compact
+        return recid[0] + 4 + 27, secp256k1_ffi.buffer(compact, 64)[:]
+
+
+# one signing context per process
+SIGNER = Signer()
+
+
+def sign_digests(digests, wif, signer=None):
+    """
+    `Signer.sign()` of each digest; None where it failed
+
+    also the `SIGN_POOL` worker, with the SIGNER of the worker's process
+    """
+    signer = SIGNER if signer is None else signer
+    signatures = []
+    for digest in digests:
+        try:
+            signatures.append(signer.sign(digest, wif))
+        except Exception:
+            signatures.append(None)
+    return signatures
+
+
+class SignerPool:
+    """
+    worker processes for large `sign_many()` batches; started on first use
+
+    spawned rather than forked, the caller may hold sockets and threads; each
+    worker creates its own context and decodes the wif once
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.executor = None
+        self.processes = 0
+
+    def start(self, processes):
+        with self.lock:
+            if self.executor is None or self.processes != processes:
+                if self.executor is not None:
+                    self.executor.shutdown(wait=False)
+                self.executor = ProcessPoolExecutor(
+                    max_workers=processes, mp_context=get_context("spawn")
+                )
+                self.processes = processes
+            return self.executor
+
+    def sign(self, digests, wif, processes):
+        """
+        one contiguous chunk of digests per worker; results in order
+        """
+        executor = self.start(processes)
+        size = -(-len(digests) // processes)
+        chunks = [digests[idx : idx + size] for idx in range(0, len(digests), size)]
+        signatures = []
+        for chunk in executor.map(sign_digests, chunks, repeat(wif)):
+            signatures.extend(chunk)
+        return signatures
+
+    def close(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+            self.executor = None
+
+
+SIGN_POOL = SignerPool()
+
+
+def compact(i, signature):
+    """
+    hex of the recovery parameter byte and the 64 byte signature
+    """
+    return hexlify(pack("<B", i) + signature).decode("ascii")
+
+
+def sign_transaction(trx, message, wif, signer=None):
     """
     # graphenebase/ecdsa.py
     # tools.ietf.org/html/rfc6979
@@ -315,25 +607,7 @@ def sign_transaction(trx, message, wif):
     # but can be more easily implemented
     # since they do not need high-quality randomness
     """
-
-    def canonical(sig):
-        """
-        1 in 4 signatures are randomly canonical; "normal form"
-        using the other three causes vulnerability to maleability attacks
-        as a metaphor; "require reduced fractions in simplest terms"
-        note: 0x80 hex = 10000000 binary = 128 integer
-        :return bool():
-        """
-        sig = bytearray(sig)
-        return not any(
-            [
-                int(sig[0]) & 0x80,
-                int(sig[32]) & 0x80,
-                sig[0] == 0 and not int(sig[1]) & 0x80,
-                sig[32] == 0 and not int(sig[33]) & 0x80,
-            ]
-        )
-
+    signer = SIGNER if signer is None else signer
     # create fixed length representation of arbitrary length data
     # this will thoroughly obfuscate and compress the transaction
     # signing large data is computationally expensive and time consuming
@@ -345,56 +619,50 @@ def sign_transaction(trx, message, wif):
     # this is where the real hocus pocus lies
     # all of the ordering, typing, serializing, and digesting
     # culminates with the message meeting the wif
-    # begin with the 8 bit string representation of private key
+    # several wifs, eg. from `AUTHORITIES.keys()`, all sign the one digest
+    wifs = [wif] if isinstance(wif, str) else list(wif)
     try:
-        private_key = bytes(PrivateKey(wif))
-    except:
+        signatures = [signer.sign(digest, key) for key in wifs]
+    except Exception:
         return
-    # create some arbitrary data used by the nonce generation
-    ndata = secp256k1_ffi.new("const int *ndata")
-    ndata[0] = 0  # it adds "\0x00", then "\0x00\0x00", etc..
-    while True:  # repeat process until deterministic and cannonical
-        ndata[0] += 1  # increment the arbitrary nonce
-        # obtain compiled/binary private key from the wif
-        privkey = secp256k1_PrivateKey(private_key, raw=True)
-        # create a new recoverable 65 byte ECDSA signature
-        sig = secp256k1_ffi.new("secp256k1_ecdsa_recoverable_signature *")
-        # parse a compact ECDSA signature (64 bytes + recovery id)
-        # returns: 1 = deterministic; 0 = not deterministic
-        deterministic = secp256k1_lib.secp256k1_ecdsa_sign_recoverable(
-            privkey.ctx,  # initialized context object
-            sig,  # array where signature is held
-            digest,  # 32-byte message hash being signed
-            privkey.private_key,  # 32-byte secret key
-            secp256k1_ffi.NULL,  # default nonce function
-            ndata,  # incrementing nonce data
-        )
-        if not deterministic:
-            continue
-        # we derive the recovery parameter
-        # which simplifies the verification of the signature
-        # it links the signature to a single unique public key
-        # without this parameter, the back-end would need to test
-        # for multiple public keys instead of just one
-        signature, i = privkey.ecdsa_recoverable_serialize(sig)
-        # we ensure that the signature is canonical; simplest/reduced form
-        if canonical(signature):
-            # add 4 and 27 to stay compatible with other protocols
-            i += 4  # compressed
-            i += 27  # compact
-            # and have now obtained our signature
-            break
     # having derived a valid canonical signature
     # we format it in its hexadecimal representation
     # and add it our transactions signatures
     # note that we do not only add the signature
     # but also the recover parameter
     # this kind of signature is then called "compact signature"
-    signature = hexlify(pack("<B", i) + signature).decode("ascii")
-    trx["signatures"].append(signature)
+    for i, signature in signatures:
+        trx["signatures"].append(compact(i, signature))
     return trx
 
 
+def sign_many(
+    serialized, wif, signer=None, processes=SIGN_PROCESSES, pool_min=SIGN_POOL_MIN
+):
+    """
+    sign_transaction() of many independent transactions with one wif
+
+    one decoded key and context for the lot; a batch of at least pool_min is
+    spread over `processes` workers of `SIGN_POOL`
+
+    :param list(serialized): [(trx, message), ...] as from serialize_transaction
+    :return list(): the signed trx of each, in order; None where signing failed
+    """
+    digests = [sha256(message).digest() for _, message in serialized]
+    if processes > 1 and len(digests) >= pool_min:
+        signatures = SIGN_POOL.sign(digests, wif, processes)
+    else:
+        signatures = sign_digests(digests, wif, signer)
+    signed = []
+    for (trx, _), signature in zip(serialized, signatures):
+        if signature is None:
+            signed.append(None)
+            continue
+        trx["signatures"].append(compact(*signature))
+        signed.append(trx)
+    return signed
+
+
 def verify_transaction(trx, wif):
     """
     # gist.github.com/xeroc/9bda11add796b603d83eb4b41d38532b
@@ -403,7 +671,13 @@ def verify_transaction(trx, wif):
     """
     tx2 = SignedTransaction(**trx)
     tx2.derive_digest(PREFIX)
-    pubkeys = [PrivateKey(wif).pubkey]
+    # a PrivateKey that was already decoded (ie. cached by a BrokerSession) may be given
+    # or a list of either, one per signature
+    wifs = wif if isinstance(wif, (list, tuple)) else [wif]
+    pubkeys = [
+        (key if isinstance(key, PrivateKey) else PrivateKey(key)).pubkey
+        for key in wifs
+    ]
     tx2.verify(pubkeys, PREFIX)
     return trx
 
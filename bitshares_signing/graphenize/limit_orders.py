@@ -1,8 +1,9 @@
 import itertools
 
 # GRAPHENE SIGNING MODULES
+from ..balances import BALANCES
 from ..config import AUTOSCALE, CORE_FEES, DUST, KILL_OR_FILL
-from ..rpc import rpc_balances, rpc_open_orders
+from ..open_orders import OPEN_ORDERS
 from ..utilities import it, to_iso_date
 
 # MAX is 4294967295; year 2106 due to 32 bit unsigned integer
@@ -65,13 +66,21 @@ def graphenize_limit_orders(
 
 
 def scale_limit_orders(
-    rpc, order, asset_id, currency_id, account_name, buy_edicts, sell_edicts
+    rpc,
+    order,
+    asset_id,
+    currency_id,
+    account_name,
+    buy_edicts,
+    sell_edicts,
+    balances=None,
 ):
     """
-    Scale order size to funds on hand
+    Scale order size to funds on hand; balances are fetched unless prefetched
     """
     if AUTOSCALE or CORE_FEES:
-        balances = rpc_balances(rpc, account_name)
+        if balances is None:
+            balances = BALANCES.get(rpc, account_name)
         assets, currency, bitshares = (
             balances[order["header"]["asset_name"]],
             balances[order["header"]["currency_name"]],
@@ -173,17 +182,26 @@ def save_core_fees(buy_edicts, sell_edicts, bitshares, asset_id, currency_id):
 
 
 def graphenize_cancel(
-    rpc, cancel_edicts, fees, order, account_name, account_id, tx_operations
+    rpc,
+    cancel_edicts,
+    fees,
+    order,
+    account_name,
+    account_id,
+    tx_operations,
+    open_orders=None,
 ):
     """
-    Translate cancel orders to graphene
+    Translate cancel orders to graphene; open orders are fetched unless prefetched
     """
     for edict in cancel_edicts:
         if "ids" not in edict.keys():
             edict["ids"] = ["1.7.X"]
         if "1.7.X" in edict["ids"]:  # the "cancel all" signal
             # for cancel all op, we collect all open orders in 1 market
-            edict["ids"] = rpc_open_orders(rpc, account_name, order["header"])
+            if open_orders is None:
+                open_orders = OPEN_ORDERS.get(rpc, account_name, order["header"])
+            edict["ids"] = list(open_orders)
             print(it("yellow", str(edict)))
         for order_id in edict["ids"]:
             # confirm it is good 1.7.x format:
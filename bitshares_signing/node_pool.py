@@ -0,0 +1,303 @@
+r"""
+node_pool.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Latency ranked pool of the public api nodes in `config.NODES`
+
+Every node is scored, lower is better, on
+
+    handshake seconds + rolling query seconds
+    + error rate * HANDSHAKE_TIMEOUT
+    + head block lag behind the best node * BLOCK_INTERVAL
+
+where the rolling figures are exponential moving averages fed by parallel probes
+and by every `wss_query()`.  `connect()` hands out a connection to the best node
+that handshakes within `HANDSHAKE_TIMEOUT`.  The scoreboard is saved to
+`pipe/nodes.json` so a new process starts on the best known node at once, and it
+is reprobed in the background every `NODE_PROBE_INTERVAL` seconds by the main
+process; child processes, eg. of `broker()`, rank on their own queries only.
+Without a scoreboard the first node to answer is used while the ranking is made.
+When every node fails, rounds are retried after a growing pause.
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except
+
+# STANDARD PYTHON MODULES
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from multiprocessing import parent_process
+from threading import RLock, Thread
+
+# THIRD PARTY MODULES
+from websocket import create_connection as wss  # handshake to node
+
+# GRAPHENE SIGNING MODULES
+from .config import HANDSHAKE_TIMEOUT, NODE_PROBE_INTERVAL, NODES, PATH
+
+# seconds per block
+BLOCK_INTERVAL = 3
+# weight of the newest sample in the moving averages
+ALPHA = 0.3
+# longest pause, in seconds, between rounds of connecting when every node failed
+RETRY_BACKOFF = 30
+# rounds of trying every node before a connection is given up
+CONNECT_ROUNDS = 5
+
+
+class NodePool:
+    """
+    lock protected scoreboard {node: {"handshake", "latency", "errors", "head"}}
+
+    :param list(nodes): the node list to rank, by reference; default `NODES`
+    :param str(path): scoreboard json, None to keep it in memory only
+    """
+
+    def __init__(self, nodes=None, path=None):
+        self.nodes = NODES if nodes is None else nodes
+        self.path = path
+        self.lock = RLock()
+        self.scores = {}
+        # unix of the last full probe
+        self.probed = 0
+        self.probing = False
+        self.load()
+
+    def load(self):
+        """
+        read the scoreboard of a previous run
+        """
+        try:
+            with open(self.path, "r") as handle:
+                board = json.load(handle)
+            with self.lock:
+                self.scores.update(board["scores"])
+                self.probed = board["probed"]
+        except Exception:
+            pass
+
+    def save(self):
+        """
+        atomically replace the scoreboard
+        """
+        if self.path is None:
+            return
+        with self.lock:
+            board = json.dumps({"scores": self.scores, "probed": self.probed})
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp = "%s.%d" % (self.path, os.getpid())
+            with open(temp, "w") as handle:
+                handle.write(board)
+            os.replace(temp, self.path)
+        except OSError:
+            pass  # read only install; memory only
+
+    def record(self, node, handshake=None, latency=None, error=False, head=None):
+        """
+        fold one observation of a node into its moving averages
+        """
+        with self.lock:
+            score = self.scores.setdefault(
+                node, {"handshake": None, "latency": None, "errors": 0.0, "head": 0}
+            )
+            for key, value in (("handshake", handshake), ("latency", latency)):
+                if value is not None:
+                    # the first sample seeds the average
+                    score[key] = (
+                        value
+                        if score[key] is None
+                        else score[key] + ALPHA * (value - score[key])
+                    )
+            score["errors"] += ALPHA * (float(error) - score["errors"])
+            if head is not None:
+                score["head"] = head
+
+    def score(self, node):
+        """
+        expected seconds to a useful answer from node; lower is better
+        """
+        with self.lock:
+            score = self.scores.get(node)
+            if score is None:
+                # never seen; behind every healthy node, ahead of broken ones
+                return 2 * HANDSHAKE_TIMEOUT
+            best_head = max(
+                self.scores.get(peer, {}).get("head", 0) for peer in self.nodes
+            )
+            # an unknown head, 0, is not counted as lag
+            lag = best_head - score["head"] if score["head"] else 0
+            handshake = score["handshake"]
+            return (
+                (HANDSHAKE_TIMEOUT if handshake is None else handshake)
+                + (score["latency"] or 0.0)
+                + score["errors"] * HANDSHAKE_TIMEOUT
+                + max(0, lag) * BLOCK_INTERVAL
+            )
+
+    def ranked(self):
+        """
+        :return list(): the current `NODES`, best first
+        """
+        return sorted(self.nodes[:], key=self.score)
+
+    def probe(self, node):
+        """
+        handshake with node and time one `get_dynamic_global_properties`
+        """
+        rpc = None
+        try:
+            start = time.time()
+            rpc = wss(node, timeout=HANDSHAKE_TIMEOUT)
+            handshake = time.time() - start
+            start = time.time()
+            rpc.send(
+                json.dumps(
+                    {
+                        "method": "call",
+                        "params": ["database", "get_dynamic_global_properties", []],
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                    }
+                )
+            )
+            head = json.loads(rpc.recv())["result"]["head_block_number"]
+            self.record(node, handshake, time.time() - start, head=head)
+        except Exception:
+            self.record(node, error=True)
+        finally:
+            try:
+                rpc.close()
+            except Exception:
+                pass
+
+    def probe_all(self):
+        """
+        probe every node in parallel, then save the scoreboard
+        """
+        nodes = self.nodes[:]
+        if nodes:
+            with ThreadPoolExecutor(len(nodes)) as pool:
+                list(pool.map(self.probe, nodes))
+        with self.lock:
+            self.probed = time.time()
+            self.probing = False
+        self.save()
+
+    def refresh(self):
+        """
+        reprobe in a background thread when the scoreboard is stale; main process only
+        """
+        if parent_process() is not None:
+            return
+        with self.lock:
+            if self.probing or time.time() - self.probed < NODE_PROBE_INTERVAL:
+                return
+            self.probing = True
+        Thread(target=self.probe_all, daemon=True).start()
+
+    def handshake(self, node):
+        """
+        :return: a connection to node within `HANDSHAKE_TIMEOUT`, else None
+        """
+        try:
+            start = time.time()
+            rpc = wss(node, timeout=HANDSHAKE_TIMEOUT)
+            handshake = time.time() - start
+        except Exception:
+            self.record(node, error=True)
+            return None
+        self.record(node, handshake=handshake)
+        if handshake > HANDSHAKE_TIMEOUT:
+            rpc.close()
+            return None
+        # so wss_query can attribute latency and errors
+        rpc.node = node
+        return rpc
+
+    def race(self, nodes):
+        """
+        handshake with every node at once
+
+        :return: the first connection made, None if none was; the others are closed
+        """
+        if not nodes:
+            return None
+        pool = ThreadPoolExecutor(len(nodes))
+        futures = [pool.submit(self.handshake, node) for node in nodes]
+        winner = None
+        try:
+            for future in as_completed(futures):
+                winner = future.result()
+                if winner is not None:
+                    break
+        finally:
+            pool.shutdown(wait=False)
+
+        def close(future):
+            rpc = future.result()
+            if rpc is not None and rpc is not winner:
+                rpc.close()
+
+        for future in futures:
+            future.add_done_callback(close)
+        return winner
+
+    def connect(self, exclude=(), timeout=None):
+        """
+        :param exclude: nodes not to connect to, eg. those at a connection limit
+        :param float(timeout): seconds to keep trying, else `CONNECT_ROUNDS` rounds
+        :raise ConnectionError: when every node is excluded, or none answered in time
+        :return: a websocket-client connection to the best healthy node
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self.lock:
+            cold = not any(node in self.scores for node in self.nodes)
+        self.refresh()
+        if not [node for node in self.nodes[:] if node not in exclude]:
+            raise ConnectionError("Every node is excluded")
+        if cold:
+            # first run without a scoreboard; the first to answer, ranked meanwhile
+            rpc = self.race([node for node in self.nodes[:] if node not in exclude])
+            if rpc is not None:
+                return rpc
+        pause = 1
+        for attempt in itertools.count():
+            if attempt:
+                if deadline is None and attempt >= CONNECT_ROUNDS:
+                    break
+                # every node failed; the failures already reranked them
+                wait = pause if deadline is None else min(pause, deadline - time.time())
+                if wait <= 0:
+                    break
+                time.sleep(wait)
+                pause = min(2 * pause, RETRY_BACKOFF)
+            for node in self.ranked():
+                if node in exclude:
+                    continue
+                if deadline is not None and time.time() >= deadline:
+                    break
+                rpc = self.handshake(node)
+                if rpc is not None:
+                    return rpc
+        raise ConnectionError("No node answered")
+
+
+NODE_POOL = NodePool(path=os.path.join(PATH, "pipe", "nodes.json"))
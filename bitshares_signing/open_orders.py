@@ -0,0 +1,214 @@
+r"""
+open_orders.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Process-wide index of open limit orders per account and market
+
+`rpc_open_orders()` downloads a whole `get_full_accounts` payload for a few order
+ids.  Once `OPEN_ORDERS` follows the subscription feed, each account is seeded with
+`get_limit_orders_by_account` on first use and kept current from the feed's limit
+order notices; a lookup is then a dict read:
+
+    OPEN_ORDERS.follow(FEED)
+    OPEN_ORDERS.get(rpc, "account-name", order["header"])  # ids, as rpc_open_orders
+
+Notices that arrive while an account is being seeded are replayed over the seed,
+and a feed drop, after which notices may have been missed, drops every account to
+be seeded again once the feed is back.  Without a feed, or while it is down,
+`get()` is `rpc_open_orders()`.
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except
+
+# STANDARD PYTHON MODULES
+from threading import RLock
+
+# GRAPHENE SIGNING MODULES
+from .rpc import rpc_account_id, rpc_open_orders, wss_query
+
+# most orders per get_limit_orders_by_account page
+PAGE = 101
+
+
+def market(order):
+    """
+    the unordered asset id pair a limit order trades
+    """
+    price = order["sell_price"]
+    return frozenset((price["base"]["asset_id"], price["quote"]["asset_id"]))
+
+
+class OpenOrdersIndex:
+    """
+    lock protected {account_name: {market: {order_id: order}}}
+    """
+
+    def __init__(self):
+        self.lock = RLock()
+        self.accounts = {}
+        # {account_id: account_name}, {order_id: (account_name, market)}
+        self.names = {}
+        self.owners = {}
+        # {account_name: [notices received while seeding]}
+        self.seeding = {}
+        self.feed = None
+        # feed resets so far; a seed that straddles one is stale
+        self.resets = 0
+        self.stats = {"hits": 0, "seeds": 0, "updates": 0, "fallbacks": 0}
+
+    def follow(self, feed):
+        """
+        keep seeded accounts current from a `SubscriptionFeed`
+        """
+        self.feed = feed
+        feed.listen("object", self.changed)
+        feed.listen("reset", self.reset)
+
+    @property
+    def live(self):
+        """
+        True while the feed is connected; until then the index may be stale
+        """
+        return self.feed is not None and self.feed.socket.ready.is_set()
+
+    def seed(self, rpc, account_name):
+        """
+        every open order of one account, by market
+        """
+        with self.lock:
+            self.seeding[account_name] = []
+            resets = self.resets
+        try:
+            # subscribe before the snapshot; nothing between the two is missed
+            self.feed.watch_accounts([account_name])
+            account_id = str(rpc_account_id(rpc, account_name))
+            orders = self.snapshot(rpc, account_name, account_id)
+        except Exception:
+            with self.lock:
+                self.seeding.pop(account_name, None)
+            raise
+        with self.lock:
+            notices = self.seeding.pop(account_name, [])
+            if resets != self.resets:
+                return
+            self.names[account_id] = account_name
+            self.accounts[account_name] = {}
+            for order in orders:
+                self.upsert(account_name, order)
+            for object_id, obj in notices:
+                self.apply(object_id, obj)
+            self.stats["seeds"] += 1
+
+    def snapshot(self, rpc, account_name, account_id):
+        """
+        :return list(): every open limit order of the account
+        """
+        orders, start = [], None
+        try:
+            while True:
+                params = [account_id, PAGE, start]
+                page = wss_query(
+                    rpc, ["database", "get_limit_orders_by_account", params]
+                )
+                orders.extend(page)
+                if len(page) < PAGE:
+                    break
+                # the next page starts after the last order id
+                space, kind, instance = page[-1]["id"].split(".")
+                start = "%s.%s.%d" % (space, kind, int(instance) + 1)
+        except Exception:
+            # nodes older than get_limit_orders_by_account
+            ret = wss_query(
+                rpc, ["database", "get_full_accounts", [[account_name], "false"]]
+            )
+            orders = ret[0][1]["limit_orders"]
+        return orders
+
+    def upsert(self, account_name, order):
+        key = market(order)
+        self.accounts[account_name].setdefault(key, {})[order["id"]] = order
+        self.owners[order["id"]] = (account_name, key)
+
+    def remove(self, order_id):
+        account_name, key = self.owners.pop(order_id, (None, None))
+        if account_name in self.accounts:
+            self.accounts[account_name].get(key, {}).pop(order_id, None)
+
+    def apply(self, object_id, obj):
+        """
+        one limit order created, changed or removed
+        """
+        if obj is None:
+            self.remove(object_id)
+            return
+        account_name = self.names.get(obj.get("seller"))
+        if account_name in self.accounts:
+            self.upsert(account_name, obj)
+
+    def changed(self, object_id, obj):
+        """
+        feed listener; limit orders are 1.7.x
+        """
+        if not object_id.startswith("1.7."):
+            return
+        with self.lock:
+            for notices in self.seeding.values():
+                notices.append((object_id, obj))
+            self.apply(object_id, obj)
+            self.stats["updates"] += 1
+
+    def reset(self):
+        """
+        feed listener; notices may have been missed, seed again on next use
+        """
+        with self.lock:
+            self.accounts.clear()
+            self.owners.clear()
+            self.resets += 1
+
+    def order(self, order_id):
+        """
+        an indexed limit order by id, None if not seen
+        """
+        with self.lock:
+            account_name, key = self.owners.get(order_id, (None, None))
+            return self.accounts.get(account_name, {}).get(key, {}).get(order_id)
+
+    def get(self, rpc, account_name, pair):
+        """
+        `rpc_open_orders()`; a local read while following a live feed
+
+        :param dict(pair): with "asset_id" and "currency_id", eg. an order header
+        """
+        if self.live:
+            with self.lock:
+                seeded = account_name in self.accounts
+            if not seeded:
+                self.seed(rpc, account_name)
+            key = frozenset((pair["asset_id"], pair["currency_id"]))
+            with self.lock:
+                # None if the feed dropped meanwhile
+                markets = self.accounts.get(account_name)
+                if markets is not None:
+                    self.stats["hits"] += 1
+                    return list(markets.get(key, {}))
+        self.stats["fallbacks"] += 1
+        return rpc_open_orders(rpc, account_name, pair)
+
+
+OPEN_ORDERS = OpenOrdersIndex()
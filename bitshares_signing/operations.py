@@ -255,10 +255,8 @@ class CallOrderExtension(Extension):
 
     # FIXME this "should" have self as first arg but pybitshares does it like this
     def tcr(value):
-        if value:
-            return Uint16(value)
-        else:
-            return Optional(None)
+        # graphene packs a set option's value bare, 0 included, as the decoder reads
+        return Uint16(value)
 
     sorted_options = [("target_collateral_ratio", tcr)]
 
@@ -0,0 +1,177 @@
+r"""
+orderbook.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+NumPy price and volume arrays of one market's order book
+
+requires the optional `numpy` package; pip install bitshares-signing[numpy]
+
+    book = rpc_orderbook_arrays(rpc, "BTS", "HONEST.USD")
+    book.mid, book.spread
+    book.depth("asks")  # cumulative volume, best price first
+    book.vwap("bids", 1000)  # mean price selling 1000 into the bids
+
+A `get_order_book` response is parsed in bulk, one array per side, and every
+helper is an array expression; no Python loop runs per price level.
+
+`pool_books()` simulates the books of many constant product liquidity pools at
+once; one array expression of shape (pools, levels) per side.
+
+"""
+# STANDARD PYTHON MODULES
+from operator import itemgetter
+
+# THIRD PARTY MODULES
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# most levels per side get_order_book returns; the node's api limit
+ORDER_BOOK_LIMIT = 50
+
+SIDES = ("asks", "bids")
+
+
+class OrderBook:
+    """
+    {"asks", "bids"} float64 arrays of shape (levels, 2); price, volume
+
+    asks ascend and bids descend in price, as the node sends them
+
+    :param array(asks): price, volume rows
+    :param array(bids): price, volume rows
+    """
+
+    def __init__(self, asks, bids):
+        if np is None:
+            raise ImportError("Missing dependency: numpy")
+        self.sides = {
+            "asks": np.asarray(asks, dtype=np.float64).reshape(-1, 2),
+            "bids": np.asarray(bids, dtype=np.float64).reshape(-1, 2),
+        }
+
+    @classmethod
+    def parse(cls, order_book, divisor=1):
+        """
+        :param dict(order_book): a get_order_book response
+        :param int(divisor): of every "quote" volume, eg. 10 ** precision
+        """
+        if np is None:
+            raise ImportError("Missing dependency: numpy")
+        sides = {}
+        for side in SIDES:
+            levels = order_book[side]
+            # numpy parses the decimal strings; one conversion per side
+            rows = np.array(
+                list(map(itemgetter("price", "quote"), levels)), dtype=np.float64
+            ).reshape(-1, 2)
+            if not rows[:, 0].all():
+                raise ValueError("zero price in %s" % side)
+            rows[:, 1] /= divisor
+            sides[side] = rows
+        return cls(sides["asks"], sides["bids"])
+
+    def prices(self, side):
+        return self.sides[side][:, 0]
+
+    def volumes(self, side):
+        return self.sides[side][:, 1]
+
+    @property
+    def best_ask(self):
+        asks = self.prices("asks")
+        return float(asks[0]) if asks.size else None
+
+    @property
+    def best_bid(self):
+        bids = self.prices("bids")
+        return float(bids[0]) if bids.size else None
+
+    @property
+    def mid(self):
+        if self.best_ask is None or self.best_bid is None:
+            return None
+        return (self.best_ask + self.best_bid) / 2
+
+    @property
+    def spread(self):
+        if self.best_ask is None or self.best_bid is None:
+            return None
+        return self.best_ask - self.best_bid
+
+    def depth(self, side):
+        """
+        cumulative volume from the best price outward
+        """
+        return np.cumsum(self.volumes(side))
+
+    def vwap(self, side, size):
+        """
+        mean price of taking size volume from one side, best price first
+
+        :return float(): nan when the side holds less than size
+        """
+        prices, volumes = self.prices(side), self.volumes(side)
+        depth = np.cumsum(volumes)
+        level = int(np.searchsorted(depth, size))
+        if size <= 0 or level >= depth.size:
+            return float("nan")
+        # whole levels before, then part of the last one
+        notional = float(np.dot(prices[:level], volumes[:level]))
+        filled = float(depth[level - 1]) if level else 0.0
+        return (notional + (size - filled) * float(prices[level])) / size
+
+    def as_lists(self):
+        """
+        {"asks": [(price, volume)], "bids": [...]}, as rpc_orderbook returns
+        """
+        return {
+            side: list(map(tuple, self.sides[side].tolist())) for side in SIDES
+        }
+
+
+def pool_books(pools, depth=100, maxvolume=None):
+    """
+    simulated books of constant product pools, every level of every pool at once
+
+    Taking delta_a of balance_a along x * y = k moves balance_b by
+    balance_b * delta_a / (balance_a +- delta_a), so the mean price of each
+    cumulative level has the closed form (balance_a +- delta_a) / balance_b; asks
+    ascend and bids descend in i without a sort.  The pool's taker fee is taken
+    from what the taker receives, so asks are divided and bids multiplied by
+    (1 - taker fee).  Bid levels the pool cannot pay, delta_a >= balance_a, are nan.
+
+    :param list(pools): (balance_a, balance_b, taker_fee) per pool; human amounts,
+        taker fee as a fraction
+    :param int(depth): levels per side
+    :param float(maxvolume): volume of asset a across all levels, else balance_a
+    :return (array, array): asks, bids; shape (pools, depth, 2), price and volume
+    """
+    if np is None:
+        raise ImportError("Missing dependency: numpy")
+    pools = np.asarray(pools, dtype=np.float64).reshape(-1, 3)
+    balance_a, balance_b, keep = pools[:, :1], pools[:, 1:2], 1 - pools[:, 2:]
+    total = balance_a if maxvolume is None else np.full_like(balance_a, maxvolume)
+    step = total / (depth + 1)
+    delta_a = step * np.arange(1, depth + 1)
+    volume = np.broadcast_to(step, delta_a.shape)
+    asks = np.stack(((balance_a + delta_a) / balance_b / keep, volume), axis=-1)
+    bid_prices = (balance_a - delta_a) / balance_b * keep
+    bid_prices[delta_a >= balance_a] = np.nan
+    bids = np.stack((bid_prices, volume), axis=-1)
+    return asks, bids
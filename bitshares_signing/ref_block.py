@@ -0,0 +1,180 @@
+r"""
+ref_block.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Process-wide transaction reference block (TaPoS)
+
+A transaction references any of the last 2^16 blocks by `ref_block_num` and
+`ref_block_prefix`, so there is no need to ask a node for one per transaction.
+
+    REF_BLOCK.start()  # optional background refresher on its own websocket
+    block = REF_BLOCK.get(rpc)  # instant while fresh
+
+The background refresher hands out the last irreversible block, which no fork can
+remove, every `BLOCK_CACHE_TIMEOUT` seconds.  Without it, or should it fall behind,
+`get()` fetches the head block on the caller's connection, exactly as
+`rpc_block_number()` always did; a provider that `follow()`s the subscription feed
+is handed the head block as each block is applied instead.  A block is only handed
+out while a transaction expiring `TX_EXPIRATION` seconds from now still lands
+inside its TaPoS window.
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except
+
+# STANDARD PYTHON MODULES
+import time
+from threading import Event, Lock, Thread
+
+# GRAPHENE SIGNING MODULES
+from .config import BLOCK_CACHE_TIMEOUT, REF_BLOCK_MAX_AGE, TX_EXPIRATION
+from .rpc import rpc_block_number, wss_handshake, wss_query
+
+# seconds per block
+BLOCK_INTERVAL = 3
+# ref_block_num is 16 bits; the oldest referable block, in seconds
+TAPOS_WINDOW = 0xFFFF * BLOCK_INTERVAL
+
+
+class RefBlockProvider:
+    """
+    lock protected reference block with an optional refresher thread
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        # (unix, {"head_block_number", "head_block_id"}, irreversible)
+        self.block = (0, None, False)
+        self.thread = None
+        self.halt = Event()
+        self.stats = {"hits": 0, "fetches": 0, "refreshes": 0, "errors": 0}
+
+    def max_age(self, irreversible):
+        """
+        seconds a block may be handed out for; a head block could still be
+        orphaned, so it is only kept as long as the refresh interval
+        """
+        if not irreversible:
+            return BLOCK_CACHE_TIMEOUT
+        return min(REF_BLOCK_MAX_AGE, TAPOS_WINDOW - TX_EXPIRATION)
+
+    def get(self, rpc):
+        """
+        a fresh reference block, else the head block fetched on rpc
+        """
+        with self.lock:
+            stamp, block, irreversible = self.block
+            if block is not None and time.time() - stamp < self.max_age(irreversible):
+                self.stats["hits"] += 1
+                return block
+        block = rpc_block_number(rpc)
+        with self.lock:
+            self.stats["fetches"] += 1
+            # do not replace a block the refresher stored meanwhile
+            if self.block[0] <= stamp:
+                self.block = (time.time(), block, False)
+        return block
+
+    def irreversible(self, rpc):
+        """
+        the last irreversible block in `rpc_block_number` format; head on failure
+
+        :return (dict(), bool()): the block and whether it is irreversible
+        """
+        dgp = rpc_block_number(rpc)
+        try:
+            number = dgp["last_irreversible_block_num"]
+            block = wss_query(rpc, ["database", "get_block", [number]])
+            block = {"head_block_number": number, "head_block_id": block["block_id"]}
+            return block, True
+        except Exception:
+            return dgp, False
+
+    def refresh(self, rpc):
+        """
+        store the last irreversible block
+        """
+        block, irreversible = self.irreversible(rpc)
+        with self.lock:
+            self.block = (time.time(), block, irreversible)
+            self.stats["refreshes"] += 1
+        return block
+
+    def follow(self, feed):
+        """
+        keep the head block from a `SubscriptionFeed`; no fetch while it flows
+        """
+        feed.watch_objects(["2.1.0"])
+        feed.listen("object", self.changed)
+
+    def changed(self, object_id, obj):
+        """
+        the dynamic global properties of each new block
+        """
+        if object_id != "2.1.0" or obj is None:
+            return
+        with self.lock:
+            stamp, _, irreversible = self.block
+            # an irreversible block is preferred while it may be handed out
+            if irreversible and time.time() - stamp < self.max_age(True):
+                return
+            self.block = (time.time(), obj, False)
+            self.stats["refreshes"] += 1
+
+    def invalidate(self):
+        """
+        forget the block, eg. when it came from a node that turned out faulty
+        """
+        with self.lock:
+            self.block = (0, None, False)
+
+    def start(self):
+        """
+        refresh every `BLOCK_CACHE_TIMEOUT` seconds in a daemon thread
+        """
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return self
+            self.halt.clear()
+            self.thread = Thread(target=self.run, daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.halt.set()
+
+    def run(self):
+        """
+        the refresher; owns its websocket, a websocket-client is not thread safe
+        """
+        rpc = None
+        while not self.halt.is_set():
+            try:
+                if rpc is None:
+                    rpc = wss_handshake()
+                self.refresh(rpc)
+            except Exception:
+                self.stats["errors"] += 1
+                rpc = wss_handshake(rpc)
+            self.halt.wait(BLOCK_CACHE_TIMEOUT)
+        try:
+            rpc.close()
+        except Exception:
+            pass
+
+
+REF_BLOCK = RefBlockProvider()
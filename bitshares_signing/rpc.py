@@ -24,72 +24,80 @@ Collection of functions that interact with BitShares nodes using a WebSocket con
 
 # STANDARD PYTHON MODULES
 import json
-import os
 import time
-from random import shuffle
 
 # THIRD PARTY MODULES
-from websocket import create_connection as wss  # handshake to node
 from websocket._exceptions import WebSocketConnectionClosedException
 
 # GRAPHENE SIGNING MODULES
-from .config import HANDSHAKE_TIMEOUT, NODES, PATH
-from .utilities import read_file, trace, write_file
+from .cache import METADATA
+from .node_pool import NODE_POOL
+from .orderbook import ORDER_BOOK_LIMIT, OrderBook, pool_books
+from .utilities import from_iso_date, trace
 
 
 def wss_handshake(rpc=None):
     """
-    create a wss handshake in less than X seconds, else try again
+    create a wss handshake in less than X seconds with the best ranked node
     """
-    shuffle(NODES)
-    handshake = HANDSHAKE_TIMEOUT + 1
-    while handshake > HANDSHAKE_TIMEOUT:
-        try:
-            try:
-                if rpc is not None:
-                    rpc.close()  # attempt to close open stale connection
-            except Exception:
-                pass
-            start = time.time()
-            NODES.append(NODES.pop(0))  # rotate list
-            node = NODES[0]
-            rpc = wss(node, timeout=HANDSHAKE_TIMEOUT)
-            handshake = time.time() - start
-        except Exception:
-            continue
-    return rpc
+    try:
+        if rpc is not None:
+            rpc.close()  # attempt to close open stale connection
+    except Exception:
+        pass
+    return NODE_POOL.connect()
+
+
+def wss_call(rpc, params, client_order_id=1):
+    """
+    one attempt of a remote procedure call on one websocket-client connection
+    """
+    # print(it('purple','RPC ' + params[0])('cyan',params[1]))
+    # this is the 4 part format of EVERY rpc request
+    # params format is ["location", "object", []]
+    query = json.dumps(
+        {
+            "method": "call",
+            "params": params,
+            "jsonrpc": "2.0",
+            "id": client_order_id,
+        }
+    )
+    # print(query)
+    # rpc is the rpc connection created by wss_handshake()
+    # we will use this connection to send query and receive json
+    start = time.time()
+    try:
+        rpc.send(query)
+        ret = json.loads(rpc.recv())
+    except Exception:
+        if hasattr(rpc, "node"):
+            NODE_POOL.record(rpc.node, error=True)
+        raise
+    # feed the node pool's rolling latency
+    if hasattr(rpc, "node"):
+        NODE_POOL.record(rpc.node, latency=time.time() - start)
+    try:
+        ret = ret["result"]  # if there is result key take it
+    except Exception:
+        pass
+    # print(ret)
+    # print('elapsed %.3f sec' % (time.time() - start))
+    return ret
 
 
 def wss_query(rpc, params, client_order_id=1):
     """
     this definition will place all remote procedure calls (RPC)
     """
+    # connection pools and multiplexed connections, eg. ConnectionPool or
+    # rpc_async.RPC, tag and route their own queries
+    if hasattr(rpc, "query"):
+        return rpc.query(params, client_order_id)
 
     for _ in range(10):
         try:
-            # print(it('purple','RPC ' + params[0])('cyan',params[1]))
-            # this is the 4 part format of EVERY rpc request
-            # params format is ["location", "object", []]
-            query = json.dumps(
-                {
-                    "method": "call",
-                    "params": params,
-                    "jsonrpc": "2.0",
-                    "id": client_order_id,
-                }
-            )
-            # print(query)
-            # rpc is the rpc connection created by wss_handshake()
-            # we will use this connection to send query and receive json
-            rpc.send(query)
-            ret = json.loads(rpc.recv())
-            try:
-                ret = ret["result"]  # if there is result key take it
-            except Exception:
-                pass
-            # print(ret)
-            # print('elapsed %.3f sec' % (time.time() - start))
-            return ret
+            return wss_call(rpc, params, client_order_id)
         except WebSocketConnectionClosedException:
             raise RuntimeError("Websocket Closed")
         except Exception as error:
@@ -126,61 +134,55 @@ def rpc_get_account(rpc, account_name):
     return ret
 
 
-def rpc_tx_fees(rpc, account_id):
-    # returns fee for limit order create and cancel without 10^precision
+# operations we quote fees for; (op id, fee key)
+TX_FEE_OPS = [
+    (0, "transfer"),  # transfer funds
+    (1, "create"),  # create a limit order
+    (2, "cancel"),  # cancel a limit order
+    (3, "call"),  # update a call order
+    (10, "asset_create"),  # create an asset
+    (13, "add_producer"),  # add a feed producer
+    (14, "issue"),  # issue a UIA
+    (15, "reserve"),  # reserve a UIA
+    (19, "publish"),  # publish a price feed
+    (47, "fee_pool"),
+    (59, "pool_create"),  # create liquidity pool
+    (60, "pool_delete"),  # delete liquidity pool
+    (61, "pool_deposit"),  # deposit to liquidity pool
+    (63, "swap"),  # exchange via liquidity pool
+    (75, "pool_update"),  # update liquidity pool
+]
 
-    query = [
+
+def tx_fees_params(account_id):
+    """
+    get_required_fees params for every operation in TX_FEE_OPS
+    """
+    return [
         "database",
         "get_required_fees",
         [
-            [
-                [str(op_id), {"from": str(account_id)}]
-                for op_id in [
-                    0,  # transfer funds
-                    1,  # create a limit order
-                    2,  # cancel a limit order
-                    3,  # update a call order
-                    10,  # create an asset
-                    13,  # add a feed producer
-                    14,  # issue a UIA
-                    15,  # reserve a UIA
-                    19,  # publish a price feed
-                    47,
-                    59,  # create liquidity pool
-                    60,  # delete liquidity pool
-                    61,  # deposit to liquidity pool
-                    63,  # exchange via liquidity pool
-                    75,  # update liquidity pool
-                ]
-            ],
+            [[str(op_id), {"from": str(account_id)}] for op_id, _ in TX_FEE_OPS],
             "1.3.0",
         ],
     ]
-    ret = wss_query(rpc, query)
-    keys = [
-        "transfer",
-        "create",
-        "cancel",
-        "call",
-        "asset_create",
-        "add_producer",
-        "issue",
-        "reserve",
-        "publish",
-        "fee_pool",
-        "pool_create",
-        "pool_delete",
-        "pool_deposit",
-        "swap",
-        "pool_update",
-    ]
 
-    final_ret = {key: ret[i]["amount"] for i, key in enumerate(keys)}
+
+def rpc_tx_fees(rpc, account_id):
+    # returns fee for limit order create and cancel without 10^precision
+    ret = wss_query(rpc, tx_fees_params(account_id))
+    final_ret = {key: ret[i]["amount"] for i, (_, key) in enumerate(TX_FEE_OPS)}
     return final_ret
 
 
 def rpc_ticker(rpc, asset, currency):
-    ticker = wss_query(rpc, ["database", "get_ticker", [asset, currency]])
+    return ticker_quote(wss_query(rpc, ["database", "get_ticker", [asset, currency]]))
+
+
+def ticker_quote(ticker):
+    """
+    :return dict(): base, quote, last, bid and ask of a get_ticker response
+    """
     ret = {}
     ret["base"] = ticker["base"]
     ret["quote"] = ticker["quote"]
@@ -200,102 +202,146 @@ def rpc_orderbook(rpc, asset, currency, depth=3):
     :RPC param int(limit): depth of the order book to retrieve (max limit 50)
     :RPC returns: Order book of the market
     """
-    asset_precision = precision(rpc, id_from_name(rpc, asset))
+    order_book, divisor = order_book_query(rpc, asset, currency, depth)
+    return orderbook_levels(order_book, divisor)
+
+
+def orderbook_levels(order_book, divisor):
+    """
+    :return dict(): {"asks": [(price, volume), ...], "bids": ...} of a get_order_book
+    """
+    book = {}
+    try:
+        for side in ("asks", "bids"):
+            levels = [
+                (float(level["price"]), float(level["quote"]) / divisor)
+                for level in order_book[side]
+            ]
+            if any(price == 0 for price, _ in levels):
+                raise ValueError("zero price in %s" % side)
+            book[side] = levels
+    except:
+        print(order_book)
+        raise
+    return book
+
+
+def rpc_orderbook_arrays(rpc, asset, currency, depth=ORDER_BOOK_LIMIT):
+    """
+    `rpc_orderbook()` as an `OrderBook` of numpy arrays, to the node's limit
+
+    :return OrderBook(): with depth, vwap, mid and spread helpers
+    """
+    order_book, divisor = order_book_query(rpc, asset, currency, depth)
+    try:
+        return OrderBook.parse(order_book, divisor)
+    except ValueError:
+        print(order_book)
+        raise
+
+
+def order_book_query(rpc, asset, currency, depth):
+    """
+    :return (dict, int): get_order_book response, divisor of its "quote" volumes
+    """
+    # a symbol lookup also yields the precision
+    resolve_assets(rpc, symbols=[asset])
+    divisor = 10 ** int(precision(rpc, id_from_name(rpc, asset)))
     order_book = wss_query(
         rpc,
         [
             "database",
             "get_order_book",
-            [currency, asset, depth],
+            [currency, asset, min(int(depth), ORDER_BOOK_LIMIT)],
         ],
     )
-    asks = []
-    bids = []
-    try:
-        for i, _ in enumerate(order_book["asks"]):
-            price = float(order_book["asks"][i]["price"])
-            if float(price) == 0:
-                raise ValueError("zero price in asks")
-            volume = float(
-                float(order_book["asks"][i]["quote"]) / 10 ** int(asset_precision)
-            )
-            asks.append((price, volume))
-        for i, _ in enumerate(order_book["bids"]):
-            price = float(order_book["bids"][i]["price"])
-            if float(price) == 0:
-                raise ValueError("zero price in bids")
-            volume = float(
-                float(order_book["bids"][i]["quote"]) / 10 ** int(asset_precision)
-            )
-            bids.append((price, volume))
-    except:
-        print(order_book)
-        raise
-    return {"asks": asks, "bids": bids}
+    return order_book, divisor
 
 
-def rpc_pool_book(rpc, pool_id=None, pool_data=None, depth=100, maxvolume=None):
+def rpc_pool_book(
+    rpc, pool_id=None, pool_data=None, depth=100, maxvolume=None, fees=False
+):
     # async def gather_orderbook(self, pool_data, rpc, pair, req_params, ws):
     """
     Gather orderbook information either from the pool data or via RPC request
     Parameters:
         pool_data (dict): The data of the pool
         rpc (object): The rpc instance to be used to make the request
-        pair (str): The asset pair being queried
-        req_params (dict): The request parameters used gather the orderbook
+        depth (int): Price levels per side
+        maxvolume (float): Volume of asset a across all levels, else its balance
+        fees (bool): Take the pool's taker fee into the prices
 
     Returns:
-        data (dict): A dictionary containing the bid and ask orderbook information
-    """
-
-    def pool(x_start, y_start, delta_x):
-        """
-        x_start*y_start = k
-        x1 = x_start+delta_x
-        k / x1 = y1
-        y1-y_start = delta_y
-        """
-        return y_start - (x_start * y_start) / (x_start + delta_x)
+        data (dict): A dictionary containing the bid and ask orderbook information;
+            with fees also the pool's "taker_fee" and "withdrawal_fee" fractions
 
-    depth += 1
+    Prices along the x * y = k curve have a closed form, see
+    `orderbook.pool_books()`, which numpy evaluates for many pools at once.
+    """
     if pool_id is not None:
         pool_data = rpc_get_objects(rpc, pool_id)
     elif pool_data is None:
         raise ValueError("Must provide at least one of pool_id or pool_data")
 
-    balance_a = int(pool_data["balance_a"]) / 10 ** precision(rpc, pool_data["asset_a"])
-    balance_b = int(pool_data["balance_b"]) / 10 ** precision(rpc, pool_data["asset_b"])
-    konstant = balance_a * balance_b
-
-    # List to store the order book
-    bidp, bidv, askp, askv = [], [], [], []
-    step = (balance_a if maxvolume is None else maxvolume) / depth
-
-    for i in range(1, depth):
-        delta_a = i * step
-        balance_a2 = balance_a + delta_a
-        balance_b2 = konstant / balance_a2
-        delta_b = abs(balance_b - balance_b2)
-        price = delta_a / delta_b
-        # gain = step * price
-        askp.append(price)
-        askv.append(step)
-
-    for i in range(1, depth):
-        delta_a = i * step
-        balance_a2 = balance_a - delta_a
-        balance_b2 = konstant / balance_a2
-        delta_b = abs(balance_b - balance_b2)
-        price = delta_a / delta_b
-        # gain = step * price
-        bidp.append(price)
-        bidv.append(step)
-
-    # Sort the order book by price
-    asks = list(map(list, sorted(zip(askp, askv), reverse=False)))
-    bids = list(map(list, sorted(zip(bidp, bidv), reverse=True)))
-
-    return {"asks": asks, "bids": bids}
+    return pool_levels(pool_terms(rpc, pool_data), depth, maxvolume, fees)
+
+
+def pool_levels(terms, depth=100, maxvolume=None, fees=False):
+    """
+    `rpc_pool_book()` of the terms of one pool, as from `pool_terms()`
+    """
+    balance_a, balance_b, taker_fee, withdrawal_fee = terms
+    if not fees:
+        taker_fee = 0.0
+    keep = 1 - taker_fee
+    step = (balance_a if maxvolume is None else maxvolume) / (depth + 1)
+
+    # already sorted; asks ascend and bids descend with the level
+    asks = [
+        [(balance_a + i * step) / balance_b / keep, step] for i in range(1, depth + 1)
+    ]
+    bids = [
+        [(balance_a - i * step) / balance_b * keep, step]
+        for i in range(1, depth + 1)
+        if i * step < balance_a
+    ]
+    book = {"asks": asks, "bids": bids}
+    if fees:
+        book.update({"taker_fee": taker_fee, "withdrawal_fee": withdrawal_fee})
+    return book
+
+
+def rpc_pool_books(rpc, pool_ids, depth=100, maxvolume=None, fees=False):
+    """
+    the simulated books of many pools; one get_objects call, one numpy evaluation
+
+    requires the optional `numpy` package
+
+    :return dict(): {pool_id: (asks, bids)}, arrays as from `orderbook.pool_books()`
+    """
+    pools = wss_query(rpc, ["database", "get_objects", [list(pool_ids)]])
+    resolve_assets(
+        rpc, ids=[pool[key] for pool in pools for key in ("asset_a", "asset_b")]
+    )
+    terms = [pool_terms(rpc, pool) for pool in pools]
+    asks, bids = pool_books(
+        [(a, b, fee if fees else 0.0) for a, b, fee, _ in terms], depth, maxvolume
+    )
+    return {pool["id"]: (asks[idx], bids[idx]) for idx, pool in enumerate(pools)}
+
+
+def pool_terms(rpc, pool_data):
+    """
+    :return tuple(): balance a and b in human terms, taker and withdrawal fees as
+        fractions, from a liquidity pool object
+    """
+    return (
+        int(pool_data["balance_a"]) / 10 ** precision(rpc, pool_data["asset_a"]),
+        int(pool_data["balance_b"]) / 10 ** precision(rpc, pool_data["asset_b"]),
+        # in hundredths of a percent
+        int(pool_data.get("taker_fee_percent", 0)) / 10000,
+        int(pool_data.get("withdrawal_fee_percent", 0)) / 10000,
+    )
 
 
 def rpc_fill_order_history(rpc, account_id, asset, currency):
@@ -335,6 +381,7 @@ def rpc_fill_order_history(rpc, account_id, asset, currency):
         "amount": Decimal(),
     }
     """
+    resolve_assets(rpc, symbols=[asset, currency])
     iteration = 0
     rpc_fills = []
     while rpc_fills == []:
@@ -351,63 +398,86 @@ def rpc_fill_order_history(rpc, account_id, asset, currency):
         )
         # sort by user
         fills = [i for i in ret if i["op"]["account_id"] == account_id]
-        for fill in fills:
-            print(fill)
-            # base
-            base_id = fill["op"]["pays"]["asset_id"]
-            base_name = name_from_id(rpc, base_id)
-            base_precision = precision(rpc, base_id)
-            pays = float(fill["op"]["pays"]["amount"]) / 10**base_precision
-            # quote
-            quote_id = fill["op"]["receives"]["asset_id"]
-            quote_name = name_from_id(rpc, quote_id)
-            quote_precision = precision(rpc, quote_id)
-            receives = float(fill["op"]["receives"]["amount"]) / 10**quote_precision
-            # fee
-            fee = {"asset": quote_name, "amount": 0}
-            try:
-                fee_id = fill["op"]["fee"]["asset_id"]
-                fee_name = name_from_id(rpc, fee_id)
-                if fee_name not in [base_name, quote_name]:
-                    raise ValueError("fee outside of trading pair")
-                fee_precision = precision(rpc, fee_id)
-                fee_amount = float(fill["op"]["fee"]["amount"]) / 10**fee_precision
-                fee = {"asset": fee_name, "amount": fee_amount}
-            except Exception:
-                pass
-            # pair and order id
-            fill_trading_pair = base_name + "-" + quote_name
-            exchange_order_id = fill["op"]["order_id"]
+        # one round trip for every asset these fills refer to
+        resolve_assets(rpc, ids=fill_asset_ids(fills))
+        rpc_fills = fill_records(fills, asset, currency)
+    return rpc_fills
 
-            # Basic data; doesn't change with pair order
-            rpc_fills.append(
+
+def fill_asset_ids(fills):
+    """
+    every asset id a list of fill order history dicts refers to
+    """
+    return [
+        fill["op"][key]["asset_id"]
+        for fill in fills
+        for key in ("pays", "receives", "fee")
+        if key in fill["op"]
+    ]
+
+
+def fill_records(fills, asset, currency):
+    """
+    `rpc_fill_order_history()` records of fills whose assets are all resolved
+    """
+    rpc_fills = []
+    for fill in fills:
+        print(fill)
+        # base
+        base_id = fill["op"]["pays"]["asset_id"]
+        base_name = METADATA.get("symbol", base_id)
+        base_precision = METADATA.get("precision", base_id)
+        pays = float(fill["op"]["pays"]["amount"]) / 10**base_precision
+        # quote
+        quote_id = fill["op"]["receives"]["asset_id"]
+        quote_name = METADATA.get("symbol", quote_id)
+        quote_precision = METADATA.get("precision", quote_id)
+        receives = float(fill["op"]["receives"]["amount"]) / 10**quote_precision
+        # fee
+        fee = {"asset": quote_name, "amount": 0}
+        try:
+            fee_id = fill["op"]["fee"]["asset_id"]
+            fee_name = METADATA.get("symbol", fee_id)
+            if fee_name not in [base_name, quote_name]:
+                raise ValueError("fee outside of trading pair")
+            fee_precision = METADATA.get("precision", fee_id)
+            fee_amount = float(fill["op"]["fee"]["amount"]) / 10**fee_precision
+            fee = {"asset": fee_name, "amount": fee_amount}
+        except Exception:
+            pass
+        # pair and order id
+        fill_trading_pair = base_name + "-" + quote_name
+        exchange_order_id = fill["op"]["order_id"]
+
+        # Basic data; doesn't change with pair order
+        rpc_fills.append(
+            {
+                "exchange_order_id": str(exchange_order_id),
+                "unix": from_iso_date(fill["time"]),
+                "sequence": abs(fill["key"]["sequence"]),
+                "fee": fee,
+                "is_maker": fill["op"].get("is_maker", False),
+            }
+        )
+
+        # eg pays BTC receives USD in BTC-USD market; price = $50,000
+        if base_name == asset and quote_name == currency:
+            rpc_fills[-1].update(
                 {
-                    "exchange_order_id": str(exchange_order_id),
-                    "unix": from_iso_date(fill["time"]),
-                    "sequence": abs(fill["key"]["sequence"]),
-                    "fee": fee,
-                    "is_maker": fill["op"].get("is_maker", False),
+                    "price": float(receives / pays),
+                    "amount": float(pays),
+                    "type": "SELL",
+                }
+            )
+        # eg pays USD receives BTC in BTC-USD market; price = $50,000
+        elif base_name == currency and quote_name == asset:
+            rpc_fills[-1].update(
+                {
+                    "price": float(pays / receives),
+                    "amount": float(receives),
+                    "type": "BUY",
                 }
             )
-
-            # eg pays BTC receives USD in BTC-USD market; price = $50,000
-            if base_name == asset and quote_name == currency:
-                rpc_fills[-1].update(
-                    {
-                        "price": float(receives / pays),
-                        "amount": float(pays),
-                        "type": "SELL",
-                    }
-                )
-            # eg pays USD receives BTC in BTC-USD market; price = $50,000
-            elif base_name == currency and quote_name == asset:
-                rpc_fills[-1].update(
-                    {
-                        "price": float(pays / receives),
-                        "amount": float(receives),
-                        "type": "BUY",
-                    }
-                )
     return rpc_fills
 
 
@@ -424,6 +494,8 @@ def rpc_balances(rpc, account_name):
         ],
     )
 
+    # one round trip for every asset we have not seen before
+    resolve_assets(rpc, ids=[obj["asset_id"] for obj in balances])
     # convert from graphene to human-readable
     balances = {
         name_from_id(rpc, obj["asset_id"]): int(obj["amount"])
@@ -439,8 +511,15 @@ def rpc_open_orders(rpc, account_name, pair):
     return a list of open orders, for one account, in one market
     """
     ret = wss_query(rpc, ["database", "get_full_accounts", [[account_name], "false"]])
+    return open_order_ids(ret, pair)
+
+
+def open_order_ids(full_accounts, pair):
+    """
+    limit order ids in one market from a get_full_accounts response
+    """
     try:
-        limit_orders = ret[0][1]["limit_orders"]
+        limit_orders = full_accounts[0][1]["limit_orders"]
     except Exception:
         limit_orders = []
     market = [pair["currency_id"], pair["asset_id"]]
@@ -510,6 +589,46 @@ def rpc_lookup_asset_symbols(rpc, asset):  # DONE
     return wss_query(rpc, ["database", "lookup_asset_symbols", [asset]])
 
 
+def resolve_assets(rpc, ids=(), symbols=()):
+    """
+    Bulk resolve every asset not yet in the metadata cache.
+
+    All unknown ids go out in a single `get_objects` call and all unknown symbols
+    in a single `lookup_asset_symbols` call, instead of one round trip per asset.
+
+    Args:
+        rpc: RPC connection object
+        ids: Asset ids (1.3.x) a response refers to
+        symbols: Asset symbols (or ids given as names) a response refers to
+    """
+    # one counted lookup per asset; the other tables are written with precision
+    ids = sorted(
+        {
+            asset_id
+            for asset_id in ids
+            if METADATA.lookup("precision", asset_id) is None
+            or any(METADATA.get(table, asset_id) is None for table in ("symbol", "mpa"))
+        }
+    )
+    symbols = sorted(
+        {symbol for symbol in symbols if METADATA.lookup("id", symbol) is None}
+    )
+    if ids:
+        assets = wss_query(rpc, ["database", "get_objects", [ids]])
+        METADATA.remember_assets([asset for asset in assets if asset])
+    if symbols:
+        assets = rpc_lookup_asset_symbols(rpc, symbols)
+        METADATA.remember_assets([asset for asset in assets if asset])
+        # the node also resolves ids given as names; remember those as given
+        METADATA.update(
+            [
+                ("id", symbol, asset["id"])
+                for symbol, asset in zip(symbols, assets)
+                if asset
+            ]
+        )
+
+
 def precision(rpc, object_id):
     """
     Retrieve or fetch and store the precision value for a given object ID.
@@ -521,22 +640,11 @@ def precision(rpc, object_id):
     Returns:
         int: Precision value associated with the object
     """
-    # Attempt to load existing precision data from file
-    try:
-        precs = json.loads(read_file("precisions.txt"))
-    except (FileNotFoundError, json.JSONDecodeError):
-        precs = {}  # Initialize empty dict if file doesn't exist or is invalid
-
-    # Return cached precision if available
-    if object_id in precs:
-        return precs[object_id]
-
-    # Fetch precision from RPC and convert to integer
-    prec = int(rpc_get_objects(rpc, object_id)["precision"])
-    precs[object_id] = prec  # Cache the new precision value
-
-    # Save updated precision data to file
-    write_file(os.path.join(PATH, "pipe", "precisions.txt"), json.dumps(precs))
+    prec = METADATA.lookup("precision", object_id)
+    if prec is None:
+        # one fetch caches precision, symbol and MPA status alike
+        METADATA.remember_asset(rpc_get_objects(rpc, object_id))
+        prec = METADATA.get("precision", object_id)
     return prec
 
 
@@ -551,23 +659,14 @@ def id_from_name(rpc, object_name):
     Returns:
         str: Object ID corresponding to the name
     """
-    # Load existing name-to-ID mappings
-    try:
-        precs = json.loads(read_file(os.path.join(PATH, "pipe", "ids_to_names.txt")))
-    except (FileNotFoundError, json.JSONDecodeError):
-        precs = {}
-
-    # Return cached ID if available
-    if object_name in precs:
-        return precs[object_name]
-
-    # Fetch ID from RPC using the object name
-    prec = rpc_lookup_asset_symbols(rpc, object_name)[0]["id"]
-    precs[object_name] = prec  # Cache the result
-
-    # Save updated mappings to file
-    write_file(os.path.join(PATH, "pipe", "ids_to_names.txt"), json.dumps(precs))
-    return prec
+    object_id = METADATA.lookup("id", object_name)
+    if object_id is None:
+        asset = rpc_lookup_asset_symbols(rpc, object_name)[0]
+        METADATA.remember_asset(asset)
+        # the node also resolves ids given as names; remember those as given
+        METADATA.update([("id", object_name, asset["id"])])
+        object_id = asset["id"]
+    return object_id
 
 
 def name_from_id(rpc, obj_id, kind="asset"):
@@ -582,28 +681,16 @@ def name_from_id(rpc, obj_id, kind="asset"):
     Returns:
         str: Name or symbol of the object
     """
-    # Load existing ID-to-name mappings
-    try:
-        precs = json.loads(read_file(os.path.join(PATH, "pipe", "names_to_ids.txt")))
-    except (FileNotFoundError, json.JSONDecodeError):
-        precs = {}
-
-    # Create a unique key combining ID and kind
-    key = str((obj_id, kind))
-    if key in precs:
-        return precs[key]
-
-    # Fetch appropriate field based on object kind
-    if kind == "asset":
-        prec = rpc_get_objects(rpc, obj_id)["symbol"]  # Get asset symbol
-    else:
-        prec = rpc_get_objects(rpc, obj_id)["name"]  # Get object name
-
-    precs[key] = prec  # Cache the result
-
-    # Save updated mappings to file
-    write_file(os.path.join(PATH, "pipe", "names_to_ids.txt"), json.dumps(precs))
-    return prec
+    table = "symbol" if kind == "asset" else "name"
+    name = METADATA.lookup(table, obj_id)
+    if name is None:
+        obj = rpc_get_objects(rpc, obj_id)
+        if kind == "asset":
+            METADATA.remember_asset(obj)  # Get asset symbol
+        else:
+            METADATA.update([("name", obj_id, obj["name"])])  # Get object name
+        name = METADATA.get(table, obj_id)
+    return name
 
 
 def is_mpa(rpc, object_id):
@@ -616,23 +703,12 @@ def is_mpa(rpc, object_id):
     Returns:
         bool: True if object is an MPA, False otherwise
     """
-    # Load existing MPA status data
-    try:
-        precs = json.loads(read_file(os.path.join(PATH, "pipe", "mpas.txt")))
-    except (FileNotFoundError, json.JSONDecodeError):
-        precs = {}
-
-    # Return cached status if available
-    if object_id in precs:
-        return precs[object_id]
-
-    # Check if object has bitasset_data_id field to determine MPA status
-    prec = "bitasset_data_id" in rpc_get_objects(rpc, object_id)
-    precs[object_id] = prec  # Cache the result
-
-    # Save updated MPA status data to file
-    write_file(os.path.join(PATH, "pipe", "mpas.txt"), json.dumps(precs))
-    return prec
+    mpa = METADATA.lookup("mpa", object_id)
+    if mpa is None:
+        # Check if object has bitasset_data_id field to determine MPA status
+        METADATA.remember_asset(rpc_get_objects(rpc, object_id))
+        mpa = METADATA.get("mpa", object_id)
+    return mpa
 
 
 def unit_test():
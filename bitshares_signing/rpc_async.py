@@ -0,0 +1,452 @@
+r"""
+rpc_async.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+asyncio websocket client; many queries in flight on one socket, matched by json-rpc id
+
+    async with AsyncRPC() as rpc:
+        block, fees = await asyncio.gather(
+            rpc_block_number(rpc), rpc_tx_fees(rpc, "1.2.100")
+        )
+
+`RPC` is the synchronous facade; it runs an `AsyncRPC` on its own event loop thread
+and can be passed anywhere an `rpc` from `wss_handshake()` is expected.  It is safe
+to share between threads, each caller simply waits on its own json-rpc id.
+
+    rpc = RPC()
+    rpc_block_number(rpc)  # from rpc.py
+
+As with `wss_query`, a reply without a "result", eg. {"error": ...}, is returned
+whole rather than raised; a lost connection raises ConnectionError.
+
+requires the optional `websockets` package; pip install bitshares-signing[async]
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except
+
+# STANDARD PYTHON MODULES
+import asyncio
+import itertools
+import json
+import time
+from threading import Lock, Thread
+
+# THIRD PARTY MODULES
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+# GRAPHENE SIGNING MODULES
+from .cache import METADATA
+from .config import HANDSHAKE_TIMEOUT, PROCESS_TIMEOUT
+from .node_pool import CONNECT_ROUNDS, NODE_POOL, RETRY_BACKOFF
+from .orderbook import ORDER_BOOK_LIMIT
+from .rpc import (TX_FEE_OPS, fill_asset_ids, fill_records, open_order_ids,
+                  orderbook_levels, pool_levels, pool_terms, ticker_quote,
+                  tx_fees_params)
+
+
+class AsyncRPC:
+    """
+    one websocket; a reader task resolves each pending query by its json-rpc id and
+    hands subscription notices to the callback registered for their id
+
+    :param str(node): websocket url, tried first; else the best ranked node that answers
+    """
+
+    def __init__(self, node=None):
+        if websockets is None:
+            raise ImportError("Missing dependency: websockets")
+        self.node = node
+        self.wss = None
+        self.reader = None
+        self.ids = itertools.count(1)
+        # {json-rpc id: asyncio.Future}
+        self.pending = {}
+        # {subscription callback id: function(notice)}
+        self.notices = {}
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *_):
+        await self.close()
+
+    async def connect(self):
+        """
+        handshake with self.node, then the node pool's ranking, until one answers;
+        `CONNECT_ROUNDS` rounds with a growing pause between them, then ConnectionError
+        """
+        pause = 1
+        for attempt in range(CONNECT_ROUNDS):
+            if attempt:
+                # every node failed; the failures already reranked them
+                await asyncio.sleep(pause)
+                pause = min(2 * pause, RETRY_BACKOFF)
+            nodes = [self.node] if self.node else []
+            nodes += [node for node in NODE_POOL.ranked() if node != self.node]
+            for node in nodes:
+                try:
+                    self.wss = await websockets.connect(
+                        node,
+                        max_size=None,
+                        ping_interval=None,
+                        open_timeout=HANDSHAKE_TIMEOUT,
+                    )
+                except Exception:
+                    NODE_POOL.record(node, error=True)
+                    continue
+                self.node = node
+                self.reader = asyncio.ensure_future(self.read())
+                return self
+        raise ConnectionError("No node answered in %d rounds" % CONNECT_ROUNDS)
+
+    async def read(self):
+        """
+        route every incoming message until the socket closes
+        """
+        try:
+            async for message in self.wss:
+                message = json.loads(message)
+                if message.get("method") == "notice":
+                    callback_id, notice = message["params"]
+                    try:
+                        self.notices[callback_id](notice)
+                    except Exception:
+                        pass
+                    continue
+                future = self.pending.pop(message.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except Exception:
+            pass
+        finally:
+            # fail everything still waiting so callers can reconnect
+            pending, self.pending = self.pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Websocket Closed"))
+
+    async def query(self, params, timeout=PROCESS_TIMEOUT):
+        """
+        :param list(params): ["api", "method", [args]] as for `wss_query`
+        :return: the "result" of the call, else the whole reply, as `wss_query`
+        """
+        if self.reader is None or self.reader.done():
+            raise ConnectionError("Websocket Closed")
+        query_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[query_id] = future
+        try:
+            await self.wss.send(
+                json.dumps(
+                    {
+                        "method": "call",
+                        "params": params,
+                        "jsonrpc": "2.0",
+                        "id": query_id,
+                    }
+                )
+            )
+            ret = await asyncio.wait_for(future, timeout)
+        finally:
+            self.pending.pop(query_id, None)
+        return ret.get("result", ret)
+
+    def subscribe(self, callback_id, callback):
+        """
+        call callback(notice) for every notice tagged with callback_id
+        """
+        self.notices[callback_id] = callback
+
+    def unsubscribe(self, callback_id):
+        self.notices.pop(callback_id, None)
+
+    async def close(self):
+        try:
+            if self.wss is not None:
+                await self.wss.close()
+        except Exception:
+            pass
+        if self.reader is not None:
+            await asyncio.gather(self.reader, return_exceptions=True)
+
+
+class RPC:
+    """
+    synchronous, thread safe facade of AsyncRPC for the `rpc_*` functions in rpc.py
+
+    a dropped connection is reestablished, on the next node, by the next query
+    """
+
+    def __init__(self, node=None):
+        self.loop = asyncio.new_event_loop()
+        Thread(target=self.loop.run_forever, daemon=True).start()
+        self.lock = Lock()
+        # None to follow the node pool's ranking
+        self.node = node
+        self.client = AsyncRPC(node)
+        self.run(self.client.connect())
+
+    def run(self, coroutine, timeout=None):
+        """
+        run a coroutine on the facade's loop and wait for its result
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def query(self, params, client_order_id=1):
+        """
+        the `wss_query` hook; up to 10 attempts, reconnecting between them
+
+        client_order_id is accepted for `wss_query`; queries share the socket, so
+        each is tagged with a json-rpc id of its own
+        """
+        for _ in range(10):
+            client = self.client
+            try:
+                return self.run(client.query(params))
+            except (ConnectionError, asyncio.TimeoutError, TimeoutError):
+                print("RPC failed, switching nodes...")
+                self.reconnect(client)
+        raise RuntimeError("Websocket Closed")
+
+    def reconnect(self, client):
+        """
+        replace a failed client once, however many threads saw it fail
+        """
+        with self.lock:
+            if client is not self.client:
+                return
+            self.run(client.close())
+            # a fresh client connects to the best ranked node
+            NODE_POOL.record(client.node, error=True)
+            self.client = AsyncRPC(self.node)
+            self.run(self.client.connect())
+
+    def subscribe(self, callback_id, callback):
+        """
+        callback(notice) runs on the facade's loop thread; keep it short
+        """
+        self.client.subscribe(callback_id, callback)
+
+    def unsubscribe(self, callback_id):
+        self.client.unsubscribe(callback_id)
+
+    def close(self):
+        try:
+            self.run(self.client.close(), HANDSHAKE_TIMEOUT)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+async def rpc_block_number(rpc):
+    """
+    block number and block prefix
+    """
+    return await rpc.query(["database", "get_dynamic_global_properties", []])
+
+
+async def rpc_account_id(rpc, account_name):
+    """
+    given an account name return an account id
+    """
+    ret = await rpc.query(["database", "lookup_accounts", [account_name, 1]])
+    return ret[0][1]
+
+
+async def rpc_get_account(rpc, account_name):
+    """
+    given an account name return the account object
+    """
+    return await rpc.query(["database", "get_account_by_name", [account_name, 1]])
+
+
+async def rpc_tx_fees(rpc, account_id):
+    """
+    fee for each operation in rpc.TX_FEE_OPS without 10^precision
+    """
+    ret = await rpc.query(tx_fees_params(account_id))
+    return {key: ret[i]["amount"] for i, (_, key) in enumerate(TX_FEE_OPS)}
+
+
+async def rpc_ticker(rpc, asset, currency):
+    return ticker_quote(await rpc.query(["database", "get_ticker", [asset, currency]]))
+
+
+async def rpc_orderbook(rpc, asset, currency, depth=3):
+    """
+    bids and asks; (price, volume) levels as rpc.rpc_orderbook
+    """
+    await resolve_assets(rpc, symbols=[asset])
+    divisor = 10 ** int(METADATA.get("precision", METADATA.get("id", asset)))
+    order_book = await rpc.query(
+        [
+            "database",
+            "get_order_book",
+            [currency, asset, min(int(depth), ORDER_BOOK_LIMIT)],
+        ]
+    )
+    return orderbook_levels(order_book, divisor)
+
+
+async def rpc_pool_book(
+    rpc, pool_id=None, pool_data=None, depth=100, maxvolume=None, fees=False
+):
+    """
+    the simulated book of a liquidity pool, as rpc.rpc_pool_book
+    """
+    if pool_id is not None:
+        pool_data = await rpc_get_objects(rpc, pool_id)
+    elif pool_data is None:
+        raise ValueError("Must provide at least one of pool_id or pool_data")
+    await resolve_assets(rpc, ids=[pool_data["asset_a"], pool_data["asset_b"]])
+    # precisions are cached now; pool_terms makes no call
+    return pool_levels(pool_terms(rpc, pool_data), depth, maxvolume, fees)
+
+
+async def rpc_fill_order_history(rpc, account_id, asset, currency):
+    """
+    the account's fills in one market, as rpc.rpc_fill_order_history
+    """
+    await resolve_assets(rpc, symbols=[asset, currency])
+    ret = await rpc.query(
+        [
+            "history",
+            "get_fill_order_history",
+            [METADATA.get("id", asset), METADATA.get("id", currency), 100],
+        ]
+    )
+    fills = [fill for fill in ret if fill["op"]["account_id"] == account_id]
+    await resolve_assets(rpc, ids=fill_asset_ids(fills))
+    return fill_records(fills, asset, currency)
+
+
+async def rpc_get_objects(rpc, obj_id):
+    return (await rpc.query(["database", "get_objects", [[obj_id]]]))[0]
+
+
+async def rpc_lookup_asset_symbols(rpc, asset):
+    """
+    Given asset names return asset ids and precisions
+    """
+    if isinstance(asset, str):
+        asset = [asset]
+    return await rpc.query(["database", "lookup_asset_symbols", [asset]])
+
+
+async def resolve_assets(rpc, ids=(), symbols=()):
+    """
+    concurrent equivalent of rpc.resolve_assets
+    """
+    ids = sorted(
+        {
+            asset_id
+            for asset_id in ids
+            if any(
+                METADATA.lookup(table, asset_id) is None
+                for table in ("precision", "symbol", "mpa")
+            )
+        }
+    )
+    symbols = sorted(
+        {symbol for symbol in symbols if METADATA.lookup("id", symbol) is None}
+    )
+    by_id, by_symbol = await asyncio.gather(
+        rpc.query(["database", "get_objects", [ids]]) if ids else asyncio.sleep(0, []),
+        rpc_lookup_asset_symbols(rpc, symbols) if symbols else asyncio.sleep(0, []),
+    )
+    METADATA.remember_assets([asset for asset in by_id + by_symbol if asset])
+    METADATA.update(
+        [
+            ("id", symbol, asset["id"])
+            for symbol, asset in zip(symbols, by_symbol)
+            if asset
+        ]
+    )
+
+
+async def rpc_balances(rpc, account_name):
+    """
+    account balances
+    """
+    balances = await rpc.query(
+        ["database", "get_named_account_balances", [account_name, []]]
+    )
+    await resolve_assets(rpc, ids=[obj["asset_id"] for obj in balances])
+    return {
+        METADATA.get("symbol", obj["asset_id"]): int(obj["amount"])
+        / 10 ** METADATA.get("precision", obj["asset_id"])
+        for obj in balances
+    }
+
+
+async def rpc_open_orders(rpc, account_name, pair):
+    """
+    return a list of open orders, for one account, in one market
+    """
+    ret = await rpc.query(["database", "get_full_accounts", [[account_name], "false"]])
+    return open_order_ids(ret, pair)
+
+
+async def rpc_key_reference(rpc, public_key):
+    """
+    given public key return account id
+    """
+    return await rpc.query(["database", "get_key_references", [[public_key]]])
+
+
+async def rpc_get_transaction_hex(rpc, trx):
+    """
+    use this to verify the manually serialized trx buffer
+    """
+    return bytes(await rpc.query(["database", "get_transaction_hex", [trx]]), "utf-8")
+
+
+async def rpc_broadcast_transaction(rpc, trx):
+    """
+    upload the signed transaction to the blockchain
+    """
+    return await rpc.query(["network_broadcast", "broadcast_transaction", [trx]])
+
+
+def unit_test():
+    """
+    sequential vs. concurrent header queries on one socket
+    """
+
+    async def header(rpc):
+        start = time.time()
+        for _ in range(3):
+            await rpc_block_number(rpc)
+        sequential = time.time() - start
+        start = time.time()
+        await asyncio.gather(*[rpc_block_number(rpc) for _ in range(3)])
+        print("sequential %.3f concurrent %.3f" % (sequential, time.time() - start))
+
+    async def main():
+        async with AsyncRPC() as rpc:
+            await header(rpc)
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    unit_test()
@@ -0,0 +1,487 @@
+r"""
+serializers.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Precompiled operation serializers
+
+The operation classes in operations.py build a tree of `Asset`, `Int64`,
+`ObjectId`, ... objects for every operation and join their bytes.  Here each
+operation is a declarative field schema instead, and at import every schema is
+compiled to one flat encoder function; runs of fixed width fields become a single
+`struct.pack_into`, object ids an inline varint, all written into one bytearray:
+
+    pos = ENCODERS[1](limit_order_create, buf, pos)
+
+Field kinds:
+
+    int64, uint8, uint16, uint32, uint64, bool, time  fixed width
+    id:<type>                                         object id instance varint
+    string                                            varint length prefixed text
+    <struct>                                          a nested schema in STRUCTS
+    array:<kind>, sorted:<kind>                       varint length, then items
+    optional:<kind>, present:<kind>                   flag byte if value / key
+    empty                                             varint 0; ignores the value
+    memo, call_order_extensions                       by the operation classes
+
+The classes remain the reference; the tests hold both byte for byte to the
+golden vectors.
+
+"""
+# STANDARD PYTHON MODULES
+from binascii import unhexlify
+from functools import lru_cache
+from struct import calcsize, pack, pack_into
+
+# GRAPHENE SIGNING MODULES
+from .base58 import Base58
+from .config import PREFIX
+from .operations import CallOrderExtension, Memo
+from .types import TYPES, Optional, unicodify
+from .utilities import from_iso_date
+
+# struct format of each fixed width kind
+FIXED = {
+    "int64": "q",
+    "uint8": "B",
+    "uint16": "H",
+    "uint32": "I",
+    "uint64": "Q",
+    "bool": "B",
+    "time": "I",
+    "empty": "B",
+}
+
+# most bytes of a varint holding a 64 bit integer
+VARINT = 10
+
+STRUCTS = {
+    "asset": (("amount", "int64"), ("asset_id", "id:asset")),
+    "price": (("base", "asset"), ("quote", "asset")),
+    "price_feed": (
+        ("settlement_price", "price"),
+        ("maintenance_collateral_ratio", "uint16"),
+        ("maximum_short_squeeze_ratio", "uint16"),
+        ("core_exchange_rate", "price"),
+    ),
+    "asset_options": (
+        ("max_supply", "int64"),
+        ("market_fee_percent", "uint16"),
+        ("max_market_fee", "int64"),
+        ("issuer_permissions", "uint16"),
+        ("flags", "uint16"),
+        ("core_exchange_rate", "price"),
+        ("whitelist_authorities", "array:id:account"),
+        ("blacklist_authorities", "array:id:account"),
+        ("whitelist_markets", "array:id:asset"),
+        ("blacklist_markets", "array:id:asset"),
+        ("description", "string"),
+        ("extensions", "empty"),
+    ),
+    "bitasset_options": (
+        ("feed_lifetime_sec", "uint32"),
+        ("minimum_feeds", "uint8"),
+        ("force_settlement_delay_sec", "uint32"),
+        ("force_settlement_offset_percent", "uint16"),
+        ("maximum_force_settlement_volume", "uint16"),
+        ("short_backing_asset", "id:asset"),
+        ("extensions", "empty"),
+    ),
+}
+
+# {op_id: ((field, kind), ...)}, in wire order
+SCHEMAS = {
+    0: (  # transfer
+        ("fee", "asset"),
+        ("from", "id:account"),
+        ("to", "id:account"),
+        ("amount", "asset"),
+        ("memo", "memo"),
+        ("extensions", "empty"),
+    ),
+    1: (  # limit_order_create
+        ("fee", "asset"),
+        ("seller", "id:account"),
+        ("amount_to_sell", "asset"),
+        ("min_to_receive", "asset"),
+        ("expiration", "time"),
+        ("fill_or_kill", "bool"),
+        ("extensions", "empty"),
+    ),
+    2: (  # limit_order_cancel
+        ("fee", "asset"),
+        ("fee_paying_account", "id:account"),
+        ("order", "id:limit_order"),
+        ("extensions", "empty"),
+    ),
+    3: (  # call_order_update
+        ("fee", "asset"),
+        ("funding_account", "id:account"),
+        ("delta_collateral", "asset"),
+        ("delta_debt", "asset"),
+        ("extensions", "call_order_extensions"),
+    ),
+    10: (  # asset_create
+        ("fee", "asset"),
+        ("issuer", "id:account"),
+        ("symbol", "string"),
+        ("precision", "uint8"),
+        ("common_options", "asset_options"),
+        ("bitasset_opts", "optional:bitasset_options"),
+        ("is_prediction_market", "bool"),
+        ("extensions", "empty"),
+    ),
+    13: (  # asset_update_feed_producers
+        ("fee", "asset"),
+        ("issuer", "id:account"),
+        ("asset_to_update", "id:asset"),
+        ("new_feed_producers", "sorted:id:account"),
+        ("extensions", "empty"),
+    ),
+    14: (  # asset_issue
+        ("fee", "asset"),
+        ("issuer", "id:account"),
+        ("asset_to_issue", "asset"),
+        ("issue_to_account", "id:account"),
+        ("memo", "memo"),
+        ("extensions", "empty"),
+    ),
+    15: (  # asset_reserve
+        ("fee", "asset"),
+        ("payer", "id:account"),
+        ("amount_to_reserve", "asset"),
+        ("extensions", "empty"),
+    ),
+    19: (  # asset_publish_feed
+        ("fee", "asset"),
+        ("publisher", "id:account"),
+        ("asset_id", "id:asset"),
+        ("feed", "price_feed"),
+        ("extensions", "empty"),
+    ),
+    47: (  # asset_claim_pool
+        ("fee", "asset"),
+        ("issuer", "id:account"),
+        ("asset_id", "id:asset"),
+        ("amount_to_claim", "asset"),
+        ("extensions", "empty"),
+    ),
+    59: (  # liquidity_pool_create
+        ("fee", "asset"),
+        ("account", "id:account"),
+        ("asset_a", "id:asset"),
+        ("asset_b", "id:asset"),
+        ("share_asset", "id:asset"),
+        ("taker_fee_percent", "uint16"),
+        ("withdrawal_fee_percent", "uint16"),
+        ("extensions", "empty"),
+    ),
+    60: (  # liquidity_pool_delete
+        ("fee", "asset"),
+        ("account", "id:account"),
+        ("pool", "id:liquidity_pool"),
+        ("extensions", "empty"),
+    ),
+    61: (  # liquidity_pool_deposit
+        ("fee", "asset"),
+        ("account", "id:account"),
+        ("pool", "id:liquidity_pool"),
+        ("amount_a", "asset"),
+        ("amount_b", "asset"),
+        ("extensions", "empty"),
+    ),
+    63: (  # liquidity_pool_exchange
+        ("fee", "asset"),
+        ("account", "id:account"),
+        ("pool", "id:liquidity_pool"),
+        ("amount_to_sell", "asset"),
+        ("min_to_receive", "asset"),
+        ("extensions", "empty"),
+    ),
+    75: (  # liquidity_pool_update
+        ("fee", "asset"),
+        ("account", "id:account"),
+        ("pool", "id:liquidity_pool"),
+        ("taker_fee_percent", "present:uint16"),
+        ("withdrawal_fee_percent", "present:uint16"),
+        ("extensions", "empty"),
+    ),
+}
+
+
+# RUNTIME HELPERS OF THE GENERATED ENCODERS
+# operations of one order share an expiration; strptime is slow
+epoch = lru_cache(maxsize=256)(from_iso_date)
+
+
+def grow(buf, size):
+    """
+    at least size more bytes of room; doubles to keep appends amortized
+    """
+    buf.extend(bytes(max(size, len(buf))))
+
+
+def write(buf, pos, data):
+    """
+    copy bytes into buf at pos, growing it if needed
+    """
+    end = pos + len(data)
+    if end > len(buf):
+        grow(buf, end - len(buf))
+    buf[pos:end] = data
+    return end
+
+
+def write_varint(buf, pos, num):
+    if pos + VARINT > len(buf):
+        grow(buf, VARINT)
+    while num >= 0x80:
+        buf[pos] = (num & 0x7F) | 0x80
+        num >>= 7
+        pos += 1
+    buf[pos] = num
+    return pos + 1
+
+
+def string(value):
+    data = unicodify(value) if value else b""
+    return encode_varint(len(data)) + data
+
+
+def encode_varint(num):
+    buf = bytearray(VARINT)
+    return bytes(buf[: write_varint(buf, 0, num)])
+
+
+def memo(operation):
+    """
+    the optional memo of a transfer or asset issue, as the operation classes do it
+
+    the keys are decoded from base58 only; `base58.PublicKey` would create a
+    libsecp256k1 context for each
+    """
+    value = operation.get("memo")
+    if not value:
+        return b"\x00"
+    if not isinstance(value, dict):
+        return bytes(Optional(Memo(value)))
+    if not value.get("message"):
+        return b"\x00"
+    prefix = operation.get("prefix", PREFIX)
+    message = unhexlify(value["message"])
+    return (
+        b"\x01"
+        + bytes(Base58(value["from"], prefix=prefix))
+        + bytes(Base58(value["to"], prefix=prefix))
+        + pack("<Q", int(value["nonce"]))
+        + encode_varint(len(message))
+        + message
+    )
+
+
+def call_order_extensions(operation):
+    return bytes(CallOrderExtension(operation["extensions"]))
+
+
+def mismatch(expected, got):
+    raise AssertionError(
+        "Object id does not match object type! "
+        + "Excpected %d, got %d" % (expected, int(got))
+    )
+
+
+class Compiler:
+    """
+    python source of one flat encoder function from a field schema
+
+    fixed width fields are batched into one `pack_into`; room in the buffer is
+    checked once per stretch of fields whose size has an upper bound
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.names = 0
+        # pending fixed width run; struct format characters and expressions
+        self.fmt, self.args = "", []
+        # [line index of the pending room check, bytes it must cover]
+        self.guard = None
+
+    def name(self, prefix):
+        self.names += 1
+        return "%s%d" % (prefix, self.names)
+
+    def emit(self, depth, line):
+        self.lines.append("    " * depth + line)
+
+    def open_guard(self, depth):
+        self.emit(depth, "")
+        self.guard = [len(self.lines) - 1, 0, depth]
+
+    def close_guard(self):
+        index, size, depth = self.guard
+        self.lines[index] = (
+            "    " * depth + "if pos + %d > len(buf): grow(buf, %d)" % (size, size)
+            if size
+            else ""
+        )
+
+    def flush(self, depth):
+        if self.fmt:
+            self.emit(
+                depth,
+                "pack_into(%r, buf, pos, %s)" % ("<" + self.fmt, ", ".join(self.args)),
+            )
+            self.emit(depth, "pos += %d" % calcsize("<" + self.fmt))
+        self.fmt, self.args = "", []
+
+    def variable(self, depth):
+        """
+        before code of unbounded size; settle the room check so far
+        """
+        self.flush(depth)
+        self.close_guard()
+
+    def fields(self, schema, expr, depth):
+        for key, kind in schema:
+            self.field(kind, "%s[%r]" % (expr, key) if key else None, expr, depth)
+
+    def field(self, kind, expr, parent, depth):
+        """
+        :param str(expr): python expression of the value
+        :param str(parent): python expression of the dict holding it
+        """
+        if kind in FIXED:
+            if kind == "empty":
+                value = "0"
+            elif kind == "time":
+                value = "epoch(%s)" % expr
+            elif kind == "bool":
+                value = "int(bool(%s))" % expr
+            else:
+                value = "int(%s)" % expr
+            self.fmt += FIXED[kind]
+            self.args.append(value)
+            self.guard[1] += calcsize("<" + FIXED[kind])
+        elif kind in STRUCTS:
+            # no flush; naming the nested dict writes nothing
+            var = self.name("v")
+            self.emit(depth, "%s = %s" % (var, expr))
+            self.fields(STRUCTS[kind], var, depth)
+        elif kind.startswith("id:"):
+            self.flush(depth)
+            self.object_id(expr, TYPES[kind[3:]], depth)
+            self.guard[1] += VARINT
+        elif kind.startswith(("array:", "sorted:")):
+            flavour, item = kind.split(":", 1)
+            items, var = self.name("items"), self.name("item")
+            if flavour == "sorted":
+                expr = 'sorted(%s, key=lambda x: float(x.split(".")[2]))' % expr
+            self.variable(depth)
+            self.emit(depth, "%s = %s or []" % (items, expr))
+            self.emit(depth, "pos = write_varint(buf, pos, len(%s))" % items)
+            self.emit(depth, "for %s in %s:" % (var, items))
+            self.open_guard(depth + 1)
+            self.field(item, var, None, depth + 1)
+            self.variable(depth + 1)
+            self.open_guard(depth)
+        elif kind.startswith(("optional:", "present:")):
+            flavour, inner = kind.split(":", 1)
+            key = expr[len(parent) + 1 : -1]
+            condition = (
+                "%s.get(%s)" % (parent, key)
+                if flavour == "optional"
+                else "%s in %s" % (key, parent)
+            )
+            self.variable(depth)
+            self.emit(depth, "if %s:" % condition)
+            self.open_guard(depth + 1)
+            self.fmt, self.args = "B", ["1"]
+            self.guard[1] += 1
+            self.field(inner, expr, parent, depth + 1)
+            self.variable(depth + 1)
+            self.emit(depth, "else:")
+            self.open_guard(depth + 1)
+            self.fmt, self.args = "B", ["0"]
+            self.guard[1] += 1
+            self.variable(depth + 1)
+            self.open_guard(depth)
+        elif kind == "string":
+            self.variable(depth)
+            self.emit(depth, "pos = write(buf, pos, string(%s))" % expr)
+            self.open_guard(depth)
+        elif kind in ("memo", "call_order_extensions"):
+            self.variable(depth)
+            self.emit(depth, "pos = write(buf, pos, %s(%s))" % (kind, parent))
+            self.open_guard(depth)
+        else:
+            raise ValueError("unknown field kind %s" % kind)
+
+    def object_id(self, expr, type_id, depth):
+        """
+        the instance of an a.b.c id as an inline varint; b must be the type
+        """
+        kind, num = self.name("t"), self.name("n")
+        self.emit(depth, '_, %s, %s = %s.split(".")' % (kind, num, expr))
+        self.emit(
+            depth, "if int(%s) != %d: mismatch(%d, %s)" % (kind, type_id, type_id, kind)
+        )
+        self.emit(depth, "%s = int(%s)" % (num, num))
+        self.emit(depth, "while %s >= 0x80:" % num)
+        self.emit(depth + 1, "buf[pos] = (%s & 0x7F) | 0x80" % num)
+        self.emit(depth + 1, "%s >>= 7" % num)
+        self.emit(depth + 1, "pos += 1")
+        self.emit(depth, "buf[pos] = %s" % num)
+        self.emit(depth, "pos += 1")
+
+    def function(self, name, schema):
+        """
+        :return str(): source of def name(operation, buf, pos) -> pos
+        """
+        self.lines = []
+        self.emit(0, "def %s(operation, buf, pos):" % name)
+        self.open_guard(1)
+        self.fields(schema, "operation", 1)
+        self.variable(1)
+        self.emit(1, "return pos")
+        return "\n".join(line for line in self.lines if line.strip()) + "\n"
+
+
+def compile_encoders(schemas=None):
+    """
+    :return (dict, dict): {op_id: encoder function}, {op_id: its python source}
+    """
+    namespace = {
+        "pack_into": pack_into,
+        "epoch": epoch,
+        "grow": grow,
+        "write": write,
+        "write_varint": write_varint,
+        "string": string,
+        "memo": memo,
+        "call_order_extensions": call_order_extensions,
+        "mismatch": mismatch,
+    }
+    encoders, sources = {}, {}
+    for op_id, schema in (schemas or SCHEMAS).items():
+        name = "encode_%d" % op_id
+        sources[op_id] = Compiler().function(name, schema)
+        exec(compile(sources[op_id], "<serializer %d>" % op_id, "exec"), namespace)
+        encoders[op_id] = namespace[name]
+    return encoders, sources
+
+
+ENCODERS, SOURCES = compile_encoders()
+
@@ -0,0 +1,210 @@
+r"""
+session.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Long-lived broker session; one warm websocket and cached header data for many orders
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except
+
+# STANDARD PYTHON MODULES
+import time
+from threading import Lock, Thread
+
+# GRAPHENE SIGNING MODULES
+from .authorities import AUTHORITIES
+from .balances import BALANCES
+from .base58 import PrivateKey
+from .config import ATTEMPTS, PROCESS_TIMEOUT, SUBSCRIPTION_FEED
+from .fees import FEES
+from .graphene_auth import authenticate
+from .open_orders import OPEN_ORDERS
+from .ref_block import REF_BLOCK
+from .rpc import rpc_account_id, wss_handshake
+from .subscriptions import FEED
+
+
+class Attempt:
+    """
+    one try of an order on a worker thread; whether it was given up on, and
+    whether it got as far as broadcasting
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.cancelled = False
+        self.broadcast = False
+
+    def start_broadcast(self):
+        """
+        :return bool(): True to go ahead and broadcast, False once cancelled
+        """
+        with self.lock:
+            if not self.cancelled:
+                self.broadcast = True
+            return self.broadcast
+
+    def cancel(self):
+        """
+        :return bool(): True if the order may be retried; nothing was broadcast
+        """
+        with self.lock:
+            self.cancelled = True
+            return not self.broadcast
+
+
+class BrokerSession:
+    """
+    Owns one warm websocket connection plus the per-order header data that rarely
+    changes: the fee schedule, the reference block and decoded private keys.
+
+    usage:
+
+        with BrokerSession() as session:
+            for order in orders:
+                session.broker(order)  # or broker(order, session=session)
+
+    Each order is attempted up to `ATTEMPTS` times, each attempt limited to
+    `PROCESS_TIMEOUT` seconds, as with `broker()`.  Instead of terminating a child
+    process, a hung attempt is cancelled and its websocket closed, which unblocks
+    the worker, and the next attempt runs on a fresh connection.  A cancelled
+    attempt never broadcasts; one that timed out while broadcasting is not retried,
+    so an order is never submitted twice.
+    """
+
+    def __init__(self):
+        self.rpc = None
+        # fee schedule cache, shared by every session in the process
+        self.fees = FEES
+        # reference block provider, shared by every session in the process
+        self.block = REF_BLOCK
+        # {wif: PrivateKey}
+        self.keys = {}
+        # {account_name: account_id}
+        self.accounts = {}
+        # one websocket; orders are executed one at a time
+        self.lock = Lock()
+
+    def __enter__(self):
+        self.connect()
+        # keep a recent irreversible block at hand
+        self.block.start()
+        if SUBSCRIPTION_FEED:
+            # new blocks, fee updates, open orders, balances and authorities pushed
+            self.block.follow(FEED)
+            self.fees.follow(FEED)
+            OPEN_ORDERS.follow(FEED)
+            BALANCES.follow(FEED)
+            AUTHORITIES.follow(FEED)
+            FEED.start()
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def connect(self):
+        """
+        (re)establish the warm websocket connection
+        """
+        self.rpc = wss_handshake(self.rpc)
+        return self.rpc
+
+    def close(self):
+        """
+        drop the websocket connection
+        """
+        try:
+            if self.rpc is not None:
+                self.rpc.close()
+        except Exception:
+            pass
+        self.rpc = None
+
+    def private_key(self, wif):
+        """
+        decode each wif once per session
+        """
+        if wif not in self.keys:
+            self.keys[wif] = PrivateKey(wif)
+        return self.keys[wif]
+
+    def block_number(self, rpc):
+        """
+        transaction reference block; see ref_block.RefBlockProvider
+        """
+        return self.block.get(rpc)
+
+    def tx_fees(self, rpc, account_id):
+        """
+        fee schedule; see fees.FeeSchedule for refresh and invalidation
+        """
+        return self.fees.get(rpc, account_id)
+
+    def prefetch(self, rpc, order):
+        """
+        cached keyword arguments for `build_transaction()`
+        """
+        header = order["header"]
+        account_id = header.get("account_id")
+        if account_id is None:
+            name = header["account_name"]
+            if name not in self.accounts:
+                self.accounts[name] = rpc_account_id(rpc, name)
+            account_id = self.accounts[name]
+        return {
+            "block": self.block_number(rpc),
+            "fees": self.tx_fees(rpc, account_id),
+        }
+
+    def broker(self, order, broadcast=True):
+        """
+        in-process equivalent of `broker()` on the session's warm connection
+        """
+        if "client_order_id" not in order["header"]:
+            order["header"]["client_order_id"] = int(time.time() * 1e3)
+        with self.lock:
+            for iteration in range(1, ATTEMPTS + 1):
+                print(
+                    "\nmanualSIGNING authentication attempt:",
+                    iteration,
+                    time.ctime(),
+                    "\n",
+                )
+                if self.rpc is None:
+                    self.connect()
+                result, attempt = [], Attempt()
+                child = Thread(
+                    target=lambda: result.append(
+                        authenticate(self.rpc, order, broadcast, self, attempt)
+                    ),
+                    daemon=True,
+                )
+                child.start()
+                child.join(PROCESS_TIMEOUT)
+                if result:
+                    return result[0]
+                retry = attempt.cancel()
+                # timed out or crashed; closing the socket unblocks a hung worker
+                # and the cached block may have come from a faulty node
+                self.close()
+                self.block.invalidate()
+                if not retry:
+                    # it may be on chain already; another attempt could double it
+                    child.join(PROCESS_TIMEOUT)
+                    return result[0] if result else False
+        return False
@@ -0,0 +1,385 @@
+r"""
+subscriptions.py
+
+  ____  _ _   ____  _
+ | __ )(_) |_/ ___|| |__   __ _ _ __ ___  ___
+ |  _ \| | __\___ \| '_ \ / _` | '__/ _ \/ __|
+ | |_) | | |_ ___) | | | | (_| | | |  __/\__ \
+ |____/|_|\__|____/|_| |_|\__,_|_|  \___||___/
+       ____  _             _
+      / ___|(_) __ _ _ __ (_)_ __   __ _
+      \___ \| |/ _` | '_ \| | '_ \ / _` |
+       ___) | | (_| | | | | | | | | (_| |
+      |____/|_|\__, |_| |_|_|_| |_|\__, |
+               |___/               |___/
+
+
+WTFPL litepresence.com Dec 2021 & squidKid-deluxe Jan 2024
+
+Websocket-client connection for calls that answer with notices
+
+`wss_query` expects the next message on a socket to be the answer to its call; a
+node that was asked for callbacks sends notices in between.  A `NoticeSocket` owns
+one connection and a reader thread that matches answers to calls by json-rpc id
+and hands every notice to the function subscribed to its callback id:
+
+    sock = NoticeSocket().start()
+    sock.subscribe(7, print)
+    sock.query(["network_broadcast", "broadcast_transaction_with_callback", [7, trx]])
+
+A dropped connection is reopened on the best ranked node; `on_drop` runs first,
+then `on_connect`, so an owner can give up or renew what the old node was asked for.
+A socket silent for `NOTICE_TIMEOUT` seconds is pinged with a
+`get_dynamic_global_properties` call; silent as long again, it counts as dropped,
+so a connection that died without closing is not waited on forever.
+
+`FEED` is the process-wide stream of applied blocks and chain object changes,
+from `set_block_applied_callback` and `set_subscribe_callback`, for caches that
+would otherwise poll:
+
+    FEED.listen("block", lambda number, block_id: ...)
+    FEED.listen("object", lambda object_id, obj: ...)  # obj None when removed
+    FEED.listen("reset", lambda: ...)  # notices may have been missed; resync
+    FEED.watch_objects(["2.1.0"])
+    FEED.watch_accounts(["account-name"])
+    FEED.start()
+
+The feed calls the "reset" listeners when the connection drops, and again once it
+has resubscribed to everything watched after the reconnect; caches should not be
+read while `FEED.socket.ready` is clear.
+
+"""
+# DISABLE SELECT PYLINT TESTS
+# pylint: disable=broad-except
+
+# STANDARD PYTHON MODULES
+import itertools
+import json
+import time
+from threading import Event, Lock, Thread
+
+# THIRD PARTY MODULES
+from websocket import WebSocketTimeoutException
+
+# GRAPHENE SIGNING MODULES
+from .config import NOTICE_TIMEOUT, PROCESS_TIMEOUT
+from .node_pool import NODE_POOL
+
+# callback ids of the feed's subscriptions on its own socket
+BLOCK_CALLBACK = 1
+OBJECT_CALLBACK = 2
+
+
+class NoticeSocket:
+    """
+    thread safe calls and notice callbacks on one reconnecting websocket
+
+    :param function(on_connect): called after every (re)connect
+    :param function(on_drop): called when a connection is lost
+    """
+
+    def __init__(self, on_connect=None, on_drop=None):
+        self.on_connect = on_connect
+        self.on_drop = on_drop
+        self.lock = Lock()
+        self.rpc = None
+        self.ready = Event()
+        self.halt = Event()
+        self.thread = None
+        self.ids = itertools.count(1)
+        # {json-rpc id: [Event, answer]}
+        self.pending = {}
+        # {callback id: function(notice)}
+        self.callbacks = {}
+        self.stats = {"connects": 0, "drops": 0, "notices": 0}
+
+    def start(self):
+        """
+        connect and keep connected in a daemon thread
+        """
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return self
+            self.halt.clear()
+            self.thread = Thread(target=self.run, daemon=True)
+            self.thread.start()
+        return self
+
+    def run(self):
+        """
+        connect, read until the connection drops, repeat
+        """
+        while not self.halt.is_set():
+            try:
+                rpc = NODE_POOL.connect()
+                # silence between notices is pinged, not waited out
+                rpc.settimeout(NOTICE_TIMEOUT)
+            except Exception:
+                self.halt.wait(1)
+                continue
+            with self.lock:
+                self.rpc = rpc
+                self.stats["connects"] += 1
+            reader = Thread(target=self.read, args=(rpc,), daemon=True)
+            reader.start()
+            self.ready.set()
+            if self.on_connect is not None:
+                try:
+                    self.on_connect()
+                except Exception:
+                    pass
+            reader.join()
+            self.ready.clear()
+            try:
+                # a dead connection the reader gave up on may still be open
+                rpc.abort()
+            except Exception:
+                pass
+            with self.lock:
+                self.rpc = None
+                pending, self.pending = self.pending, {}
+            # answers that will never come
+            for slot in pending.values():
+                slot[0].set()
+            if self.halt.is_set():
+                break
+            self.stats["drops"] += 1
+            NODE_POOL.record(rpc.node, error=True)
+            if self.on_drop is not None:
+                try:
+                    self.on_drop()
+                except Exception:
+                    pass
+
+    def read(self, rpc):
+        """
+        route every incoming message until the socket closes or goes silent
+        """
+        pinged = False
+        try:
+            while True:
+                try:
+                    message = json.loads(rpc.recv())
+                except WebSocketTimeoutException:
+                    if pinged or self.halt.is_set():
+                        return  # no answer to the ping either; a dead connection
+                    pinged = True
+                    self.ping(rpc)
+                    continue
+                pinged = False
+                if message.get("method") == "notice":
+                    callback_id, notice = message["params"]
+                    self.stats["notices"] += 1
+                    callback = self.callbacks.get(callback_id)
+                    if callback is not None:
+                        try:
+                            callback(notice)
+                        except Exception:
+                            pass
+                    continue
+                with self.lock:
+                    slot = self.pending.pop(message.get("id"), None)
+                if slot is not None:
+                    slot[1] = message
+                    slot[0].set()
+        except Exception:
+            pass
+
+    def ping(self, rpc):
+        """
+        a call whose answer, or any other message, shows the connection is alive
+        """
+        with self.lock:
+            rpc.send(
+                json.dumps(
+                    {
+                        "method": "call",
+                        "params": ["database", "get_dynamic_global_properties", []],
+                        "jsonrpc": "2.0",
+                        "id": next(self.ids),
+                    }
+                )
+            )
+
+    def query(self, params, timeout=PROCESS_TIMEOUT):
+        """
+        :param list(params): ["api", "method", [args]] as for `wss_query`
+        :return: the "result" of the call
+        """
+        if not self.ready.wait(timeout):
+            raise ConnectionError("Websocket Closed")
+        slot = [Event(), None]
+        with self.lock:
+            if self.rpc is None:
+                raise ConnectionError("Websocket Closed")
+            query_id = next(self.ids)
+            self.pending[query_id] = slot
+            rpc = self.rpc
+            start = time.time()
+            try:
+                rpc.send(
+                    json.dumps(
+                        {
+                            "method": "call",
+                            "params": params,
+                            "jsonrpc": "2.0",
+                            "id": query_id,
+                        }
+                    )
+                )
+            except Exception:
+                self.pending.pop(query_id, None)
+                raise ConnectionError("Websocket Closed")
+        if not slot[0].wait(timeout):
+            with self.lock:
+                self.pending.pop(query_id, None)
+            raise TimeoutError("no answer from %s" % rpc.node)
+        if slot[1] is None:
+            raise ConnectionError("Websocket Closed")
+        NODE_POOL.record(rpc.node, latency=time.time() - start)
+        if "error" in slot[1]:
+            raise RuntimeError(slot[1]["error"])
+        return slot[1].get("result")
+
+    def subscribe(self, callback_id, callback):
+        """
+        callback(notice) runs on the reader thread; keep it short
+        """
+        self.callbacks[callback_id] = callback
+
+    def unsubscribe(self, callback_id):
+        self.callbacks.pop(callback_id, None)
+
+    def close(self):
+        self.halt.set()
+        with self.lock:
+            rpc = self.rpc
+        try:
+            # wakes the reader; a close handshake would race it for the socket
+            rpc.abort()
+        except Exception:
+            pass
+
+
+class SubscriptionFeed:
+    """
+    block and object change listeners on one `NoticeSocket`
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.socket = NoticeSocket(on_connect=self.subscribe, on_drop=self.reset)
+        self.socket.subscribe(BLOCK_CALLBACK, self.applied)
+        self.socket.subscribe(OBJECT_CALLBACK, self.changed)
+        self.listeners = {"block": [], "object": [], "reset": []}
+        # what to resubscribe after a reconnect
+        self.objects = set()
+        self.accounts = set()
+        self.stats = {"blocks": 0, "objects": 0, "subscribes": 0}
+
+    def start(self):
+        self.socket.start()
+        return self
+
+    def listen(self, kind, listener):
+        """
+        :param str(kind): "block", "object" or "reset"
+        :param function(listener): runs on the reader thread; keep it short
+        """
+        with self.lock:
+            if listener not in self.listeners[kind]:
+                self.listeners[kind].append(listener)
+
+    def watch_objects(self, object_ids):
+        """
+        object change notices for these ids, eg. "2.1.0" every block
+        """
+        with self.lock:
+            new = sorted(set(object_ids) - self.objects)
+            self.objects.update(new)
+        if new and self.socket.ready.is_set():
+            try:
+                self.socket.query(["database", "get_objects", [new, True]])
+            except Exception:
+                pass  # the reconnect resubscribes
+
+    def watch_accounts(self, account_names):
+        """
+        full account notices; balances, limit orders, etc.
+        """
+        with self.lock:
+            new = sorted(set(account_names) - self.accounts)
+            self.accounts.update(new)
+        if new and self.socket.ready.is_set():
+            try:
+                self.socket.query(["database", "get_full_accounts", [new, True]])
+            except Exception:
+                pass
+
+    def subscribe(self):
+        """
+        on every (re)connect; subscribe to everything watched, then reset listeners
+        """
+        with self.lock:
+            objects, accounts = sorted(self.objects), sorted(self.accounts)
+        self.socket.query(
+            ["database", "set_subscribe_callback", [OBJECT_CALLBACK, False]]
+        )
+        self.socket.query(["database", "set_block_applied_callback", [BLOCK_CALLBACK]])
+        if objects:
+            self.socket.query(["database", "get_objects", [objects, True]])
+        if accounts:
+            self.socket.query(["database", "get_full_accounts", [accounts, True]])
+        self.stats["subscribes"] += 1
+        self.reset()
+
+    def reset(self):
+        """
+        notices may have been missed; tell the "reset" listeners
+        """
+        for listener in self.listeners["reset"][:]:
+            try:
+                listener()
+            except Exception:
+                pass
+
+    def applied(self, notice):
+        """
+        [block_id]; the block number is the first 4 bytes of the id
+        """
+        block_id = notice[0]
+        self.stats["blocks"] += 1
+        for listener in self.listeners["block"][:]:
+            try:
+                listener(int(block_id[:8], 16), block_id)
+            except Exception:
+                pass
+
+    def changed(self, notice):
+        """
+        nested lists of changed objects, and of the ids of removed ones
+        """
+        stack = [notice]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                stack.extend(reversed(item))
+                continue
+            if isinstance(item, dict) and "id" in item:
+                object_id, obj = item["id"], item
+            elif isinstance(item, str):
+                object_id, obj = item, None
+            else:
+                continue
+            self.stats["objects"] += 1
+            for listener in self.listeners["object"][:]:
+                try:
+                    listener(object_id, obj)
+                except Exception:
+                    pass
+
+    def close(self):
+        self.socket.close()
+
+
+FEED = SubscriptionFeed()
@@ -306,9 +306,9 @@ def varint(num):
      - - - continue (see if the number fits in the next 7)
      - - if so, add the last 7 bit chunk
     """
-    data = b""
+    data = bytearray()
     while num >= 0x80:
-        data += bytes([(num & 0x7F) | 0x80])
+        data.append((num & 0x7F) | 0x80)
         num >>= 7
-    data += bytes([num])
-    return data
+    data.append(num)
+    return bytes(data)
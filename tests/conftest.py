@@ -0,0 +1,41 @@
+"""
+mock node fixtures; nothing reaches a real network
+"""
+# THIRD PARTY MODULES
+import pytest
+from websocket import create_connection
+
+# GRAPHENE SIGNING MODULES
+from bitshares_signing import config
+
+# BENCHMARK MODULES
+from benchmarks.mock_node import MockChain, MockNode
+
+
+@pytest.fixture
+def node():
+    node = MockNode().start()
+    yield node
+    node.stop()
+
+
+@pytest.fixture
+def rpc(node):
+    rpc = create_connection(node.url)
+    yield rpc
+    rpc.close()
+
+
+@pytest.fixture
+def nodes():
+    """
+    three mock nodes of one chain, the only `config.NODES` while in use
+    """
+    chain = MockChain()
+    nodes = [MockNode(chain=chain).start() for _ in range(3)]
+    saved = config.NODES[:]
+    config.NODES[:] = [node.url for node in nodes]
+    yield nodes
+    config.NODES[:] = saved
+    for node in nodes:
+        node.stop()
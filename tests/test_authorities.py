@@ -0,0 +1,44 @@
+"""
+AuthorityCache.keys selection of the fewest wifs that satisfy every authority
+"""
+# THIRD PARTY MODULES
+import pytest
+
+# GRAPHENE SIGNING MODULES
+from bitshares_signing import golden_vectors
+from bitshares_signing.authorities import AuthorityCache
+
+# BENCHMARK MODULES
+from benchmarks.benchmark import SIGNER_WIFS, WIF
+from benchmarks.mock_node import PUBLIC_KEY, SIGNER_KEYS
+
+
+def multisig():
+    trx = golden_vectors.transaction(1)
+    trx["operations"][0][1]["seller"] = "1.2.101"
+    return trx
+
+
+def test_public_keys():
+    authorities = AuthorityCache()
+    for wif, key in zip([WIF] + SIGNER_WIFS, [PUBLIC_KEY] + SIGNER_KEYS):
+        assert authorities.public_key(wif) == key
+
+
+def test_fewest_keys(rpc):
+    authorities = AuthorityCache()
+    wifs = [WIF] + SIGNER_WIFS
+    # weight 2 + 1 reaches the threshold of 3
+    assert authorities.keys(rpc, multisig()["operations"], wifs) == SIGNER_WIFS[:2]
+    # with the mock account signing anyway, its authority is the cheaper one
+    both = golden_vectors.transaction(1)
+    both["operations"] += multisig()["operations"]
+    assert authorities.keys(rpc, both["operations"], wifs) == [WIF, SIGNER_WIFS[0]]
+    # one fetch per call that met a new account, then memory only
+    assert authorities.stats["fetches"] == 2
+    assert authorities.keys(None, both["operations"], wifs) == [WIF, SIGNER_WIFS[0]]
+
+
+def test_threshold_not_reached(rpc):
+    with pytest.raises(ValueError):
+        AuthorityCache().keys(rpc, multisig()["operations"], SIGNER_WIFS[1:])
@@ -0,0 +1,64 @@
+"""
+the balance ledger against a mock node's feed; holds on our own spends
+"""
+# STANDARD PYTHON MODULES
+import time
+
+# GRAPHENE SIGNING MODULES
+from bitshares_signing import config, subscriptions
+from bitshares_signing.balances import BalanceLedger, deltas
+from bitshares_signing.rpc import rpc_balances
+from bitshares_signing.subscriptions import SubscriptionFeed
+
+# BENCHMARK MODULES
+from benchmarks.benchmark import ACCOUNT
+
+
+def wait(condition, seconds=5):
+    start = time.time()
+    while not condition() and time.time() - start < seconds:
+        time.sleep(0.01)
+    return condition()
+
+
+def transfer(amount):
+    return [
+        0,
+        {
+            "fee": {"amount": 100, "asset_id": "1.3.0"},
+            "from": ACCOUNT["id"],
+            "to": "1.2.1",
+            "amount": {"amount": amount, "asset_id": "1.3.0"},
+        },
+    ]
+
+
+def test_hold_released_by_balance_notice(node, rpc, monkeypatch):
+    monkeypatch.setattr(config, "NODES", [node.url])
+    monkeypatch.setattr(subscriptions.NODE_POOL, "nodes", config.NODES)
+    feed = SubscriptionFeed()
+    ledger = BalanceLedger()
+    ledger.follow(feed)
+    feed.start()
+    try:
+        assert wait(lambda: feed.stats["subscribes"])
+        start = ledger.get(rpc, ACCOUNT["name"])["BTS"]
+        # two unconfirmed broadcasts, held with no confirmation to settle them
+        first, second = transfer(10**5), transfer(10**6)
+        ledger.hold(ACCOUNT["name"], deltas([first]))
+        ledger.hold(ACCOUNT["name"], deltas([second]))
+        held = ledger.get(rpc, ACCOUNT["name"])["BTS"]
+        assert abs(start - held - 11.002) < 1e-6
+        # the first lands; its notice releases it, not the second
+        updates = ledger.stats["updates"]
+        node.chain.include({"operations": [first]})
+        assert wait(lambda: ledger.stats["updates"] > updates)
+        assert ledger.get(rpc, ACCOUNT["name"])["BTS"] == held
+        assert len(ledger.holds[ACCOUNT["name"]]) == 1
+        # the second lands; nothing is held and nothing counted twice
+        node.chain.include({"operations": [second]})
+        assert wait(lambda: not ledger.holds[ACCOUNT["name"]][0]["change"])
+        assert ledger.get(rpc, ACCOUNT["name"]) == rpc_balances(rpc, ACCOUNT["name"])
+        assert ledger.get(rpc, ACCOUNT["name"])["BTS"] == held
+    finally:
+        feed.close()
@@ -0,0 +1,48 @@
+"""
+Broadcaster outcomes on mock nodes of one chain
+"""
+# GRAPHENE SIGNING MODULES
+from bitshares_signing import config
+from bitshares_signing.broadcast import Broadcaster
+
+
+def test_accepted_then_known(nodes):
+    broadcaster = Broadcaster(width=len(nodes))
+    report = broadcaster.broadcast({"nonce": 1}).wait(every=True)
+    outcomes = sorted(result["outcome"] for result in report.results.values())
+    # one node takes it; the others already have it from the shared chain
+    assert outcomes == ["accepted", "known", "known"]
+    assert report.accepted
+    assert broadcaster.stats["accepted"] == 1
+    assert broadcaster.stats["known"] == 2
+    broadcaster.close()
+
+
+def test_duplicate_is_known(nodes):
+    broadcaster = Broadcaster(width=1)
+    assert broadcaster.broadcast({"nonce": 2}).wait(every=True).accepted
+    report = broadcaster.broadcast({"nonce": 2}).wait(every=True)
+    assert report.accepted
+    assert [result["outcome"] for result in report.results.values()] == ["known"]
+    broadcaster.close()
+
+
+def test_unreachable_node_fails(nodes):
+    config.NODES[:] = ["ws://127.0.0.1:1"]
+    broadcaster = Broadcaster(width=1)
+    report = broadcaster.broadcast({"nonce": 3}).wait(every=True)
+    assert not report.accepted
+    assert report.results["ws://127.0.0.1:1"]["outcome"] == "failed"
+    assert broadcaster.stats["failed"] == 1
+    broadcaster.close()
+
+
+def test_dead_idle_socket_retried(nodes):
+    broadcaster = Broadcaster(width=1)
+    assert broadcaster.broadcast({"nonce": 4}).wait(every=True).accepted
+    # the kept socket dies without anyone noticing
+    for rpc in sum(broadcaster.idle.values(), []):
+        rpc.abort()
+    report = broadcaster.broadcast({"nonce": 5}).wait(every=True)
+    assert [result["outcome"] for result in report.results.values()] == ["accepted"]
+    broadcaster.close()
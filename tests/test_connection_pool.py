@@ -0,0 +1,55 @@
+"""
+ConnectionPool checkout within its timeout
+"""
+# STANDARD PYTHON MODULES
+import time
+
+# THIRD PARTY MODULES
+import pytest
+
+# GRAPHENE SIGNING MODULES
+from bitshares_signing import config, connection_pool
+from bitshares_signing.connection_pool import ConnectionPool
+from bitshares_signing.rpc import rpc_block_number, wss_query
+
+DEAD = "ws://127.0.0.1:1"
+
+
+def test_checkout_reuses(node, monkeypatch):
+    monkeypatch.setattr(config, "NODES", [node.url])
+    monkeypatch.setattr(connection_pool.NODE_POOL, "nodes", config.NODES)
+    with ConnectionPool(size=2, per_node=2) as pool:
+        with pool.connection() as rpc:
+            assert rpc_block_number(rpc)["head_block_number"]
+        with pool.connection() as rpc:
+            assert rpc_block_number(rpc)["head_block_number"]
+        assert pool.stats["opened"] == 1
+
+
+def test_checkout_deadline(monkeypatch):
+    monkeypatch.setattr(config, "NODES", [DEAD])
+    monkeypatch.setattr(connection_pool.NODE_POOL, "nodes", config.NODES)
+    pool = ConnectionPool(size=2, per_node=2)
+    start = time.time()
+    # the node pool gives up when the checkout's time is up, not rounds later
+    with pytest.raises(ConnectionError):
+        pool.checkout(timeout=1.5)
+    assert time.time() - start < 3
+    assert pool.opening == 0
+    pool.close()
+
+
+def test_client_order_id_passed(node, monkeypatch):
+    monkeypatch.setattr(config, "NODES", [node.url])
+    monkeypatch.setattr(connection_pool.NODE_POOL, "nodes", config.NODES)
+    ids = []
+
+    def wss_call(rpc, params, client_order_id=1):
+        ids.append(client_order_id)
+        return call(rpc, params, client_order_id)
+
+    call = connection_pool.wss_call
+    monkeypatch.setattr(connection_pool, "wss_call", wss_call)
+    with ConnectionPool(size=1, per_node=1) as pool:
+        wss_query(pool, ["database", "get_dynamic_global_properties", []], 7)
+    assert ids == [7]
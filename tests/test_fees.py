@@ -0,0 +1,44 @@
+"""
+FeeSchedule quotes and their invalidation on a fee parameter change
+"""
+# GRAPHENE SIGNING MODULES
+from bitshares_signing.fees import FeeSchedule
+
+# BENCHMARK MODULES
+from benchmarks.mock_node import ACCOUNT
+
+
+def test_quote_cached(rpc):
+    fees = FeeSchedule()
+    quote = fees.get(rpc, ACCOUNT["id"])
+    assert fees.get(rpc, ACCOUNT["id"]) == quote
+    assert fees.stats["quotes"] == 1
+    assert fees.stats["hits"] == 1
+
+
+def test_parameter_change_drops_quotes(node, rpc):
+    fees = FeeSchedule()
+    quote = fees.get(rpc, ACCOUNT["id"])
+    # the first schedule seen is adopted, not a change; the quote stays
+    assert not fees.check(rpc, force=True)
+    assert fees.schedule
+    assert ACCOUNT["id"] in fees.accounts
+    # unchanged parameters keep every quote
+    assert not fees.check(rpc, force=True)
+    assert ACCOUNT["id"] in fees.accounts
+    node.chain.fee_scale = 20000
+    assert fees.check(rpc, force=True)
+    assert fees.stats["invalidations"] == 1
+    assert not fees.accounts
+    assert fees.scale == 20000
+    assert fees.get(rpc, ACCOUNT["id"]) != quote
+    assert fees.stats["quotes"] == 2
+
+
+def test_local_price_scales(node, rpc):
+    fees = FeeSchedule()
+    operation = [2, {"fee_paying_account": ACCOUNT["id"], "order": "1.7.1"}]
+    price = fees.fee(rpc, operation)
+    node.chain.fee_scale = 20000
+    fees.check(rpc, force=True)
+    assert fees.fee(rpc, operation) == 2 * price
@@ -0,0 +1,44 @@
+"""
+NodePool.connect gives up rather than loop forever
+"""
+# STANDARD PYTHON MODULES
+import time
+
+# THIRD PARTY MODULES
+import pytest
+
+# GRAPHENE SIGNING MODULES
+from bitshares_signing import node_pool
+from bitshares_signing.node_pool import NodePool
+
+DEAD = "ws://127.0.0.1:1"
+
+
+def test_connect_best(nodes):
+    pool = NodePool(nodes=[DEAD] + [node.url for node in nodes])
+    rpc = pool.connect(exclude=[nodes[0].url])
+    try:
+        assert rpc.node in (nodes[1].url, nodes[2].url)
+    finally:
+        rpc.close()
+
+
+def test_every_node_excluded(node):
+    pool = NodePool(nodes=[node.url])
+    with pytest.raises(ConnectionError):
+        pool.connect(exclude=[node.url])
+
+
+def test_no_node_answers(monkeypatch):
+    monkeypatch.setattr(node_pool, "CONNECT_ROUNDS", 3)
+    pool = NodePool(nodes=[DEAD])
+    start = time.time()
+    with pytest.raises(ConnectionError):
+        pool.connect()
+    # paused 1 then 2 seconds between the rounds
+    assert 3 <= time.time() - start < 10
+    # a deadline cuts the rounds short
+    start = time.time()
+    with pytest.raises(ConnectionError):
+        pool.connect(timeout=1.5)
+    assert 1.4 <= time.time() - start < 3
@@ -0,0 +1,68 @@
+"""
+AsyncRPC connecting, and its calls against a mock node
+"""
+# STANDARD PYTHON MODULES
+import asyncio
+import time
+
+# THIRD PARTY MODULES
+import pytest
+
+# GRAPHENE SIGNING MODULES
+from bitshares_signing import config, rpc_async
+from bitshares_signing import rpc as sync
+from bitshares_signing.rpc_async import AsyncRPC
+
+# BENCHMARK MODULES
+from benchmarks.benchmark import ACCOUNT
+
+DEAD = "ws://127.0.0.1:1"
+
+
+def test_explicit_node_falls_back_to_pool(node, monkeypatch):
+    monkeypatch.setattr(config, "NODES", [node.url])
+    monkeypatch.setattr(rpc_async.NODE_POOL, "nodes", config.NODES)
+
+    async def main():
+        async with AsyncRPC(DEAD) as rpc:
+            assert rpc.node == node.url
+            return await rpc_async.rpc_block_number(rpc)
+
+    assert asyncio.run(main())["head_block_number"]
+
+
+def test_no_node_answers(monkeypatch):
+    monkeypatch.setattr(config, "NODES", [DEAD])
+    monkeypatch.setattr(rpc_async.NODE_POOL, "nodes", config.NODES)
+    monkeypatch.setattr(rpc_async, "CONNECT_ROUNDS", 3)
+    start = time.time()
+    with pytest.raises(ConnectionError):
+        asyncio.run(AsyncRPC().connect())
+    # paused 1 then 2 seconds between the rounds; no hot spin, no endless loop
+    assert 3 <= time.time() - start < 10
+
+
+def test_calls_match_sync(node, rpc):
+    async def main():
+        async with AsyncRPC(node.url) as client:
+            return await asyncio.gather(
+                rpc_async.rpc_ticker(client, "BTS", "HONEST.USD"),
+                rpc_async.rpc_orderbook(client, "BTS", "HONEST.USD", depth=5),
+                rpc_async.rpc_pool_book(client, "1.19.42", depth=5, fees=True),
+                rpc_async.rpc_fill_order_history(
+                    client, ACCOUNT["id"], "BTS", "HONEST.USD"
+                ),
+                client.query(["database", "get_ticker", []]),
+            )
+
+    ticker, book, pool_book, fills, error = asyncio.run(main())
+    assert ticker == sync.rpc_ticker(rpc, "BTS", "HONEST.USD")
+    assert book == sync.rpc_orderbook(rpc, "BTS", "HONEST.USD", depth=5)
+    assert pool_book == sync.rpc_pool_book(rpc, "1.19.42", depth=5, fees=True)
+    assert fills == sync.rpc_fill_order_history(
+        rpc, ACCOUNT["id"], "BTS", "HONEST.USD"
+    )
+    assert [fill["type"] for fill in fills] == ["SELL", "BUY"]
+    # an error reply is returned, as from wss_query
+    reply = sync.wss_query(rpc, ["database", "get_ticker", []])
+    assert error["error"] == reply["error"]
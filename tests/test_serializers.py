@@ -0,0 +1,117 @@
+"""
+serializer and decoder round trips
+"""
+# STANDARD PYTHON MODULES
+import time
+from random import Random
+
+# THIRD PARTY MODULES
+import pytest
+
+# GRAPHENE SIGNING MODULES
+from bitshares_signing import golden_vectors, graphene_signing
+from bitshares_signing.deserializers import decode_transaction
+from bitshares_signing.graphene_signing import (CHAIN_ID, CROSS_CHECKS,
+                                                Operation, serialize_buffer,
+                                                serialize_objects,
+                                                serialize_transaction)
+
+# BENCHMARK MODULES
+from benchmarks.benchmark import random_operation
+
+
+def test_every_operation_has_a_vector():
+    assert set(Operation.operation_map) <= set(golden_vectors.SERIALIZED)
+    assert golden_vectors.INDEPENDENT <= set(golden_vectors.SERIALIZED)
+
+
+@pytest.mark.parametrize("op_id", sorted(golden_vectors.OPS))
+def test_golden_vector(op_id):
+    trx = golden_vectors.transaction(op_id)
+    data = serialize_buffer(trx)
+    assert data.hex() == golden_vectors.SERIALIZED[op_id]
+    assert bytes(serialize_objects(trx)) == data
+    assert serialize_buffer(decode_transaction(data)) == data
+    assert decode_transaction(CHAIN_ID + data, CHAIN_ID) == decode_transaction(data)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_round_trip(seed, monkeypatch):
+    # random_operation draws from the random module; seeded for a repeatable run
+    rng = Random(seed)
+    for name in ("choice", "randrange", "random", "shuffle"):
+        monkeypatch.setattr("benchmarks.benchmark." + name, getattr(rng, name))
+    for _ in range(25):
+        trx = golden_vectors.transaction(0)
+        trx["operations"] = [
+            random_operation(rng.choice(list(golden_vectors.OPS)))
+            for _ in range(rng.randrange(1, 5))
+        ]
+        data = serialize_buffer(trx)
+        assert bytes(serialize_objects(trx)) == data
+        assert serialize_buffer(decode_transaction(data)) == data
+        with pytest.raises(ValueError):
+            decode_transaction(data[: rng.randrange(len(data))])
+
+
+def test_call_order_tcr_zero():
+    def transaction():
+        trx = golden_vectors.transaction(3)
+        trx["operations"][0][1]["extensions"] = {"target_collateral_ratio": 0}
+        return trx
+
+    data = serialize_buffer(transaction())
+    # one extension, option 0, uint16 0; then the empty transaction extensions
+    assert data.hex().endswith("0100" + "0000" + "00")
+    assert bytes(serialize_objects(transaction())) == data
+    decoded = decode_transaction(data)
+    assert decoded["operations"][0][1]["extensions"] == {"target_collateral_ratio": 0}
+    assert serialize_buffer(decoded) == data
+
+
+def test_wrong_prefix():
+    data = serialize_buffer(golden_vectors.transaction(0))
+    with pytest.raises(ValueError):
+        decode_transaction(data, CHAIN_ID)
+
+
+@pytest.mark.parametrize("op_id, checked", [(0, 0), (75, 1)])
+def test_unpinned_operation_cross_checked(op_id, checked, rpc, monkeypatch):
+    # a transaction the 1 in N sampling passes over
+    monkeypatch.setattr(graphene_signing, "SERIALIZATION_CHECK", 1000)
+    monkeypatch.setitem(CROSS_CHECKS, "serialized", 1)
+    before = CROSS_CHECKS["checked"]
+    serialize_transaction(rpc, golden_vectors.transaction(op_id))
+    assert CROSS_CHECKS["checked"] - before == checked
+
+
+def test_background_mismatch_checks_later_transactions(rpc, monkeypatch):
+    monkeypatch.setattr(graphene_signing, "SERIALIZATION_CHECK_BACKGROUND", True)
+    monkeypatch.setitem(CROSS_CHECKS, "failed", 0)
+    calls = []
+
+    def cross_check(rpc, rpc_tx, buf):
+        calls.append(rpc)
+        # as a background check that found the node disagreeing
+        CROSS_CHECKS["failed"] += 1
+
+    monkeypatch.setattr(graphene_signing, "cross_check", cross_check)
+    serialize_transaction(rpc, golden_vectors.transaction(0))
+    start = time.time()
+    while not calls and time.time() - start < 5:
+        time.sleep(0.001)
+    serialize_transaction(rpc, golden_vectors.transaction(0))
+    # the first on a connection of its own, the next on the caller's, waited for
+    assert calls == [None, rpc]
+
+
+def test_mismatch_raises(rpc, monkeypatch, capsys):
+    monkeypatch.setitem(CROSS_CHECKS, "failed", 0)
+    monkeypatch.setattr(
+        graphene_signing, "rpc_get_transaction_hex", lambda rpc, trx: b"f68500"
+    )
+    data = serialize_buffer(golden_vectors.transaction(0))
+    with pytest.raises(RuntimeError):
+        graphene_signing.cross_check(rpc, golden_vectors.transaction(0), data)
+    assert CROSS_CHECKS["failed"] == 1
+    assert "at byte 2" in capsys.readouterr().out
@@ -0,0 +1,40 @@
+"""
+BrokerSession attempts; one given up on is never broadcast
+"""
+# GRAPHENE SIGNING MODULES
+from bitshares_signing import config
+from bitshares_signing.graphene_auth import authenticate
+from bitshares_signing.session import Attempt
+
+# BENCHMARK MODULES
+from benchmarks.benchmark import mock_order
+
+
+def test_cancel_before_broadcast():
+    attempt = Attempt()
+    assert attempt.cancel()
+    assert not attempt.start_broadcast()
+
+
+def test_cancel_while_broadcasting():
+    attempt = Attempt()
+    assert attempt.start_broadcast()
+    # the order may be on chain; it must not be retried
+    assert not attempt.cancel()
+
+
+def test_cancelled_attempt_not_broadcast(node, rpc):
+    saved = config.NODES[:]
+    config.NODES[:] = [node.url]
+    order = mock_order()
+    # as broker() sets it
+    order["header"]["client_order_id"] = 1
+    try:
+        attempt = Attempt()
+        attempt.cancel()
+        assert not authenticate(rpc, order, True, attempt=attempt)
+        assert not node.chain.transactions
+        assert authenticate(rpc, order, True, attempt=Attempt())
+        assert len(node.chain.transactions) == 1
+    finally:
+        config.NODES[:] = saved
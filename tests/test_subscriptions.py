@@ -0,0 +1,88 @@
+"""
+NoticeSocket reconnects, including from a connection gone silent, and the caches
+that follow the feed while it is down
+"""
+# STANDARD PYTHON MODULES
+import time
+from threading import Event
+
+# GRAPHENE SIGNING MODULES
+from bitshares_signing import config, subscriptions
+from bitshares_signing.balances import BalanceLedger
+from bitshares_signing.open_orders import OpenOrdersIndex
+from bitshares_signing.subscriptions import NoticeSocket, SubscriptionFeed
+
+# BENCHMARK MODULES
+from benchmarks.benchmark import ACCOUNT
+
+PAIR = {"asset_id": "1.3.0", "currency_id": "1.3.5"}
+
+
+def wait(condition, seconds=5):
+    start = time.time()
+    while not condition() and time.time() - start < seconds:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_silent_connection_dropped(node, monkeypatch):
+    monkeypatch.setattr(subscriptions, "NOTICE_TIMEOUT", 0.2)
+    monkeypatch.setattr(config, "NODES", [node.url])
+    monkeypatch.setattr(subscriptions.NODE_POOL, "nodes", config.NODES)
+    drops = []
+    sock = NoticeSocket(on_drop=lambda: drops.append(time.time())).start()
+    try:
+        assert wait(sock.ready.is_set)
+        # answered pings keep a quiet connection
+        time.sleep(1)
+        assert not drops
+        # the node stops answering without closing the connection
+        node.delay = 2
+        assert wait(lambda: drops)
+        assert sock.stats["drops"] >= 1
+        node.delay = 0
+        # and a new connection is made
+        assert wait(lambda: sock.stats["connects"] >= 2)
+    finally:
+        sock.close()
+
+
+def test_caches_not_read_while_feed_down(node, rpc, monkeypatch):
+    monkeypatch.setattr(config, "NODES", [node.url])
+    monkeypatch.setattr(subscriptions.NODE_POOL, "nodes", config.NODES)
+    feed = SubscriptionFeed()
+    ledger, index = BalanceLedger(), OpenOrdersIndex()
+    ledger.follow(feed)
+    index.follow(feed)
+    feed.start()
+    try:
+        assert wait(lambda: feed.stats["subscribes"])
+        balances = ledger.get(rpc, ACCOUNT["name"])
+        orders = index.get(rpc, ACCOUNT["name"], PAIR)
+        assert ledger.stats["seeds"] == index.stats["seeds"] == 1
+        # the feed drops and cannot reconnect
+        down = Event()
+        connect = subscriptions.NODE_POOL.connect
+
+        def refuse(*args, **kwargs):
+            if down.is_set():
+                raise ConnectionError("down")
+            return connect(*args, **kwargs)
+
+        monkeypatch.setattr(subscriptions.NODE_POOL, "connect", refuse)
+        down.set()
+        feed.socket.rpc.abort()
+        # reset when the connection drops, not only after the reconnect
+        assert wait(lambda: not ledger.accounts and not index.accounts)
+        assert not feed.socket.ready.is_set()
+        assert ledger.get(rpc, ACCOUNT["name"]) == balances
+        assert index.get(rpc, ACCOUNT["name"], PAIR) == orders
+        assert ledger.stats["fallbacks"] == index.stats["fallbacks"] == 1
+        assert not ledger.accounts and not index.accounts
+        # back up; seeded again
+        down.clear()
+        assert wait(lambda: feed.stats["subscribes"] >= 2)
+        assert ledger.get(rpc, ACCOUNT["name"]) == balances
+        assert ledger.stats["seeds"] == 2
+    finally:
+        feed.close()